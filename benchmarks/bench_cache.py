@@ -0,0 +1,62 @@
+"""Compare the size on disk and load time of the local snapshot with each codec, with and without field pruning.
+
+Usage: python benchmarks/bench_cache.py [--items 50000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from pockette.pocket_cache import CODECS, PocketCache
+
+FAKE_POCKET_RESPONSE_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pocket.json')
+REPEAT = 3
+
+
+def get_pocket_data(item_count: int) -> dict:
+    """Get a synthetic complete `/v3/get` response by repeating the test data items."""
+    with open(FAKE_POCKET_RESPONSE_FILE, 'r', encoding='utf-8') as f_in:
+        pocket_data = json.load(f_in)
+
+    templates = list(pocket_data['list'].values())
+    pocket_data['list'] = {
+        str(i): dict(templates[i % len(templates)], item_id=str(i), resolved_id=str(i)) for i in range(item_count)
+    }
+
+    return pocket_data
+
+
+def main():
+    """Save the snapshot with each option, then time loading it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=50000)
+    args = parser.parse_args()
+
+    pocket_data = get_pocket_data(args.items)
+    print(f'Snapshot: {args.items:,} items')
+    print(f'{"codec":>6} {"fields":>7} {"size":>12} {"save":>10} {"load":>10}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in ['none'] + sorted(CODECS):
+            for prune in (False, True):
+                cache = PocketCache(os.path.join(directory, f'{codec}-{prune}.json'), codec=codec, prune=prune)
+
+                start = time.perf_counter()
+                cache.save(pocket_data)
+                save_time = time.perf_counter() - start
+
+                load_times = []
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    cache.load()
+                    load_times.append(time.perf_counter() - start)
+
+                print(f'{codec:>6} {"used" if prune else "all":>7} '
+                      f'{os.path.getsize(cache.data_file) / 2 ** 10:>8,.1f} KiB {save_time * 1000:>7,.0f} ms '
+                      f'{min(load_times) * 1000:>7,.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
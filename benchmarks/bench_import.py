@@ -0,0 +1,59 @@
+"""Measure the time to import the CLI with `python -X importtime`, and check it against a budget.
+
+Usage: python benchmarks/bench_import.py [--budget 100] [--module pockette.cli]
+
+Exits with status 1 when the fastest import is slower than the budget, in milliseconds.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+REPEAT = 5
+TOP_COUNT = 10
+
+# `import time: self [us] | cumulative | imported package`, with nested imports indented
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def get_import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """Import a module in a fresh process, and get the self and cumulative time of each import, in microseconds."""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], check=True, capture_output=True, text=True
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return times
+
+
+def main():
+    """Import the module several times, and report the fastest run and its slowest imports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=100.0)
+    parser.add_argument('--module', default='pockette.cli')
+    args = parser.parse_args()
+
+    runs = [get_import_times(args.module) for _ in range(REPEAT)]
+    times = min(runs, key=lambda run: run[args.module][1])
+    total = times[args.module][1] / 1000
+
+    print(f'Slowest imports of {args.module} (self time):')
+    for name, (self_time, _) in sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:TOP_COUNT]:
+        print(f'{self_time / 1000:8.1f} ms  {name}')
+
+    print(f'Importing {args.module} takes {total:.1f} ms (budget: {args.budget:.0f} ms)')
+
+    if total > args.budget:
+        print('Over budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
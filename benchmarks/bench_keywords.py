@@ -0,0 +1,85 @@
+"""Compare matching many --include keywords one at a time vs. with the compiled matcher.
+
+Usage: python benchmarks/bench_keywords.py [--items 50000] [--keywords 24 100]
+
+With many keywords, the matcher uses an Aho-Corasick automaton if `pyahocorasick` is installed.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import time
+
+from pockette.pocket_item import PocketItem
+from pockette.pocket_matcher import KeywordMatcher
+
+FAKE_POCKET_RESPONSE_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pocket.json')
+
+
+def get_items(item_count: int) -> list:
+    """Get synthetic items by repeating the test data items."""
+    with open(FAKE_POCKET_RESPONSE_FILE, 'r', encoding='utf-8') as f_in:
+        links = list(json.load(f_in)['list'].values())
+
+    items = []
+    for i in range(item_count):
+        link = dict(links[i % len(links)], item_id=str(i))
+        link['excerpt'] = f"{link['excerpt']} {i}"
+        items.append(PocketItem.from_dict(link))
+
+    return items
+
+
+def get_keywords(keyword_count: int) -> str:
+    """Get mostly non-matching keywords, the worst case for matching one at a time."""
+    random.seed(0)
+    keywords = [''.join(random.choices(string.ascii_lowercase, k=8)) for _ in range(keyword_count - 2)]
+    return ','.join(keywords + ['propublica', 'kaepernick'])
+
+
+def match_one_at_a_time(keywords: str, item: PocketItem) -> bool:
+    """Previous path: parse the keywords again for every item, then check each one."""
+    for keyword in keywords.lower().split(','):
+        keyword = keyword.strip()
+        if keyword in item.search_text:
+            return True
+
+    return False
+
+
+def main():
+    """Time both matchers for each keyword count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--keywords', type=int, nargs='+', default=[24, 100])
+    args = parser.parse_args()
+
+    items = get_items(args.items)
+    for keyword_count in args.keywords:
+        compare_matchers(items, get_keywords(keyword_count))
+
+
+def compare_matchers(items: list, keywords: str):
+    """Time both matchers on the same keywords."""
+    matcher = KeywordMatcher(keywords)
+    backend = 'Aho-Corasick' if matcher.automaton is not None else 'substring'
+    print(f'\n{len(items):,} items, {len(matcher.keywords)} keywords ({backend})')
+
+    start = time.perf_counter()
+    loop_matches = sum(match_one_at_a_time(keywords, item) for item in items)
+    loop_time = time.perf_counter() - start
+    print(f'One at a time: {loop_time * 1000:8.1f} ms ({loop_matches:,} matches)')
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    compiled_matches = sum(matcher.is_match(item.search_text) for item in items)
+    compiled_time = time.perf_counter() - start
+    print(f'     Compiled: {compiled_time * 1000:8.1f} ms ({compiled_matches:,} matches)')
+
+    print(f'Compiled matcher is {loop_time / compiled_time:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
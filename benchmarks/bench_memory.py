@@ -0,0 +1,107 @@
+"""Compare peak memory of loading a Pocket response with `json.loads` vs. the streaming parser.
+
+Usage: python benchmarks/bench_memory.py [--items 50000]
+"""
+
+import argparse
+import copy
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+FAKE_POCKET_RESPONSE_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pocket.json')
+CHUNK_SIZE = 64 * 1024
+
+
+def write_synthetic_response(path: str, item_count: int):
+    """Write a synthetic `/v3/get` response by repeating the test data items."""
+    with open(FAKE_POCKET_RESPONSE_FILE, 'r', encoding='utf-8') as f_in:
+        pocket_data = json.load(f_in)
+
+    templates = list(pocket_data['list'].values())
+    pocket_data['list'] = {}
+
+    for i in range(item_count):
+        link = copy.deepcopy(templates[i % len(templates)])
+        link['item_id'] = link['resolved_id'] = str(i)
+        pocket_data['list'][str(i)] = link
+
+    with open(path, 'w', encoding='utf-8') as f_out:
+        json.dump(pocket_data, f_out)
+
+
+def iter_chunks(path: str):
+    """Read a file in chunks, like `Response.iter_content`."""
+    with open(path, 'rb') as f_in:
+        while True:
+            chunk = f_in.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def get_peak_rss() -> int:
+    """Get this process's peak resident set size in bytes."""
+    # On Linux, `ru_maxrss` is inherited from the parent process, but `VmHWM` starts over at exec
+    try:
+        with open('/proc/self/status', 'r', encoding='utf-8') as f_in:
+            for line in f_in:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def run_loader(loader: str, path: str):
+    """Load the response with one loader and print the peak RSS increase."""
+    from pockette.pocket_stream import parse_pocket_response  # pylint: disable=import-outside-toplevel
+
+    baseline = get_peak_rss()
+
+    if loader == 'json':
+        # Previous path: the full decoded text, then the full parsed response
+        text = b''.join(iter_chunks(path)).decode('utf-8')
+        pocket_data = json.loads(text)
+    else:
+        pocket_data = parse_pocket_response(iter_chunks(path))
+
+    print(get_peak_rss() - baseline, len(pocket_data['list']))
+
+
+def main():
+    """Run each loader in a fresh process and compare."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--loader', choices=['json', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.loader:
+        run_loader(args.loader, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'pocket.json')
+        write_synthetic_response(path, args.items)
+        print(f'Response: {args.items:,} items, {os.path.getsize(path) / 2 ** 20:,.1f} MiB')
+
+        results = {}
+        for loader in ('json', 'stream'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--loader', loader, '--path', path],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            results[loader] = int(output[0])
+            print(f'{loader:>6}: peak RSS +{results[loader] / 2 ** 20:,.1f} MiB ({int(output[1]):,} items)')
+
+        print(f'Streaming uses {results["json"] / max(results["stream"], 1):.1f}x less peak memory')
+
+
+if __name__ == '__main__':
+    main()
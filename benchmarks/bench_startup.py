@@ -0,0 +1,90 @@
+"""Compare the time to load the local snapshot and print 10 links, from the JSON vs. the binary snapshot.
+
+Usage: python benchmarks/bench_startup.py [--items 50000]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+FAKE_POCKET_RESPONSE_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pocket.json')
+REPEAT = 5
+
+
+def write_snapshot(path: str, item_count: int):
+    """Write synthetic JSON and binary snapshots by repeating the test data items."""
+    from pockette.pocket_cache import PocketCache  # pylint: disable=import-outside-toplevel
+    from pockette.pocket_item import PocketItem  # pylint: disable=import-outside-toplevel
+
+    with open(FAKE_POCKET_RESPONSE_FILE, 'r', encoding='utf-8') as f_in:
+        pocket_data = json.load(f_in)
+
+    templates = list(pocket_data['list'].values())
+    pocket_data['list'] = {
+        str(i): dict(templates[i % len(templates)], item_id=str(i), time_added=str(1500000000 + i))
+        for i in range(item_count)
+    }
+
+    cache = PocketCache(path)
+    cache.save(pocket_data)
+    cache.save_binary([PocketItem.from_dict(link) for link in pocket_data['list'].values()], cache.source_stat)
+
+
+def run_loader(loader: str, path: str):
+    """Load the snapshot and search it with one loader, and print the time taken."""
+    start = time.perf_counter()
+
+    from pockette.pocket_cache import PocketCache  # pylint: disable=import-outside-toplevel
+    from pockette.pocket_handler import PocketDataHandler  # pylint: disable=import-outside-toplevel
+
+    if loader == 'json':
+        # Previous path: parse the JSON snapshot and create every item
+        PocketCache.load_binary = lambda self: None  # type: ignore[method-assign]
+        PocketCache.save_binary = lambda self, items, source_stat: None  # type: ignore[method-assign]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        PocketDataHandler(data_file=path, offline=True).search_pocket_data(count=10)
+
+    print(time.perf_counter() - start)
+
+
+def main():
+    """Run each loader in fresh processes and compare the fastest runs."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--loader', choices=['json', 'binary'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.loader:
+        run_loader(args.loader, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, '.pocket.json')
+        write_snapshot(path, args.items)
+        print(f'Snapshot: {args.items:,} items, {os.path.getsize(path) / 2 ** 20:,.1f} MiB JSON, '
+              f'{os.path.getsize(f"{path}.bin") / 2 ** 20:,.1f} MiB binary')
+
+        results = {}
+        for loader in ('json', 'binary'):
+            results[loader] = min(
+                float(subprocess.run(
+                    [sys.executable, __file__, '--loader', loader, '--path', path],
+                    check=True, capture_output=True, text=True
+                ).stdout)
+                for _ in range(REPEAT)
+            )
+            print(f'{loader:>6}: {results[loader] * 1000:,.1f} ms')
+
+        print(f'The binary snapshot is {results["json"] / results["binary"]:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,26 @@ COUNT_DEFAULT = 10
 SHORT_MIN_DEFAULT = 4
 LONG_MIN_DEFAULT = 10
 
+CACHE_TTL_DEFAULT = 15 * 60  # Seconds
+CACHE_HARD_TTL_DEFAULT = 24 * 60 * 60  # Seconds
+CACHE_CODEC_DEFAULT = 'none'
+
+PAGE_SIZE_DEFAULT = 500
+WORKERS_DEFAULT = 4
+
+TIMEOUT_DEFAULT = 30.0  # Seconds
+CONNECT_TIMEOUT_DEFAULT = 5.0  # Seconds
+RETRIES_DEFAULT = 3
+HTTP_CLIENT_DEFAULT = 'requests'
+
+TABS_MAX_DEFAULT = 2 * COUNT_DEFAULT
+TAB_RATE_DEFAULT = 10.0  # Tabs per second
+TAB_BATCH_DEFAULT = 2
+TAB_WORKERS_DEFAULT = 2
+
+# Which URLs of a link to open: the Pocket reader, the original page, or both
+OPEN_MODES = ('both', 'pocket', 'original')
+
 """
 Changelog
 
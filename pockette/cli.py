@@ -1,11 +1,23 @@
-"""Command line tools for working with Pocket."""
+"""Command line tools for working with Pocket.
+
+Commands import the modules they need when they run, so that `pockette --version`, `pockette help`, and queries
+answered by `pockette serve` don't import `requests`, NumPy, or the data handler.
+"""
+
+import os
+import signal
+import socket
+import sys
+from typing import TYPE_CHECKING, Union
 
 import click
 
 from pockette import VERSION
-from pockette.options import report_options, search_options
-from pockette.pocket_handler import PocketDataHandler
-from pockette.pocket_setup import PocketSetupHandler
+from pockette.options import cache_options, http_options, report_options, search_options, tab_options
+from pockette.pocket_daemon import SHARED_OPTIONS, PocketDaemonClient
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pockette.pocket_handler import PocketDataHandler
 
 
 @click.group()
@@ -15,6 +27,60 @@ def cli(ctx, *args, **kwargs):  # pylint: disable=unused-argument
     """Command line tools for working with Pocket."""
 
 
+def _get_pocket_data_handler(ctx: click.core.Context) -> Union['PocketDataHandler', PocketDaemonClient]:
+    """Get a Pocket data handler from the local snapshot options.
+
+    Queries go to `pockette serve` when it is running, and are answered in this process otherwise. Syncing now
+    with --refresh or --full-sync always happens in this process.
+    """
+    _check_cache_options(ctx)
+
+    if ctx.params['refresh'] or ctx.params['full_sync']:
+        return _create_pocket_data_handler(ctx)
+
+    return PocketDaemonClient(
+        _get_socket_path(ctx), options=_get_daemon_options(ctx),
+        create_handler=lambda: _create_pocket_data_handler(ctx)
+    )
+
+
+def _check_cache_options(ctx: click.core.Context):
+    """Check that the local snapshot options can be used together."""
+    if ctx.params['offline'] and (ctx.params['refresh'] or ctx.params['full_sync']):
+        raise click.UsageError('--offline cannot be used with --refresh or --full-sync.')
+
+
+def _create_pocket_data_handler(ctx: click.core.Context, sync_now: bool = True) -> 'PocketDataHandler':
+    """Create a Pocket data handler in this process.
+
+    Without `sync_now`, the handler is being reloaded in the background, so --refresh and --full-sync are ignored
+    and errors are raised instead of printed.
+    """
+    from pockette.pocket_handler import PocketDataHandler  # pylint: disable=import-outside-toplevel
+
+    return PocketDataHandler(
+        data_file=ctx.params['data_file'], cache_ttl=ctx.params['cache_ttl'],
+        refresh=sync_now and ctx.params['refresh'], offline=ctx.params['offline'],
+        full_sync=sync_now and ctx.params['full_sync'], page_size=ctx.params['page_size'],
+        workers=ctx.params['workers'], store=ctx.params['store'], cache_codec=ctx.params['cache_codec'],
+        cache_hard_ttl=ctx.params['cache_hard_ttl'], timeout=ctx.params['timeout'],
+        connect_timeout=ctx.params['connect_timeout'], retries=ctx.params['retries'],
+        http_client=ctx.params['http_client'], background=not sync_now
+    )
+
+
+def _get_socket_path(ctx: click.core.Context) -> str:
+    """Get the location of the daemon's socket, next to the local snapshot by default."""
+    return ctx.params['socket_path'] or f"{ctx.params['data_file']}.sock"
+
+
+def _get_daemon_options(ctx: click.core.Context) -> dict:
+    """Get the options that the daemon and its clients must share."""
+    options = {name: ctx.params[name] for name in SHARED_OPTIONS}
+    options['data_file'] = os.path.realpath(ctx.params['data_file'])
+    return options
+
+
 @click.command(name='help', add_help_option=False)
 @click.pass_context
 def _help(ctx: click.core.Context):
@@ -23,10 +89,15 @@ def _help(ctx: click.core.Context):
 
 
 @click.command()
+@http_options
 @click.pass_context
 def setup(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument
     """Set up Pocket CLI."""
-    PocketSetupHandler()
+    from pockette.pocket_setup import PocketSetupHandler  # pylint: disable=import-outside-toplevel
+
+    PocketSetupHandler(
+        timeout=ctx.params['timeout'], connect_timeout=ctx.params['connect_timeout'], retries=ctx.params['retries']
+    )
 
 
 @click.command()
@@ -41,18 +112,23 @@ def report(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argumen
     end_date = ctx.params['end_date']
     include_keywords = ctx.params['include_keywords']
     exclude_keywords = ctx.params['exclude_keywords']
+    favorite = ctx.params['favorite']
+    match = ctx.params['match']
+    output = ctx.params['output']
+    fields = ctx.params['fields']
 
-    pdh = PocketDataHandler()
+    pdh = _get_pocket_data_handler(ctx)
     pdh.generate_report(
         count=count, show_all=show_all, length=length, start_date=start_date, end_date=end_date,
-        include_keywords=include_keywords, exclude_keywords=exclude_keywords
+        include_keywords=include_keywords, exclude_keywords=exclude_keywords, favorite=favorite,
+        match=match, output=output, fields=fields
     )
 
 
 @click.command()
 @search_options
 @click.pass_context
-def search(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument
+def search(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument,too-many-locals
     """Search through links."""
     count = ctx.params['count']
     offset = ctx.params['offset']
@@ -65,19 +141,28 @@ def search(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argumen
     end_date = ctx.params['end_date']
     include_keywords = ctx.params['include_keywords']
     exclude_keywords = ctx.params['exclude_keywords']
-
-    pdh = PocketDataHandler()
+    favorite = ctx.params['favorite']
+    match = ctx.params['match']
+    seed = ctx.params['seed']
+    weight = ctx.params['weight']
+    preferred_domains = ctx.params['preferred_domains']
+    output = ctx.params['output']
+    fields = ctx.params['fields']
+
+    pdh = _get_pocket_data_handler(ctx)
     pdh.search_pocket_data(
         count=count, offset=offset, is_random=is_random, sort_order=sort_order,
         reverse_order=reverse_order, show_all=show_all, length=length, start_date=start_date, end_date=end_date,
-        include_keywords=include_keywords, exclude_keywords=exclude_keywords
+        include_keywords=include_keywords, exclude_keywords=exclude_keywords, favorite=favorite,
+        match=match, seed=seed, weight=weight, preferred_domains=preferred_domains, output=output, fields=fields
     )
 
 
 @click.command()
 @search_options
+@tab_options
 @click.pass_context
-def read(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument
+def read(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument,too-many-locals
     """Open links in browser."""
     count = ctx.params['count']
     offset = ctx.params['offset']
@@ -90,17 +175,68 @@ def read(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument
     end_date = ctx.params['end_date']
     include_keywords = ctx.params['include_keywords']
     exclude_keywords = ctx.params['exclude_keywords']
-
-    pdh = PocketDataHandler()
+    favorite = ctx.params['favorite']
+    match = ctx.params['match']
+    seed = ctx.params['seed']
+    weight = ctx.params['weight']
+    preferred_domains = ctx.params['preferred_domains']
+    output = ctx.params['output']
+    fields = ctx.params['fields']
+    open_mode = ctx.params['open_mode']
+    max_tabs = ctx.params['max_tabs']
+    tab_rate = ctx.params['tab_rate']
+    tab_batch_size = ctx.params['tab_batch_size']
+    tab_workers = ctx.params['tab_workers']
+
+    pdh = _get_pocket_data_handler(ctx)
     pdh.search_pocket_data(
         count=count, offset=offset, is_random=is_random, sort_order=sort_order,
         reverse_order=reverse_order, show_all=show_all, length=length, start_date=start_date, end_date=end_date,
-        include_keywords=include_keywords, exclude_keywords=exclude_keywords, open_sites=True
+        include_keywords=include_keywords, exclude_keywords=exclude_keywords, favorite=favorite,
+        match=match, seed=seed, weight=weight, preferred_domains=preferred_domains, output=output, fields=fields,
+        open_sites=True, open_mode=open_mode, max_tabs=max_tabs, tab_rate=tab_rate, tab_batch_size=tab_batch_size,
+        tab_workers=tab_workers
     )
 
 
+@click.command()
+@cache_options
+@click.pass_context
+def serve(ctx: click.core.Context, **kwargs):  # pylint: disable=unused-argument
+    """Serve links to other commands from memory."""
+    _check_cache_options(ctx)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        click.echo('ERROR: Serving needs Unix domain sockets, which are not available on this platform.')
+        sys.exit(1)
+
+    # Unix domain sockets aren't available on every platform
+    from pockette.pocket_server import PocketDaemon  # pylint: disable=import-outside-toplevel
+
+    socket_path = _get_socket_path(ctx)
+
+    try:
+        daemon = PocketDaemon(
+            socket_path, create_handler=lambda sync_now: _create_pocket_data_handler(ctx, sync_now=sync_now),
+            options=_get_daemon_options(ctx),
+            refresh_interval=max(ctx.params['cache_ttl'], 1)
+        )
+    except OSError as error:
+        click.echo(f'ERROR: {error}')
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    click.echo(f'Serving Pocket data on {socket_path}. Press Ctrl+C to stop.')
+
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+
+
 cli.add_command(_help)
 cli.add_command(setup)
 cli.add_command(read)
 cli.add_command(report)
 cli.add_command(search)
+cli.add_command(serve)
@@ -1,8 +1,18 @@
 """Command-line options and arguments."""
 
+from typing import Callable, Iterable
+
 import click
 
-from pockette import COUNT_DEFAULT, SHORT_MIN_DEFAULT, LONG_MIN_DEFAULT
+from pockette import (
+    CACHE_CODEC_DEFAULT, CACHE_HARD_TTL_DEFAULT, CACHE_TTL_DEFAULT, CONNECT_TIMEOUT_DEFAULT, COUNT_DEFAULT,
+    DATA_FILE, HTTP_CLIENT_DEFAULT, OPEN_MODES, SHORT_MIN_DEFAULT, LONG_MIN_DEFAULT, PAGE_SIZE_DEFAULT,
+    RETRIES_DEFAULT, TABS_MAX_DEFAULT, TAB_BATCH_DEFAULT, TAB_RATE_DEFAULT, TAB_WORKERS_DEFAULT, TIMEOUT_DEFAULT,
+    WORKERS_DEFAULT
+)
+from pockette.pocket_output import (
+    OUTPUT_FORMATS, REPORT_FIELDS, REPORT_FIELDS_DEFAULT, SEARCH_FIELDS, SEARCH_FIELDS_DEFAULT, parse_fields
+)
 
 
 def count_option(func):
@@ -24,6 +34,33 @@ def random_option(func):
     return click.option('--random', 'is_random', is_flag=True, default=False, help="Randomize selection.")(func)
 
 
+def seed_option(func):
+    """Option for repeating a random selection."""
+    return click.option(
+        '--seed', type=int, default=None, help="Seed for --random, to pick the same links again."
+    )(func)
+
+
+def weight_option(func):
+    """Option for favoring some links in a random selection."""
+    default = 'none'
+    return click.option(
+        '--weight',
+        default=default,
+        type=click.Choice(['none', 'older']),
+        help=f"With --random, pick older links more often (default: {default})."
+    )(func)
+
+
+def prefer_option(func):
+    """Option for favoring some domains in a random selection."""
+    return click.option(
+        '--prefer',
+        'preferred_domains',
+        help="With --random, pick links from these domain(s) more often (comma-separated)."
+    )(func)
+
+
 def sort_option(func):
     """Option for changing the sort method."""
     default = 'time'
@@ -57,6 +94,18 @@ def exclude_option(func):
     )(func)
 
 
+def match_option(func):
+    """Option for how keywords are matched."""
+    default = 'substring'
+    return click.option(
+        '--match',
+        'match',
+        default=default,
+        type=click.Choice(['substring', 'token']),
+        help=f"Match keywords anywhere in the text (substring) or as whole words (token) (default: {default})."
+    )(func)
+
+
 def start_option(func):
     """Option for setting a start date in the search."""
     return click.option(
@@ -87,34 +136,365 @@ def length_option(func):
     )(func)
 
 
+def favorite_option(func):
+    """Option to return only favorite items."""
+    return click.option(
+        '--favorite', 'favorite', is_flag=True, default=False, help="Show only favorite pages."
+    )(func)
+
+
 def all_option(func):
     """Option to return all items."""
     return click.option('--all', 'show_all', is_flag=True, help="Show all unread results.")(func)
 
 
+def output_option(func):
+    """Option for printing results as machine-readable records."""
+    default = 'text'
+    return click.option(
+        '--output',
+        'output',
+        default=default,
+        type=click.Choice(list(OUTPUT_FORMATS)),
+        help=f"Print results as text, or as JSON Lines, CSV, or TSV records (default: {default})."
+    )(func)
+
+
+def _get_fields_option(fields: Iterable[str], default: str) -> Callable:
+    """Get an option for the fields of the records printed with --output."""
+    fields = list(fields)
+
+    def validate_fields(ctx, param, value: str) -> list:  # pylint: disable=unused-argument
+        selected_fields = parse_fields(value)
+        unknown_fields = [field for field in selected_fields if field not in fields]
+
+        if not selected_fields or unknown_fields:
+            raise click.BadParameter(f"choose from {', '.join(fields)}.")
+
+        return selected_fields
+
+    def fields_option(func):
+        return click.option(
+            '--fields',
+            'fields',
+            default=default,
+            callback=validate_fields,
+            help=f"Fields of the records printed with --output (comma-separated) (default: {default}). "
+                 f"Choices: {', '.join(fields)}."
+        )(func)
+
+    return fields_option
+
+
+search_fields_option = _get_fields_option(SEARCH_FIELDS, SEARCH_FIELDS_DEFAULT)
+report_fields_option = _get_fields_option(REPORT_FIELDS, REPORT_FIELDS_DEFAULT)
+
+
+def refresh_option(func):
+    """Option to ignore the local snapshot and download fresh data."""
+    return click.option(
+        '--refresh', is_flag=True, default=False, help="Download fresh data instead of using the local snapshot."
+    )(func)
+
+
+def offline_option(func):
+    """Option to only use the local snapshot."""
+    return click.option(
+        '--offline', is_flag=True, default=False, help="Use the local snapshot without connecting to Pocket."
+    )(func)
+
+
+def full_sync_option(func):
+    """Option to download all data instead of only the changes since the last sync."""
+    return click.option(
+        '--full-sync',
+        'full_sync',
+        is_flag=True,
+        default=False,
+        help="Download all data instead of only the changes since the last sync."
+    )(func)
+
+
+def data_file_option(func):
+    """Option for the local snapshot location."""
+    return click.option(
+        '--data-file',
+        'data_file',
+        envvar='POCKETTE_DATA_FILE',
+        default=DATA_FILE,
+        type=click.Path(dir_okay=False),
+        help="Local snapshot file (env: POCKETTE_DATA_FILE)."
+    )(func)
+
+
+def cache_ttl_option(func):
+    """Option for how long the local snapshot stays fresh."""
+    return click.option(
+        '--cache-ttl',
+        'cache_ttl',
+        envvar='POCKETTE_CACHE_TTL',
+        default=CACHE_TTL_DEFAULT,
+        type=click.IntRange(min=0),
+        help=f"Seconds before the local snapshot is refreshed (default: {CACHE_TTL_DEFAULT})."
+    )(func)
+
+
+def cache_hard_ttl_option(func):
+    """Option for how long a stale local snapshot can be used while it is refreshed in the background."""
+    return click.option(
+        '--cache-hard-ttl',
+        'cache_hard_ttl',
+        envvar='POCKETTE_CACHE_HARD_TTL',
+        default=CACHE_HARD_TTL_DEFAULT,
+        type=click.IntRange(min=0),
+        help=f"Seconds before a stale local snapshot is synced before it is used, instead of in the background "
+             f"(default: {CACHE_HARD_TTL_DEFAULT})."
+    )(func)
+
+
+def cache_codec_option(func):
+    """Option for how the local snapshot is compressed."""
+    return click.option(
+        '--cache-codec',
+        'cache_codec',
+        envvar='POCKETTE_CACHE_CODEC',
+        default=CACHE_CODEC_DEFAULT,
+        type=click.Choice(['none', 'gzip', 'zlib', 'lzma']),
+        help=f"Compress the local snapshot (env: POCKETTE_CACHE_CODEC, default: {CACHE_CODEC_DEFAULT})."
+    )(func)
+
+
+def page_size_option(func):
+    """Option for the number of items to download per request."""
+    return click.option(
+        '--page-size',
+        'page_size',
+        envvar='POCKETTE_PAGE_SIZE',
+        default=PAGE_SIZE_DEFAULT,
+        type=click.IntRange(min=1),
+        help=f"Number of items to download per request (default: {PAGE_SIZE_DEFAULT})."
+    )(func)
+
+
+def workers_option(func):
+    """Option for the number of parallel download requests."""
+    return click.option(
+        '--workers',
+        'workers',
+        envvar='POCKETTE_WORKERS',
+        default=WORKERS_DEFAULT,
+        type=click.IntRange(min=1),
+        help=f"Number of parallel download requests (default: {WORKERS_DEFAULT})."
+    )(func)
+
+
+def timeout_option(func):
+    """Option for how long to wait for Pocket to respond."""
+    return click.option(
+        '--timeout',
+        'timeout',
+        envvar='POCKETTE_TIMEOUT',
+        default=TIMEOUT_DEFAULT,
+        type=click.FloatRange(min=0, min_open=True),
+        help=f"Seconds to wait for Pocket to respond (env: POCKETTE_TIMEOUT, default: {TIMEOUT_DEFAULT:g})."
+    )(func)
+
+
+def connect_timeout_option(func):
+    """Option for how long to wait to connect to Pocket."""
+    return click.option(
+        '--connect-timeout',
+        'connect_timeout',
+        envvar='POCKETTE_CONNECT_TIMEOUT',
+        default=CONNECT_TIMEOUT_DEFAULT,
+        type=click.FloatRange(min=0, min_open=True),
+        help=f"Seconds to wait to connect to Pocket (env: POCKETTE_CONNECT_TIMEOUT, "
+             f"default: {CONNECT_TIMEOUT_DEFAULT:g})."
+    )(func)
+
+
+def retries_option(func):
+    """Option for how many times failed requests are retried."""
+    return click.option(
+        '--retries',
+        'retries',
+        envvar='POCKETTE_RETRIES',
+        default=RETRIES_DEFAULT,
+        type=click.IntRange(min=0),
+        help=f"Times to retry requests that fail with connection or server errors (env: POCKETTE_RETRIES, "
+             f"default: {RETRIES_DEFAULT})."
+    )(func)
+
+
+def http_client_option(func):
+    """Option for which client downloads Pocket data."""
+    return click.option(
+        '--http-client',
+        'http_client',
+        envvar='POCKETTE_HTTP_CLIENT',
+        default=HTTP_CLIENT_DEFAULT,
+        type=click.Choice(['requests', 'asyncio']),
+        help=f"Download pages with a thread pool, or schedule them on an asyncio event loop that still makes the "
+             f"requests in threads (env: POCKETTE_HTTP_CLIENT, default: {HTTP_CLIENT_DEFAULT})."
+    )(func)
+
+
+def http_options(func):
+    """Common options for requests to Pocket."""
+    func = retries_option(func)
+    func = connect_timeout_option(func)
+    func = timeout_option(func)
+    return func
+
+
+def store_option(func):
+    """Option for how the local snapshot is stored."""
+    default = 'json'
+    return click.option(
+        '--store',
+        envvar='POCKETTE_STORE',
+        default=default,
+        type=click.Choice(['json', 'sqlite']),
+        help=f"Store the local snapshot as JSON or in SQLite (env: POCKETTE_STORE, default: {default})."
+    )(func)
+
+
+def socket_option(func):
+    """Option for the location of the daemon's socket."""
+    return click.option(
+        '--socket',
+        'socket_path',
+        envvar='POCKETTE_SOCKET',
+        default=None,
+        type=click.Path(dir_okay=False),
+        help="Socket of `pockette serve` (env: POCKETTE_SOCKET, default: the local snapshot file + .sock)."
+    )(func)
+
+
+def open_option(func):
+    """Option for which URLs of each link are opened."""
+    default = 'both'
+    return click.option(
+        '--open',
+        'open_mode',
+        default=default,
+        type=click.Choice(list(OPEN_MODES)),
+        help=f"Open the Pocket reader page, the original page, or both (default: {default})."
+    )(func)
+
+
+def max_tabs_option(func):
+    """Option for the number of tabs that can be opened."""
+    return click.option(
+        '--max-tabs',
+        'max_tabs',
+        envvar='POCKETTE_MAX_TABS',
+        default=TABS_MAX_DEFAULT,
+        type=click.IntRange(min=0),
+        help=f"Most tabs to open, or 0 for no limit (env: POCKETTE_MAX_TABS, default: {TABS_MAX_DEFAULT})."
+    )(func)
+
+
+def tab_rate_option(func):
+    """Option for how fast tabs are opened."""
+    return click.option(
+        '--tab-rate',
+        'tab_rate',
+        envvar='POCKETTE_TAB_RATE',
+        default=TAB_RATE_DEFAULT,
+        type=click.FloatRange(min=0),
+        help=f"Tabs to open per second, or 0 for no limit (env: POCKETTE_TAB_RATE, default: {TAB_RATE_DEFAULT:g})."
+    )(func)
+
+
+def tab_batch_option(func):
+    """Option for the number of tabs that are opened together."""
+    return click.option(
+        '--tab-batch',
+        'tab_batch_size',
+        envvar='POCKETTE_TAB_BATCH',
+        default=TAB_BATCH_DEFAULT,
+        type=click.IntRange(min=1),
+        help=f"Tabs to open together (env: POCKETTE_TAB_BATCH, default: {TAB_BATCH_DEFAULT})."
+    )(func)
+
+
+def tab_workers_option(func):
+    """Option for the number of tabs that are opened in parallel."""
+    return click.option(
+        '--tab-workers',
+        'tab_workers',
+        envvar='POCKETTE_TAB_WORKERS',
+        default=TAB_WORKERS_DEFAULT,
+        type=click.IntRange(min=1),
+        help=f"Tabs to open in parallel (env: POCKETTE_TAB_WORKERS, default: {TAB_WORKERS_DEFAULT})."
+    )(func)
+
+
+def tab_options(func):
+    """Common options for opening links in tabs."""
+    func = tab_workers_option(func)
+    func = tab_batch_option(func)
+    func = tab_rate_option(func)
+    func = max_tabs_option(func)
+    func = open_option(func)
+    return func
+
+
+def cache_options(func):
+    """Common local snapshot options."""
+    func = http_client_option(func)
+    func = http_options(func)
+    func = socket_option(func)
+    func = store_option(func)
+    func = workers_option(func)
+    func = page_size_option(func)
+    func = offline_option(func)
+    func = full_sync_option(func)
+    func = refresh_option(func)
+    func = cache_codec_option(func)
+    func = cache_hard_ttl_option(func)
+    func = cache_ttl_option(func)
+    func = data_file_option(func)
+    return func
+
+
 def report_options(func):
     """Common report options."""
+    func = report_fields_option(func)
+    func = output_option(func)
     func = all_option(func)
     func = count_option(func)
+    func = favorite_option(func)
     func = length_option(func)
     func = end_option(func)
     func = start_option(func)
+    func = match_option(func)
     func = exclude_option(func)
     func = include_option(func)
+    func = cache_options(func)
     return func
 
 
 def search_options(func):
     """Common search options."""
+    func = search_fields_option(func)
+    func = output_option(func)
+    func = prefer_option(func)
+    func = weight_option(func)
+    func = seed_option(func)
     func = random_option(func)
     func = all_option(func)
     func = offset_option(func)
     func = count_option(func)
     func = reverse_option(func)
     func = sort_option(func)
+    func = favorite_option(func)
     func = length_option(func)
     func = end_option(func)
     func = start_option(func)
+    func = match_option(func)
     func = exclude_option(func)
     func = include_option(func)
+    func = cache_options(func)
     return func
@@ -0,0 +1,128 @@
+"""Asyncio Pocket API client, with requests made in threads."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import List, Optional, Sequence
+
+from pockette.pocket_client import PocketClient
+
+
+class _PageExecutor(ThreadPoolExecutor):
+    """Threads that make the requests of one download, and the event that cancels their retries."""
+
+    def __init__(self, workers: int):
+        super().__init__(max_workers=workers, thread_name_prefix='pockette-async')
+        self.cancelled = threading.Event()
+
+
+class AsyncPocketClient(PocketClient):
+    """Schedule the requests of a download on one event loop, and make them in a pool of threads.
+
+    The transport is still `requests`: each request runs `PocketClient._get_page` in a worker thread, so responses
+    share the session's connection pool, proxy and certificate settings, redirects, retries, and streaming parser.
+    At most `workers` requests are in flight at once, bounded by a semaphore that several clients can share to
+    download many accounts together.
+
+    Cancelling a download cancels its pending requests, stops retries of the requests that already started, and
+    closes the session, which drops its pooled connections.
+    """
+
+    def download(self, since: Optional[int] = None) -> dict:
+        """Download Pocket data on a new event loop."""
+        return asyncio.run(self.download_async(since=since))
+
+    async def download_async(self, since: Optional[int] = None,
+                             semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+        """Download Pocket data, with at most `workers` requests at once unless a shared `semaphore` is given."""
+        if semaphore is None:
+            # Semaphores are bound to the running event loop, so it is only created here
+            semaphore = asyncio.Semaphore(self.workers)
+
+        params = self._get_download_params(since)
+        pocket_data: dict = {'list': {}, 'since': None}
+        executor = _PageExecutor(self.workers)
+
+        try:
+            first_page = await self._get_page_async(executor, semaphore, params, offset=0, total=True)
+            self._add_page(pocket_data, first_page)
+
+            offsets = self._get_remaining_offsets(first_page)
+            if offsets is None:
+                await self._add_sequential_pages(executor, semaphore, params, pocket_data)
+            else:
+                await self._add_concurrent_pages(executor, semaphore, params, pocket_data, offsets)
+        except asyncio.CancelledError:
+            executor.cancelled.set()
+            self.session.close()
+            raise
+        finally:
+            # Don't wait for requests that were already started when the download was cancelled. They make no more
+            # attempts, and their pages are dropped.
+            executor.shutdown(wait=False)
+
+        return pocket_data
+
+    async def _add_concurrent_pages(self, executor: _PageExecutor, semaphore: asyncio.Semaphore,
+                                    params: dict, pocket_data: dict, offsets: range):
+        """Add the pages after the first page, in the order they arrive."""
+        tasks = [
+            asyncio.ensure_future(self._get_page_async(executor, semaphore, params, offset)) for offset in offsets
+        ]
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                self._add_page(pocket_data, await task)
+        finally:
+            await _cancel_tasks(tasks)
+
+    async def _add_sequential_pages(self, executor: _PageExecutor, semaphore: asyncio.Semaphore,
+                                    params: dict, pocket_data: dict):
+        """Add pages one after another until a short page is returned."""
+        offset = self.page_size
+
+        while True:
+            page = await self._get_page_async(executor, semaphore, params, offset=offset)
+            self._add_page(pocket_data, page)
+
+            if len(self._get_page_links(page)) < self.page_size:
+                break
+
+            offset += self.page_size
+
+    async def _get_page_async(self, executor: _PageExecutor, semaphore: asyncio.Semaphore, params: dict,
+                              offset: int, total: bool = False) -> dict:
+        """Get a single page in a thread, once the semaphore allows another request."""
+        async with semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, self._get_page, params, offset, total, executor.cancelled
+            )
+
+
+async def _cancel_tasks(tasks: Sequence[asyncio.Future]):
+    """Cancel tasks that are still pending, and wait for them to finish."""
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def download_many_async(clients: Sequence[AsyncPocketClient], since: Optional[int] = None,
+                              workers: Optional[int] = None) -> List[dict]:
+    """Download several accounts concurrently, returning their Pocket data in order.
+
+    With `workers`, the accounts share that many requests at once. If one download fails, the others are cancelled.
+    """
+    semaphore = asyncio.Semaphore(workers) if workers else None
+    tasks = [asyncio.ensure_future(client.download_async(since=since, semaphore=semaphore)) for client in clients]
+
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        await _cancel_tasks(tasks)
+
+
+def download_many(clients: Sequence[AsyncPocketClient], since: Optional[int] = None,
+                  workers: Optional[int] = None) -> List[dict]:
+    """Download several accounts concurrently on a new event loop."""
+    return asyncio.run(download_many_async(clients, since=since, workers=workers))
@@ -0,0 +1,233 @@
+"""Memory-mapped binary snapshot of Pocket items."""
+
+from array import array
+import mmap
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from pockette.pocket_domain import DomainTable
+from pockette.pocket_index import TimeIndex
+from pockette.pocket_item import PocketItem
+
+MAGIC = b'POCKETTE'
+
+# Magic, version, byte order, snapshot ID, source file size and modified time, item count, domain count
+HEADER = struct.Struct('<8sHB32sQqQQ')
+
+# Each section is stored as an offset and a length in bytes, after the header
+SECTIONS = (
+    ('time_added', 'q'),
+    ('time_to_read', 'i'),
+    ('word_count', 'i'),
+    ('favorite', 'B'),
+    ('domain_id', 'i'),
+    ('time_positions', 'i'),
+    ('string_offsets', 'Q'),
+    ('string_data', 'B'),
+    ('domain_offsets', 'Q'),
+    ('domain_data', 'B'),
+)
+SECTION = struct.Struct('<QQ')
+
+# Strings stored for each item, in order
+STRING_FIELDS = ('item_id', 'title', 'url', 'excerpt')
+
+SourceStat = Tuple[int, int]
+
+
+class BinarySnapshot:
+    """Read Pocket items from a binary snapshot without loading all of them.
+
+    The snapshot has a versioned header, fixed-width columns for the numeric fields, and an offsets table into a
+    block of UTF-8 strings. The file is memory-mapped, so only the pages of the items that are used are read.
+    Columns are 8-byte aligned so NumPy can use them without copying.
+    """
+
+    version = 1
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes]):
+        self.buffer = memoryview(buffer)
+        magic, version, byte_order, snapshot_id, size, modified_time, count, domain_count = HEADER.unpack_from(
+            self.buffer
+        )
+
+        if magic != MAGIC or version != self.version or byte_order != _get_byte_order():
+            raise ValueError('Unsupported binary snapshot.')
+
+        self.snapshot_id = snapshot_id.decode('ascii').rstrip('\0') or None
+        self.source_stat: SourceStat = (size, modified_time)
+        self.count = count
+        self.domain_count = domain_count
+        self.sections: Dict[str, memoryview] = {}
+
+        for i, (name, type_code) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(self.buffer, HEADER.size + i * SECTION.size)
+            if offset + length > len(self.buffer):
+                raise ValueError('Truncated binary snapshot.')
+
+            self.sections[name] = self.buffer[offset:offset + length].cast(type_code)  # type: ignore[call-overload]
+
+        if len(self.sections['string_offsets']) != count * len(STRING_FIELDS) + 1:
+            raise ValueError('Corrupt binary snapshot.')
+
+    @classmethod
+    def open(cls, path: str, source_stat: Optional[SourceStat] = None) -> Optional['BinarySnapshot']:
+        """Open a binary snapshot. Missing, unreadable, outdated, or stale snapshots return `None`.
+
+        With `source_stat`, the snapshot must have been written from a JSON snapshot with that size and modified
+        time.
+        """
+        try:
+            with open(path, 'rb') as f_in:
+                snapshot = cls(mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, struct.error):
+            return None
+
+        if source_stat is not None and snapshot.source_stat != source_stat:
+            return None
+
+        return snapshot
+
+    # pylint: disable=too-many-locals
+    @classmethod
+    def build(cls, items: Sequence[PocketItem], snapshot_id: Optional[str] = None,
+              source_stat: SourceStat = (0, 0)) -> bytes:
+        """Get the binary snapshot of items."""
+        domain_table = DomainTable()
+        strings: List[bytes] = []
+        for item in items:
+            strings.extend(getattr(item, field).encode('utf-8') for field in STRING_FIELDS)
+
+        columns = {
+            'time_added': array('q', (item.time_added for item in items)),
+            'time_to_read': array('i', (-1 if item.time_to_read is None else item.time_to_read for item in items)),
+            'word_count': array('i', (item.word_count for item in items)),
+            'favorite': array('B', (item.favorite for item in items)),
+            'domain_id': array('i', (domain_table.get_id(item.domain) for item in items)),
+            'time_positions': array('i', TimeIndex.build(items).positions),
+            'string_offsets': _get_offsets(strings),
+            'string_data': array('B', b''.join(strings)),
+        }
+        domains = [domain.encode('utf-8') for domain in domain_table.domains]
+        columns['domain_offsets'] = _get_offsets(domains)
+        columns['domain_data'] = array('B', b''.join(domains))
+
+        header = HEADER.pack(
+            MAGIC, cls.version, _get_byte_order(), (snapshot_id or '').encode('ascii'), source_stat[0],
+            source_stat[1], len(items), len(domain_table)
+        )
+
+        sections = []
+        data = []
+        offset = _align(len(header) + len(SECTIONS) * SECTION.size)
+        for name, _ in SECTIONS:
+            contents = columns[name].tobytes()
+            sections.append(SECTION.pack(offset, len(contents)))
+            data.append(contents.ljust(_align(len(contents)), b'\0'))
+            offset += len(data[-1])
+
+        body = header + b''.join(sections)
+        return body.ljust(_align(len(body)), b'\0') + b''.join(data)
+
+    def get_string(self, index: int) -> str:
+        """Get a string from the strings table."""
+        offsets = self.sections['string_offsets']
+        return self.sections['string_data'][offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def get_item(self, position: int) -> PocketItem:
+        """Create the item at a position."""
+        item_id, title, url, excerpt = (
+            self.get_string(position * len(STRING_FIELDS) + i) for i in range(len(STRING_FIELDS))
+        )
+        time_to_read = self.sections['time_to_read'][position]
+
+        return PocketItem(
+            item_id=item_id, title=title, url=url, excerpt=excerpt,
+            time_added=self.sections['time_added'][position],
+            time_to_read=None if time_to_read < 0 else time_to_read,
+            word_count=self.sections['word_count'][position],
+            favorite=bool(self.sections['favorite'][position]),
+        )
+
+    def get_domain_table(self) -> DomainTable:
+        """Get the domains of the items, with the IDs in the `domain_id` column."""
+        offsets = self.sections['domain_offsets']
+        data = self.sections['domain_data']
+        domain_table = DomainTable()
+
+        for i in range(self.domain_count):
+            domain_table.get_id(data[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8'))
+
+        return domain_table
+
+    def get_time_index(self) -> TimeIndex:
+        """Get the time index of the items."""
+        return TimeIndex(self.sections['time_positions'], SortedTimes(self))
+
+
+class MappedItems(Sequence[PocketItem]):
+    """The items of a binary snapshot, each created the first time it is used."""
+
+    def __init__(self, snapshot: BinarySnapshot):
+        self.snapshot = snapshot
+        self._items: List[Optional[PocketItem]] = [None] * snapshot.count
+
+    def __len__(self) -> int:
+        return self.snapshot.count
+
+    @overload
+    def __getitem__(self, position: int) -> PocketItem: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> List[PocketItem]: ...
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+
+        item = self._items[position]
+        if item is None:
+            item = self._items[position] = self.snapshot.get_item(position)
+
+        return item
+
+    def __iter__(self) -> Iterator[PocketItem]:
+        for position in range(len(self)):
+            yield self[position]
+
+
+class SortedTimes(Sequence[int]):
+    """The times that the items of a binary snapshot were added, in time order, for binary searches."""
+
+    def __init__(self, snapshot: BinarySnapshot):
+        self.time_added = snapshot.sections['time_added']
+        self.positions = snapshot.sections['time_positions']
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return self.time_added[self.positions[index]]
+
+
+def _get_byte_order() -> int:
+    """Get the byte order of the columns, which are written in the native order."""
+    return 0 if sys.byteorder == 'little' else 1
+
+
+def _get_offsets(strings: List[bytes]) -> array:
+    """Get the offsets of strings that are joined together, including the end of the last string."""
+    offsets = array('Q', [0])
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+
+    return offsets
+
+
+def _align(size: int) -> int:
+    """Round a size up to a multiple of 8 bytes."""
+    return (size + 7) // 8 * 8
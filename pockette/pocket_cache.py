@@ -0,0 +1,236 @@
+"""Local snapshot cache for Pocket data."""
+
+from functools import partial
+import gzip
+import io
+import json
+import lzma
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import uuid
+import zlib
+
+from pockette import DATA_FILE, CACHE_CODEC_DEFAULT, CACHE_HARD_TTL_DEFAULT, CACHE_TTL_DEFAULT
+from pockette.pocket_binary import BinarySnapshot, SourceStat
+from pockette.pocket_item import PocketItem
+from pockette.pocket_stream import ITEM_FIELDS
+
+
+def _gzip_compress(data: bytes) -> bytes:
+    """Compress with gzip, without a timestamp. `gzip.compress` only takes `mtime` from Python 3.8."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as f_out:
+        f_out.write(data)
+    return buffer.getvalue()
+
+
+# Compression codecs for the snapshot: the first bytes they write, and how to compress and decompress
+CODECS: Dict[str, Tuple[bytes, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    'gzip': (b'\x1f\x8b', _gzip_compress, gzip.decompress),
+    'lzma': (b'\xfd7zXZ\x00', partial(lzma.compress, preset=6), lzma.decompress),
+    'zlib': (b'\x78', partial(zlib.compress, level=6), zlib.decompress),
+}
+
+# Top-level fields of the Pocket data that are used
+POCKET_DATA_FIELDS = ('list', 'since')
+
+
+class PocketCache:
+    """Read and write a local snapshot of Pocket data.
+
+    A snapshot younger than the TTL is fresh. Older snapshots are stale, but can still be used while a newer one is
+    synced in the background until they reach the hard TTL.
+
+    The snapshot is a JSON file that wraps the `/v3/get` response. Writes go to a temporary file in the same
+    directory first and are then moved into place, so readers never see a partially written snapshot.
+
+    Indexes built from a snapshot are stored next to it (e.g. `.pocket.json.keywords`) and are only loaded when
+    they are needed. Each index records the ID of the snapshot it was built from, so an index left over from an
+    older snapshot is ignored.
+
+    A binary copy of the snapshot (`.pocket.json.bin`) can be memory-mapped instead of parsing the JSON. It records
+    the size and modified time of the JSON snapshot it was written from, and is rewritten from the JSON when they
+    don't match.
+
+    The snapshot can be compressed with gzip, lzma, or zlib, and is read back whatever codec it was written with.
+    With `prune`, only the fields that are used are saved, e.g. images, authors, and domain metadata are dropped.
+    """
+
+    version = 1
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, data_file: str = DATA_FILE, ttl: int = CACHE_TTL_DEFAULT, codec: str = CACHE_CODEC_DEFAULT,
+                 prune: bool = True, hard_ttl: int = CACHE_HARD_TTL_DEFAULT):
+        if codec != 'none' and codec not in CODECS:
+            raise ValueError(f'Unknown codec: {codec}')
+
+        self.data_file = data_file
+        self.ttl = ttl
+        self.hard_ttl = hard_ttl
+        self.codec = codec
+        self.prune = prune
+        self.snapshot_id: Optional[str] = None
+        self.source_stat: Optional[SourceStat] = None
+
+    @staticmethod
+    def _get_current_time() -> float:  # pragma: no cover
+        """For easier test mocking."""
+        return time.time()
+
+    def get_age(self) -> Optional[float]:
+        """Get the snapshot age in seconds, or `None` if there is no snapshot."""
+        try:
+            modified_time = os.path.getmtime(self.data_file)
+        except OSError:
+            return None
+
+        return max(self._get_current_time() - modified_time, 0.0)
+
+    def is_fresh(self) -> bool:
+        """Determine if the snapshot exists and is younger than the TTL."""
+        age = self.get_age()
+        return age is not None and age < self.ttl
+
+    def is_usable(self) -> bool:
+        """Determine if the snapshot exists and is younger than the TTL or the hard TTL."""
+        age = self.get_age()
+        return age is not None and age < max(self.ttl, self.hard_ttl)
+
+    def load(self) -> Optional[dict]:
+        """Load Pocket data from the snapshot. Missing, unreadable, or outdated snapshots return `None`."""
+        snapshot, source_stat = self._read_json(self.data_file)
+        if snapshot is None:
+            return None
+
+        self.snapshot_id = snapshot.get('snapshot_id')
+        self.source_stat = source_stat
+        return snapshot.get('pocket_data')
+
+    def save(self, pocket_data: dict):
+        """Atomically write Pocket data to the snapshot."""
+        if self.prune:
+            pocket_data = self._prune(pocket_data)
+
+        snapshot_id = uuid.uuid4().hex
+        source_stat = self._write_json(self.data_file, {'version': self.version, 'snapshot_id': snapshot_id,
+                                                        'pocket_data': pocket_data}, codec=self.codec)
+        self.snapshot_id = snapshot_id
+        self.source_stat = source_stat
+
+    def get_index_file(self, name: str) -> str:
+        """Get the location of a snapshot index."""
+        return f'{self.data_file}.{name}'
+
+    def load_index(self, name: str) -> Optional[dict]:
+        """Load an index built from the current snapshot. Missing or outdated indexes return `None`."""
+        index, _ = self._read_json(self.get_index_file(name))
+        if index is None or self.snapshot_id is None or index.get('snapshot_id') != self.snapshot_id:
+            return None
+
+        return index.get('index')
+
+    def save_index(self, name: str, index: dict):
+        """Atomically write an index built from the current snapshot."""
+        self._write_json(self.get_index_file(name), {'version': self.version, 'snapshot_id': self.snapshot_id,
+                                                     'index': index})
+
+    def load_binary(self) -> Optional[BinarySnapshot]:
+        """Open the binary snapshot. Missing, unreadable, outdated, or stale snapshots return `None`."""
+        source_stat = self._get_source_stat()
+        if source_stat is None:
+            return None
+
+        snapshot = BinarySnapshot.open(self.get_index_file('bin'), source_stat=source_stat)
+        if snapshot is not None:
+            self.snapshot_id = snapshot.snapshot_id
+
+        return snapshot
+
+    def save_binary(self, items: Sequence[PocketItem], source_stat: Optional[SourceStat]):
+        """Atomically write the binary snapshot of the items in the current snapshot.
+
+        `source_stat` is the size and modified time of the JSON snapshot when the items were loaded or saved, so
+        items from a snapshot that has since been replaced aren't trusted as the new one.
+        """
+        if source_stat is None:
+            return
+
+        self._write_file(self.get_index_file('bin'), BinarySnapshot.build(items, self.snapshot_id, source_stat))
+
+    def _get_source_stat(self) -> Optional[SourceStat]:
+        """Get the size and modified time of the JSON snapshot, or `None` if there is no snapshot."""
+        try:
+            stat = os.stat(self.data_file)
+        except OSError:
+            return None
+
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _prune(pocket_data: dict) -> dict:
+        """Get Pocket data with only the fields that are used."""
+        pruned_data = {field: pocket_data[field] for field in POCKET_DATA_FIELDS if field in pocket_data}
+        pruned_data['list'] = {
+            item_id: {field: link[field] for field in ITEM_FIELDS if field in link}
+            for item_id, link in (pocket_data.get('list') or {}).items()
+        }
+
+        return pruned_data
+
+    def _read_json(self, path: str) -> Tuple[Optional[dict], Optional[SourceStat]]:
+        """Read a versioned JSON file, which may be compressed, and the size and modified time of what was read.
+
+        Missing, unreadable, or outdated files return `None`.
+        """
+        try:
+            with open(path, 'rb') as f_in:
+                data = f_in.read()
+                stat = os.fstat(f_in.fileno())
+
+            for magic, _, decompress in CODECS.values():
+                if data.startswith(magic):
+                    data = decompress(data)
+                    break
+
+            contents = json.loads(data)
+        except (OSError, ValueError, EOFError, lzma.LZMAError, zlib.error):
+            return None, None
+
+        if not isinstance(contents, dict) or contents.get('version') != self.version:
+            return None, None
+
+        return contents, (stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def _write_json(cls, path: str, contents: dict, codec: str = 'none') -> SourceStat:
+        """Atomically write a JSON file, compressed with the codec. Returns the size and modified time written."""
+        data = json.dumps(contents, separators=(',', ':')).encode('utf-8')
+        if codec != 'none':
+            _, compress, _ = CODECS[codec]
+            data = compress(data)
+
+        return cls._write_file(path, data)
+
+    @staticmethod
+    def _write_file(path: str, contents: bytes) -> SourceStat:
+        """Atomically write a file. Returns its size and modified time, which moving it into place keeps."""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(prefix='.pocket-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f_out:
+                f_out.write(contents)
+                f_out.flush()
+                os.fsync(f_out.fileno())
+                stat = os.fstat(f_out.fileno())
+
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return stat.st_size, stat.st_mtime_ns
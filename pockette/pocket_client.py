@@ -0,0 +1,283 @@
+"""Pocket API client."""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pockette import CONNECT_TIMEOUT_DEFAULT, PAGE_SIZE_DEFAULT, RETRIES_DEFAULT, TIMEOUT_DEFAULT, WORKERS_DEFAULT
+from pockette.pocket_stream import parse_pocket_response
+
+T = TypeVar('T')
+
+
+class PocketApiError(Exception):
+    """Pocket API request failed."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class BasePocketClient(ABC):  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """Settings and request building shared by the Pocket API clients, which download the same way.
+
+    Pocket data is downloaded in pages. The first page is requested with `total=1` so the remaining pages can be
+    fetched concurrently. If Pocket doesn't report a total, pages are fetched one after another until a short page
+    is returned.
+    """
+
+    get_url = 'https://getpocket.com/v3/get'
+    headers = {
+        "Content-Type": "application/json; charset=UTF8", "X-Accept": "application/json",
+        "Accept-Encoding": "gzip", "Connection": "keep-alive",
+    }
+
+    chunk_size = 64 * 1024
+    backoff = 0.5
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, consumer_key: str, access_token: Optional[str] = None, page_size: int = PAGE_SIZE_DEFAULT,
+                 workers: int = WORKERS_DEFAULT, timeout: float = TIMEOUT_DEFAULT,
+                 connect_timeout: float = CONNECT_TIMEOUT_DEFAULT, retries: int = RETRIES_DEFAULT):
+        self.consumer_key = consumer_key
+        self.access_token = access_token
+        self.page_size = max(page_size, 1)
+        self.workers = max(workers, 1)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = max(retries, 0)
+
+    @abstractmethod
+    def download(self, since: Optional[int] = None) -> dict:
+        """Download Pocket data.
+
+        Without `since`, all unread items are downloaded. With `since`, only items changed after that time are
+        downloaded, including archived and deleted items.
+        """
+
+    @staticmethod
+    def _get_download_params(since: Optional[int] = None) -> Dict[str, str]:
+        """Get the parameters shared by every page of a download."""
+        params = {'detailType': 'complete', 'sort': 'newest', 'state': 'unread'}
+        if since:
+            params['state'] = 'all'
+            params['since'] = str(since)
+
+        return params
+
+    def _get_page_data(self, params: dict, offset: int, total: bool = False) -> dict:
+        """Get the request body for a single page."""
+        data = {
+            'consumer_key': self.consumer_key,
+            'access_token': self.access_token,
+            'count': str(self.page_size),
+            'offset': str(offset),
+            **params,
+        }
+        if total:
+            data['total'] = '1'
+
+        return data
+
+    def _get_remaining_offsets(self, first_page: dict) -> Optional[range]:
+        """Get the offsets of the pages after the first page, or `None` if Pocket didn't report a total."""
+        if len(self._get_page_links(first_page)) < self.page_size:
+            return range(0)
+
+        try:
+            total = int(first_page['total'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        return range(self.page_size, total, self.page_size)
+
+    @classmethod
+    def _add_page(cls, pocket_data: dict, page: dict):
+        """Add a page's links to the Pocket data being downloaded."""
+        pocket_data['list'].update(cls._get_page_links(page))
+
+        # Keep the earliest cursor so changes made during the download are picked up by the next sync
+        if page.get('since') and (not pocket_data['since'] or page['since'] < pocket_data['since']):
+            pocket_data['since'] = page['since']
+
+    @staticmethod
+    def _get_page_links(page: dict) -> Dict[str, dict]:
+        """Get a page's links. Pocket returns an empty array instead of an object when there are none."""
+        return page.get('list') or {}
+
+
+class PocketClient(BasePocketClient):
+    """Call the Pocket API over a shared HTTP session.
+
+    The session keeps a pool of connections alive, one per worker, so requests after the first skip the TCP and TLS
+    handshakes, and asks for gzip-compressed responses. Connection errors, timeouts, and server errors are retried
+    with exponential backoff.
+
+    The pages of a download are fetched in parallel by a pool of threads. Responses are streamed and parsed
+    incrementally, keeping only the item fields that are used.
+    """
+
+    request_token_url = 'https://getpocket.com/v3/oauth/request'
+    access_token_url = 'https://getpocket.com/v3/oauth/authorize'
+    authorize_url = 'https://getpocket.com/auth/authorize'
+    redirect_uri = 'https://google.com'
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, consumer_key: str, access_token: Optional[str] = None, page_size: int = PAGE_SIZE_DEFAULT,
+                 workers: int = WORKERS_DEFAULT, session: Optional[requests.Session] = None,
+                 timeout: float = TIMEOUT_DEFAULT, connect_timeout: float = CONNECT_TIMEOUT_DEFAULT,
+                 retries: int = RETRIES_DEFAULT):
+        super().__init__(
+            consumer_key, access_token, page_size=page_size, workers=workers, timeout=timeout,
+            connect_timeout=connect_timeout, retries=retries
+        )
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        self.session = session
+
+    def get_request_token(self) -> str:
+        """Get an OAuth request token for the application."""
+        return self._post(
+            self.request_token_url, {'consumer_key': self.consumer_key, 'redirect_uri': self.redirect_uri},
+            parse=lambda response: json.loads(response.text)['code']
+        )
+
+    def get_authorize_url(self, request_token: str) -> str:
+        """Get the page where the user authorizes the application."""
+        return f'{self.authorize_url}?request_token={request_token}&redirect_uri={self.redirect_uri}'
+
+    def get_access_token(self, request_token: str) -> str:
+        """Convert an authorized request token to an access token."""
+        return self._post(
+            self.access_token_url, {'consumer_key': self.consumer_key, 'code': request_token},
+            parse=lambda response: json.loads(response.text)['access_token']
+        )
+
+    def download(self, since: Optional[int] = None) -> dict:
+        """Download Pocket data.
+
+        Without `since`, all unread items are downloaded. With `since`, only items changed after that time are
+        downloaded, including archived and deleted items.
+        """
+        params = self._get_download_params(since)
+        pocket_data: dict = {'list': {}, 'since': None}
+
+        first_page = self._get_page(params, offset=0, total=True)
+        self._add_page(pocket_data, first_page)
+
+        for page in self._get_remaining_pages(params, first_page):
+            self._add_page(pocket_data, page)
+
+        return pocket_data
+
+    def _get_remaining_pages(self, params: dict, first_page: dict) -> Iterator[dict]:
+        """Get the pages after the first page, in the order they arrive."""
+        offsets = self._get_remaining_offsets(first_page)
+        if offsets is None:
+            yield from self._get_sequential_pages(params)
+            return
+
+        if not offsets:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._get_page, params, offset) for offset in offsets]
+
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _get_sequential_pages(self, params: dict) -> Iterator[dict]:
+        """Get pages one after another until a short page is returned."""
+        offset = self.page_size
+
+        while True:
+            page = self._get_page(params, offset=offset)
+            yield page
+
+            if len(self._get_page_links(page)) < self.page_size:
+                break
+
+            offset += self.page_size
+
+    def _get_page(self, params: dict, offset: int, total: bool = False,
+                  cancelled: Optional[threading.Event] = None) -> dict:
+        """Get a single page."""
+        return self._post(
+            self.get_url, self._get_page_data(params, offset, total=total),
+            parse=lambda response: parse_pocket_response(response.iter_content(chunk_size=self.chunk_size)),
+            stream=True, cancelled=cancelled
+        )
+
+    def _post(self, url: str, data: dict, parse: Callable[[requests.Response], T], stream: bool = False,
+              cancelled: Optional[threading.Event] = None) -> T:
+        """Post to the Pocket API and parse the response.
+
+        Connection errors, timeouts, server errors, and responses cut off while they are read are retried with
+        exponential backoff. Once `cancelled` is set, no more attempts are made and the backoff stops waiting.
+        """
+        errors: List[str] = []
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * 2 ** (attempt - 1)
+                if cancelled is None:
+                    time.sleep(delay)
+                else:
+                    cancelled.wait(delay)
+
+            if cancelled is not None and cancelled.is_set():
+                raise PocketApiError('The download was cancelled')
+
+            try:
+                response = self.session.post(
+                    url, headers=self.headers, json=data, timeout=(self.connect_timeout, self.timeout),
+                    stream=stream
+                )
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as error:
+                status_code = error.response.status_code if error.response is not None else None
+                if status_code not in self.retry_status_codes:
+                    raise PocketApiError(
+                        self._get_error_message(error.response), status_code=status_code
+                    ) from error
+
+                errors.append(self._get_error_message(error.response))
+                continue
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                errors.append(str(error))
+                continue
+
+            try:
+                return parse(response)
+            except (ValueError, KeyError) as error:
+                raise PocketApiError(f'{response.reason} ({response.status_code}): {error}') from error
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as error:
+                errors.append(str(error))
+            finally:
+                response.close()
+
+        raise PocketApiError(f'Gave up after {self.retries + 1} attempts: {errors[-1]}')
+
+    @staticmethod
+    def _get_error_message(response: Optional[requests.Response]) -> str:
+        """Describe a failed response."""
+        if response is None:
+            return 'No response'
+
+        return f'{response.reason} ({response.status_code}): {response.text}'
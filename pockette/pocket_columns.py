@@ -0,0 +1,120 @@
+"""Columnar view of Pocket items for vectorized filtering and aggregation."""
+
+from functools import lru_cache
+import importlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pockette.pocket_domain import DomainTable
+from pockette.pocket_item import PocketItem
+
+
+@lru_cache(maxsize=None)
+def _import_numpy() -> Any:
+    """Import NumPy the first time columns are needed, since it is slow to import. `None` if it isn't installed."""
+    try:
+        return importlib.import_module('numpy')
+    except ImportError:  # pragma: no cover
+        return None
+
+
+class PocketColumns:
+    """Store the numeric item fields as NumPy columns.
+
+    Every row holds the integer ID of its domain in a domain table, which can be shared with other views of the
+    same items. Unknown reading times are stored as -1.
+    """
+
+    def __init__(self, items: Sequence[PocketItem], domain_table: Optional[DomainTable] = None):
+        numpy = _import_numpy()
+        if numpy is None:
+            raise RuntimeError('NumPy is required for columnar filtering.')
+
+        self.domain_table = domain_table if domain_table is not None else DomainTable()
+
+        count = len(items)
+        self.time_added = numpy.fromiter((item.time_added for item in items), dtype=numpy.int64, count=count)
+        self.time_to_read = numpy.fromiter(
+            (-1 if item.time_to_read is None else item.time_to_read for item in items),
+            dtype=numpy.int32,
+            count=count
+        )
+        self.word_count = numpy.fromiter((item.word_count for item in items), dtype=numpy.int32, count=count)
+        self.favorite = numpy.fromiter((item.favorite for item in items), dtype=numpy.bool_, count=count)
+        self.domain_id = numpy.fromiter(
+            (self.domain_table.get_id(item.domain) for item in items), dtype=numpy.int32, count=count
+        )
+
+    @classmethod
+    def from_buffers(cls, buffers: Dict[str, memoryview], domain_table: DomainTable) -> 'PocketColumns':
+        """Use columns that are already in memory, e.g. mapped from a binary snapshot, without copying them."""
+        numpy = _import_numpy()
+        columns = cls([], domain_table)
+        columns.time_added = numpy.frombuffer(buffers['time_added'], dtype=numpy.int64)
+        columns.time_to_read = numpy.frombuffer(buffers['time_to_read'], dtype=numpy.int32)
+        columns.word_count = numpy.frombuffer(buffers['word_count'], dtype=numpy.int32)
+        columns.favorite = numpy.frombuffer(buffers['favorite'], dtype=numpy.bool_)
+        columns.domain_id = numpy.frombuffer(buffers['domain_id'], dtype=numpy.int32)
+
+        return columns
+
+    @staticmethod
+    def is_available() -> bool:
+        """Determine if NumPy is installed."""
+        return _import_numpy() is not None
+
+    # pylint: disable=too-many-arguments
+    def filter(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+               max_time_to_read: Optional[int] = None, min_time_to_read: Optional[int] = None,
+               favorite: bool = False, indices: Optional[Sequence[int]] = None) -> List[int]:
+        """Get the row indices that match all of the filters.
+
+        Start and end times are exclusive. Rows with an unknown reading time pass the reading time filters. With
+        `indices`, only those rows are checked, and the matching rows are returned in the same order.
+        """
+        numpy = _import_numpy()
+        rows = None if indices is None else numpy.asarray(indices, dtype=numpy.intp)
+
+        def get_column(column):
+            return column if rows is None else column[rows]
+
+        mask = numpy.ones(len(self.time_added) if rows is None else len(rows), dtype=numpy.bool_)
+
+        if start_time is not None:
+            mask &= get_column(self.time_added) > start_time
+
+        if end_time is not None:
+            mask &= get_column(self.time_added) < end_time
+
+        if max_time_to_read is not None:
+            mask &= get_column(self.time_to_read) <= max_time_to_read
+
+        if min_time_to_read is not None:
+            time_to_read = get_column(self.time_to_read)
+            mask &= (time_to_read >= min_time_to_read) | (time_to_read < 0)
+
+        if favorite:
+            mask &= get_column(self.favorite)
+
+        if rows is None:
+            return numpy.flatnonzero(mask).tolist()
+
+        return rows[mask].tolist()
+
+    def count_domains(self, indices: Iterable[int]) -> Dict[str, int]:
+        """Count the occurrences of each domain in the rows."""
+        numpy = _import_numpy()
+        domain_ids = self.domain_id[numpy.asarray(list(indices), dtype=numpy.intp)]
+        unique_ids, first_rows, counts = numpy.unique(domain_ids, return_index=True, return_counts=True)
+
+        # Keep the domains in order of first appearance, like counting them one row at a time
+        order = numpy.argsort(first_rows, kind='stable')
+
+        domains = self.domain_table.domains
+        return {domains[unique_ids[i]]: int(counts[i]) for i in order}
+
+    def count_older_than(self, indices: Iterable[int], cutoffs: Dict[str, float]) -> Dict[str, int]:
+        """Count the rows added before each cutoff time."""
+        numpy = _import_numpy()
+        time_added = self.time_added[numpy.asarray(list(indices), dtype=numpy.intp)]
+
+        return {label: int(numpy.count_nonzero(time_added < cutoff)) for label, cutoff in cutoffs.items()}
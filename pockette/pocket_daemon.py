@@ -0,0 +1,135 @@
+"""Query Pocket data held in memory by `pockette serve`, over a Unix domain socket."""
+
+from datetime import datetime
+import json
+import os
+import socket
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from pockette import TABS_MAX_DEFAULT, TAB_BATCH_DEFAULT, TAB_RATE_DEFAULT, TAB_WORKERS_DEFAULT
+from pockette.pocket_render import PocketRenderer
+
+# Handler methods that thin clients can call
+METHODS = ('search_pocket_data', 'generate_report')
+
+# Options that must match for the daemon to answer for a client
+SHARED_OPTIONS = ('data_file', 'store', 'offline', 'cache_ttl', 'cache_hard_ttl', 'cache_codec', 'http_client')
+
+# Options of `read` for opening the tabs that the daemon returns, which happens in the client's process
+TAB_OPTIONS = ('max_tabs', 'tab_rate', 'tab_batch_size', 'tab_workers')
+
+
+class PocketDaemonClient:
+    """Call handler methods in a running daemon, or in this process if no daemon can answer.
+
+    Has the same query methods as `PocketDataHandler`, so commands don't need to know where they run. Commands only
+    run in this process if the daemon can't be reached, never after they were sent, so tabs aren't opened twice.
+    """
+
+    connect_timeout = 5.0
+
+    def __init__(self, socket_path: str, options: Dict[str, Any], create_handler: Callable[[], Any]):
+        self.socket_path = socket_path
+        self.options = options
+        self.create_handler = create_handler
+
+    def search_pocket_data(self, **kwargs):
+        """Search through Pocket bookmarks.
+
+        With `open_sites`, the daemon only returns the URLs to open, and the tabs are opened in this process.
+        """
+        if not kwargs.get('open_sites'):
+            self._call('search_pocket_data', kwargs)
+            return
+
+        tab_urls = self._call('search_pocket_data', kwargs, daemon_kwargs=dict(kwargs, defer_tabs=True))
+        if tab_urls is not None:
+            self._open_tabs(tab_urls, **{name: kwargs[name] for name in TAB_OPTIONS if name in kwargs})
+
+    def generate_report(self, **kwargs):
+        """Create summary report."""
+        self._call('generate_report', kwargs)
+
+    def _call(self, method: str, kwargs: Dict[str, Any], daemon_kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a handler method in the daemon, falling back to this process.
+
+        Returns what the method returned in the daemon, or `None` if it ran in this process.
+        """
+        request = {'method': method, 'kwargs': kwargs if daemon_kwargs is None else daemon_kwargs}
+        try:
+            response = self._request(dict(request, options=self.options))
+        except (OSError, ValueError) as error:
+            click.echo(f'ERROR: The daemon on {self.socket_path} stopped before it answered: {error}')
+            sys.exit(1)
+
+        if response is None or response.get('status') != 'ok':
+            getattr(self.create_handler(), method)(**kwargs)
+            return None
+
+        with PocketRenderer() as renderer:
+            renderer.write(response['output'])
+        if response['exit_code']:
+            sys.exit(response['exit_code'])
+
+        return response.get('result')
+
+    @staticmethod
+    def _open_tabs(tab_urls: List[List[str]], max_tabs: int = TABS_MAX_DEFAULT, tab_rate: float = TAB_RATE_DEFAULT,
+                   tab_batch_size: int = TAB_BATCH_DEFAULT, tab_workers: int = TAB_WORKERS_DEFAULT):
+        """Open the tabs for the links that the daemon found, each link's URLs together."""
+        # Only `read` opens tabs, and `webbrowser` is slow to import
+        from pockette.pocket_tabs import TabScheduler  # pylint: disable=import-outside-toplevel
+
+        tabs = TabScheduler(max_tabs=max_tabs, rate=tab_rate, batch_size=tab_batch_size, workers=tab_workers)
+        with tabs:
+            for urls in tab_urls:
+                tabs.open(*urls)
+
+        if tabs.failed:
+            click.echo(f'WARNING: Could not open {len(tabs.failed):,} tabs.', err=True)
+
+    def _request(self, request: dict) -> Optional[dict]:
+        """Send a request to the daemon. Returns `None` if no daemon is running.
+
+        Once the request is sent, the daemon may be running it, so errors are raised instead. Answers aren't timed
+        out, since commands like `read` can take a while.
+        """
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(self.socket_path):
+            return None
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_socket:
+            client_socket.settimeout(self.connect_timeout)
+            try:
+                client_socket.connect(self.socket_path)
+            except OSError:
+                return None
+
+            client_socket.settimeout(None)
+            client_socket.sendall(json.dumps(request, default=encode_value).encode('utf-8') + b'\n')
+
+            with client_socket.makefile('rb') as f_in:
+                line = f_in.readline()
+
+        if not line:
+            raise ConnectionError('The connection was closed')
+
+        return json.loads(line)
+
+
+def encode_value(value: Any) -> Any:
+    """Encode values that JSON doesn't support."""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def decode_value(value: dict) -> Any:
+    """Decode values encoded with `encode_value`."""
+    if '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+
+    return value
@@ -0,0 +1,58 @@
+"""Domains of Pocket links."""
+
+from functools import lru_cache
+import re
+from typing import Dict, List, Optional
+
+DOMAIN_CACHE_SIZE = 4096
+
+# An optional scheme and `//`, optional user info, then the host up to the port, path, query, or fragment
+DOMAIN_PATTERN = re.compile(r'^(?:(?:[a-z][a-z0-9+.-]*:)?//)?(?:[^/?#@]*@)?(\[[^\]]*\]|[^/?#:]*)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def get_domain(url: str) -> str:
+    """Get the lowercase domain of a URL, e.g. `www.nytimes.com`. URLs without a scheme have a domain too."""
+    match = DOMAIN_PATTERN.match(url.strip())
+    return match.group(1).lower() if match else ''
+
+
+def get_site(domain: str) -> str:
+    """Get a domain without `www.`, e.g. `nytimes.com`."""
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+class DomainTable:
+    """Intern the domains of a snapshot as integer IDs.
+
+    Each distinct domain is stored once. Site ranks order the domains by name without `www.`, so sorting links by
+    site compares integers instead of strings.
+    """
+
+    def __init__(self):
+        self.domains: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._site_ranks: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.domains)
+
+    def get_id(self, domain: str) -> int:
+        """Get the ID of a domain, adding it to the table if it is new."""
+        domain_id = self.ids.get(domain)
+        if domain_id is None:
+            domain_id = self.ids[domain] = len(self.domains)
+            self.domains.append(domain)
+            self._site_ranks = None
+
+        return domain_id
+
+    @property
+    def site_ranks(self) -> List[int]:
+        """Get the position of each domain, by ID, in the sorted sites. Domains of the same site rank equally."""
+        if self._site_ranks is None:
+            sites = [get_site(domain) for domain in self.domains]
+            ranks = {site: rank for rank, site in enumerate(sorted(set(sites)))}
+            self._site_ranks = [ranks[site] for site in sites]
+
+        return self._site_ranks
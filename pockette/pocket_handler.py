@@ -1,20 +1,47 @@
 """Search, analyze, and read Pocket bookmarks."""
 
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-import json
 import os
 import random
 import sys
-from typing import Dict, List, Optional
-import webbrowser
+import threading
+from itertools import filterfalse, islice
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, NoReturn, Optional, Sequence, Tuple, Type, TypeVar
+)
 
 import click
-import requests
 
-from pockette import DATA_FILE, COUNT_DEFAULT, SHORT_MIN_DEFAULT, LONG_MIN_DEFAULT
-
-
-class PocketDataHandler:
+from pockette import (
+    DATA_FILE, CACHE_CODEC_DEFAULT, CACHE_HARD_TTL_DEFAULT, CACHE_TTL_DEFAULT, CONNECT_TIMEOUT_DEFAULT,
+    COUNT_DEFAULT, HTTP_CLIENT_DEFAULT, SHORT_MIN_DEFAULT, LONG_MIN_DEFAULT, PAGE_SIZE_DEFAULT, RETRIES_DEFAULT,
+    TABS_MAX_DEFAULT, TAB_BATCH_DEFAULT, TAB_RATE_DEFAULT, TAB_WORKERS_DEFAULT, TIMEOUT_DEFAULT, WORKERS_DEFAULT
+)
+from pockette.pocket_binary import BinarySnapshot, MappedItems
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_columns import PocketColumns
+from pockette.pocket_domain import DomainTable, get_site
+from pockette.pocket_index import KeywordIndex, TimeIndex
+from pockette.pocket_item import PocketItem
+from pockette.pocket_matcher import KeywordMatcher
+from pockette.pocket_output import (
+    REPORT_FIELDS_DEFAULT, SEARCH_FIELDS, SEARCH_FIELDS_DEFAULT, RecordWriter, parse_fields
+)
+from pockette.pocket_render import PocketRenderer, truncate
+from pockette.pocket_report import AgeCounts, DomainCounts, LinkCount, ReportAggregator
+from pockette.pocket_sample import sample
+from pockette.pocket_select import select_largest, select_page, select_smallest
+from pockette.pocket_store import PocketStore, PocketStoreError
+
+Index = TypeVar('Index', KeywordIndex, TimeIndex)
+
+
+class PocketSyncError(Exception):
+    """Pocket data couldn't be loaded or synced by a handler in the background."""
+
+
+class PocketDataHandler:  # pylint: disable=too-many-instance-attributes
     """Handle Pocket data."""
 
     data_file = DATA_FILE
@@ -25,269 +52,762 @@ class PocketDataHandler:
 
     separator_length = 42
     title_width = 50
+    preferred_domain_weight = 5
     read_url = 'https://app.getpocket.com/read'
 
-    def __init__(self):
-        self.pocket_data = self._download_pocket_data()
+    # pylint: disable=too-many-arguments,too-many-locals
+    def __init__(self, data_file: Optional[str] = None, cache_ttl: int = CACHE_TTL_DEFAULT, refresh: bool = False,
+                 offline: bool = False, full_sync: bool = False, page_size: int = PAGE_SIZE_DEFAULT,
+                 workers: int = WORKERS_DEFAULT, store: str = 'json', cache_codec: str = CACHE_CODEC_DEFAULT,
+                 cache_hard_ttl: int = CACHE_HARD_TTL_DEFAULT, timeout: float = TIMEOUT_DEFAULT,
+                 connect_timeout: float = CONNECT_TIMEOUT_DEFAULT, retries: int = RETRIES_DEFAULT,
+                 http_client: str = HTTP_CLIENT_DEFAULT, background: bool = False):
+        self.background = background
+        self.page_size = page_size
+        self.workers = workers
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.http_client = http_client
+        self.cache = PocketCache(
+            data_file or self.data_file, ttl=cache_ttl, codec=cache_codec, hard_ttl=cache_hard_ttl
+        )
+        self.store = PocketStore(
+            self.cache.get_index_file('sqlite'), ttl=cache_ttl, hard_ttl=cache_hard_ttl
+        ) if store == 'sqlite' else None
+        self.refresh_thread: Optional[threading.Thread] = None
+        self.items: Sequence[PocketItem] = []
+        self.domain_table = DomainTable()
+        self.domain_ids: Sequence[int] = []
+        self._snapshot: Optional[BinarySnapshot] = None
+        self._columns: Optional[PocketColumns] = None
+        self._keyword_index: Optional[KeywordIndex] = None
+        self._time_index: Optional[TimeIndex] = None
+
+        if self.store is not None:
+            # Items stay in SQLite and are only loaded a page at a time
+            self._load_store(refresh=refresh, offline=offline, full_sync=full_sync)
+            return
+
+        is_usable = not refresh and not full_sync and (offline or self.cache.is_usable())
+        snapshot = self.cache.load_binary() if is_usable else None
+
+        if snapshot is not None:
+            self._load_binary(snapshot)
+        else:
+            pocket_data, is_synced = self._load_pocket_data(refresh=refresh, offline=offline, full_sync=full_sync)
+            self.items = [PocketItem.from_dict(link) for link in pocket_data['list'].values()]
+            self.domain_ids = [self.domain_table.get_id(item.domain) for item in self.items]
+
+            if is_synced:
+                self._save_pocket_data(pocket_data)
+                return
+
+            # The binary snapshot is missing or outdated, so rewrite it from the JSON snapshot
+            self._save_binary()
+
+        if not offline and not self.cache.is_fresh():
+            self._start_background_refresh()
+
+    def _load_pocket_data(self, refresh: bool = False, offline: bool = False,
+                          full_sync: bool = False) -> Tuple[dict, bool]:
+        """Load Pocket data from the local snapshot, syncing it when the snapshot is missing or past the hard TTL.
+
+        Also returns whether the data was synced.
+        """
+        if not refresh and not full_sync and (offline or self.cache.is_usable()):
+            pocket_data = self.cache.load()
+            if pocket_data is not None:
+                return pocket_data, False
+
+        if offline:
+            self._exit_with_error(
+                f'No local Pocket data found ({self.cache.data_file}). Run again without --offline to download it.'
+            )
+
+        pocket_data = None if full_sync else self.cache.load()
+
+        if pocket_data is not None and pocket_data.get('since'):
+            changes = self._download_pocket_data(since=pocket_data['since'])
+            pocket_data = self._merge_pocket_data(pocket_data, changes)
+        else:
+            pocket_data = self._merge_pocket_data({'list': {}}, self._download_pocket_data())
+
+        return pocket_data, True
+
+    def _load_binary(self, snapshot: BinarySnapshot):
+        """Use the memory-mapped binary snapshot. Items are only read from it as they are used."""
+        self.items = MappedItems(snapshot)
+        self.domain_table = snapshot.get_domain_table()
+        self.domain_ids = snapshot.sections['domain_id']
+        self._time_index = snapshot.get_time_index()
+        self._snapshot = snapshot
+
+    def _load_store(self, refresh: bool = False, offline: bool = False, full_sync: bool = False):
+        """Sync the SQLite store when it is missing or past the hard TTL, or in the background when it is stale."""
+        assert self.store is not None
+
+        try:
+            if not refresh and not full_sync and (self.store.is_usable() or (offline and self.store.exists())):
+                if not offline and not self.store.is_fresh():
+                    self._start_background_refresh()
+                return
+
+            if offline:
+                self._exit_with_error(
+                    f'No local Pocket data found ({self.store.path}). Run again without --offline to download it.'
+                )
+
+            since = None if full_sync else self.store.get_since()
+            if since:
+                self.store.save(self._download_pocket_data(since=since))
+            else:
+                self.store.save(self._download_pocket_data(), replace=True)
+        except PocketStoreError as error:
+            self._exit_with_error(f'ERROR: {error}')
+
+    def _start_background_refresh(self):
+        """Sync the local snapshot in a background thread, while the stale snapshot answers this command.
+
+        The thread isn't a daemon thread, so the process waits for the sync to be saved before it exits.
+        """
+        self.refresh_thread = threading.Thread(target=self._refresh_in_background, name='pockette-refresh')
+        self.refresh_thread.start()
+
+    def _refresh_in_background(self):
+        """Sync the local snapshot with another handler, so the data in use doesn't change."""
+        try:
+            type(self)(
+                data_file=self.cache.data_file, cache_ttl=self.cache.ttl, refresh=True, page_size=self.page_size,
+                workers=self.workers, store='json' if self.store is None else 'sqlite',
+                cache_codec=self.cache.codec, cache_hard_ttl=self.cache.hard_ttl, timeout=self.timeout,
+                connect_timeout=self.connect_timeout, retries=self.retries, http_client=self.http_client,
+                background=True
+            )
+        except PocketSyncError as error:
+            # Output may be machine-readable, so only warn on stderr. The stale snapshot is used until next time.
+            click.echo(f'WARNING: Syncing Pocket data in the background failed. {error}', err=True)
+
+    def _exit_with_error(self, message: str) -> NoReturn:
+        """Print an error and exit, or raise it in the background, where output isn't the command's."""
+        if self.background:
+            raise PocketSyncError(message)
+
+        click.echo(message)
+        sys.exit(1)
+
+    def _save_pocket_data(self, pocket_data: dict):
+        """Save Pocket data to the local snapshot and build its indexes."""
+        try:
+            self.cache.save(pocket_data)
+            self.cache.save_binary(self.items, self.cache.source_stat)
+            self.cache.save_index('keywords', self.keyword_index.to_dict())
+            self.cache.save_index('time', self.time_index.to_dict())
+        except OSError as error:
+            click.echo(f'WARNING: Could not save Pocket data to {self.cache.data_file}: {error}', err=True)
+
+    def _save_binary(self):
+        """Save the binary snapshot of the items in the local snapshot."""
+        try:
+            self.cache.save_binary(self.items, self.cache.source_stat)
+        except OSError:
+            pass
+
+    @property
+    def columns(self) -> Optional[PocketColumns]:
+        """Get the NumPy columns of the items, creating them on first use, or `None` without NumPy."""
+        if self._columns is None and self.store is None and PocketColumns.is_available():
+            if self._snapshot is not None:
+                self._columns = PocketColumns.from_buffers(self._snapshot.sections, self.domain_table)
+            else:
+                self._columns = PocketColumns(self.items, self.domain_table)
+
+        return self._columns
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """Get the keyword index, loading it from the local snapshot or building it on first use."""
+        if self._keyword_index is None:
+            self._keyword_index = self._load_index('keywords', KeywordIndex)
+
+        return self._keyword_index
+
+    @property
+    def time_index(self) -> TimeIndex:
+        """Get the time index, loading it from the local snapshot or building it on first use."""
+        if self._time_index is None:
+            self._time_index = self._load_index('time', TimeIndex)
+
+        return self._time_index
+
+    def _load_index(self, name: str, index_class: Type[Index]) -> Index:
+        """Load an index from the local snapshot, or build and save it if it is missing or outdated."""
+        index = self.cache.load_index(name)
+        if index is not None and index.get('size') == len(self.items):
+            return index_class.from_dict(index)
+
+        built_index = index_class.build(self.items)
+
+        try:
+            self.cache.save_index(name, built_index.to_dict())
+        except OSError:
+            pass
+
+        return built_index
 
     @staticmethod
-    def _download_pocket_data() -> dict:
-        """Download Pocket data."""
+    def _merge_pocket_data(pocket_data: dict, changes: dict) -> dict:
+        """Merge downloaded changes into Pocket data.
+
+        Unread items (status 0) are added or updated. Archived (status 1) and deleted (status 2) items are removed.
+        """
+        links = pocket_data.get('list') or {}
+
+        # Pocket returns an empty array instead of an object when nothing changed
+        for item_id, link in (changes.get('list') or {}).items():
+            if str(link.get('status', '0')) == '0':
+                links[item_id] = link
+            else:
+                links.pop(item_id, None)
+
+        pocket_data['list'] = links
+        pocket_data['since'] = changes.get('since') or pocket_data.get('since')
+
+        return pocket_data
+
+    def _download_pocket_data(self, since: Optional[int] = None) -> dict:
+        """Download Pocket data.
+
+        Without `since`, all unread items are downloaded. With `since`, only items changed after that time are
+        downloaded, including archived and deleted items.
+        """
         try:
             consumer_key = os.environ['POCKET_CONSUMER_KEY']
         except KeyError:
-            click.echo(
+            self._exit_with_error(
                 'Consumer key environment variable is not set (POCKET_CONSUMER_KEY). '
                 'Run `pockette setup` for help.'
             )
-            sys.exit(1)
 
         try:
             access_token = os.environ['POCKET_ACCESS_TOKEN']
         except KeyError:
-            click.echo(
+            self._exit_with_error(
                 'Access token environment variable is not set (POCKET_ACCESS_TOKEN). '
                 'Run `pockette setup` for help.'
             )
-            sys.exit(1)
 
-        headers = {"Content-Type": "application/json; charset=UTF8", "X-Accept": "application/json"}
-        data = {
-            'consumer_key': consumer_key,
-            'access_token': access_token,
-            'detailType': 'complete',
-            'sort': 'newest',
-            'state': 'unread',
-            'count': '100000',
-        }
+        # Only syncing needs the Pocket clients, and `requests` is slow to import
+        # pylint: disable=import-outside-toplevel
+        from pockette.pocket_client import BasePocketClient, PocketApiError, PocketClient
 
-        response = requests.post('https://getpocket.com/v3/get', headers=headers, json=data, timeout=5)
+        client_class: Type[BasePocketClient] = PocketClient
+        if self.http_client == 'asyncio':
+            from pockette.pocket_async_client import AsyncPocketClient
+            client_class = AsyncPocketClient
+
+        client = client_class(
+            consumer_key, access_token, page_size=self.page_size, workers=self.workers, timeout=self.timeout,
+            connect_timeout=self.connect_timeout, retries=self.retries
+        )
 
         try:
-            pocket_data = json.loads(response.text)
-        except json.JSONDecodeError:
-            click.echo(f'ERROR loading Pocket data: {response.reason} ({response.status_code}): {response.text}')
-            sys.exit(1)
+            pocket_data = client.download(since=since)
+        except PocketApiError as error:
+            self._exit_with_error(f'ERROR loading Pocket data: {error}')
 
         return pocket_data
 
-    # pylint: disable=too-many-arguments,consider-using-f-string
+    # pylint: disable=too-many-arguments,too-many-locals,consider-using-f-string
     def generate_report(self, count: Optional[int] = None, show_all: bool = False, length: Optional[str] = None,
                         include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
-                        end_date: Optional[datetime] = None, start_date: Optional[datetime] = None):
-        """Generate report for Pocket data."""
+                        end_date: Optional[datetime] = None, start_date: Optional[datetime] = None,
+                        favorite: bool = False, match: str = 'substring', output: str = 'text',
+                        fields: Optional[List[str]] = None):
+        """Generate report for Pocket data, as text or as records."""
         if show_all:
             count = None
 
-        links = self._filter_links(
-            include_keywords=include_keywords,
-            exclude_keywords=exclude_keywords,
-            end_date=end_date,
-            start_date=start_date,
-            length=length
-        )
-
-        domains_counts = self._get_links_domains_counts(links)
-        links_ages = self._get_links_ages(links)
-
-        self._print_centered_section_title('Summary', initial_section=True)
-        click.echo('{:5,} unread pages across {:,} sites'.format(len(links), len(set(domains_counts))))
-        click.echo('{:5,} unread pages older than 1 month'.format(len(links_ages['one_month'])))
-        click.echo('{:5,} unread pages older than 3 months'.format(len(links_ages['three_months'])))
-        click.echo('{:5,} unread pages older than 6 months'.format(len(links_ages['six_months'])))
-        click.echo('{:5,} unread pages older than 9 months'.format(len(links_ages['nine_months'])))
-        click.echo('{:5,} unread pages older than 1 year'.format(len(links_ages['year'])))
+        filters: Dict[str, Any] = {
+            'include_keywords': include_keywords,
+            'exclude_keywords': exclude_keywords,
+            'end_date': end_date,
+            'start_date': start_date,
+            'length': length,
+            'favorite': favorite,
+            'match': match,
+        }
 
-        self._print_centered_section_title('Most-common websites (unread)')
-        self._print_domain_stats(domains_counts, max_count=count)
+        if self.store is not None:
+            try:
+                metrics = self.store.get_report(self._get_store_where(**filters), self._get_age_cutoffs())
+            except PocketStoreError as error:
+                click.echo(f'ERROR: {error}')
+                sys.exit(1)
+        else:
+            aggregator = ReportAggregator({
+                'total': LinkCount(),
+                'domains': DomainCounts(),
+                'ages': AgeCounts(self._get_age_cutoffs()),
+            })
+            metrics = aggregator.aggregate(self.items, self._filter_link_indices(**filters), columns=self.columns)
+
+        domains_counts = metrics['domains']
+        links_ages = metrics['ages']
+
+        if output != 'text':
+            with PocketRenderer() as renderer:
+                fields = fields or parse_fields(REPORT_FIELDS_DEFAULT)
+                writer = RecordWriter(renderer, output, fields)
+
+                for record in self._get_report_records(metrics, max_count=count):
+                    writer.write(record[field] for field in fields)
+            return
+
+        with PocketRenderer() as renderer:
+            self._print_centered_section_title(renderer, 'Summary', initial_section=True)
+            renderer.echo('{:5,} unread pages across {:,} sites'.format(metrics['total'], len(domains_counts)))
+            renderer.echo('{:5,} unread pages older than 1 month'.format(links_ages['one_month']))
+            renderer.echo('{:5,} unread pages older than 3 months'.format(links_ages['three_months']))
+            renderer.echo('{:5,} unread pages older than 6 months'.format(links_ages['six_months']))
+            renderer.echo('{:5,} unread pages older than 9 months'.format(links_ages['nine_months']))
+            renderer.echo('{:5,} unread pages older than 1 year'.format(links_ages['year']))
+
+            self._print_centered_section_title(renderer, 'Most-common websites (unread)')
+            self._print_domain_stats(renderer, domains_counts, max_count=count)
 
     @staticmethod
-    def _is_match(keywords: str, item: dict) -> bool:
-        """Determine if this Pocket item matches any of the specified keywords."""
-        item_components = [i.lower() for i in (item['resolved_title'], item['resolved_url'], item['excerpt'])]
-
-        is_a_match = False
-
-        for keyword in keywords.lower().split(','):
-            keyword = keyword.strip()
+    def _get_report_records(metrics: dict, max_count: Optional[int] = None) -> Iterator[dict]:
+        """Get the report as records: the totals, the pages older than each age, then the most-common domains."""
+        yield {'section': 'summary', 'name': 'pages', 'count': metrics['total']}
+        yield {'section': 'summary', 'name': 'sites', 'count': len(metrics['domains'])}
 
-            if any(keyword in item_component for item_component in item_components):
-                is_a_match = True
-                break
+        for label, age_count in metrics['ages'].items():
+            yield {'section': 'age', 'name': label, 'count': age_count}
 
-        return is_a_match
+        domain_counts = list(metrics['domains'].items())
+        for domain, domain_count in select_largest(domain_counts, key=lambda x: x[1], count=max_count or None):
+            yield {'section': 'domain', 'name': domain, 'count': domain_count}
 
     @staticmethod
     def _get_current_datetime() -> datetime:  # pragma: no cover
         """For easier test mocking."""
         return datetime.now()
 
-    # pylint: disable=too-many-branches,too-many-statements,too-many-arguments,too-many-locals
-    def _filter_links(self, include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
-                      end_date: Optional[datetime] = None, start_date: Optional[datetime] = None,
-                      length: Optional[str] = None) -> List[dict]:
-        """Filter and analyze Pocket links."""
-        filtered_links = []
+    # pylint: disable=too-many-branches,too-many-arguments,too-many-locals
+    def _filter_link_indices(self, include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
+                             end_date: Optional[datetime] = None, start_date: Optional[datetime] = None,
+                             length: Optional[str] = None, favorite: bool = False, match: str = 'substring',
+                             time_order: Optional[str] = None) -> Iterable[int]:
+        """Get the positions of the Pocket links that match the filters.
 
-        for link in self.pocket_data['list'].values():
-            if include_keywords and not self._is_match(include_keywords, link):
-                continue
+        Keywords are matched as substrings of the title, URL, or excerpt, or as whole words with `match='token'`.
+        The positions are in their original order, or sorted by time with `time_order='oldest'` or `'newest'`.
 
-            if exclude_keywords and self._is_match(exclude_keywords, link):
+        Filters that check one link at a time are chained generators, so links are only checked as the positions
+        are used. Without them, the positions are a list.
+        """
+        end_time = end_date.timestamp() if end_date else None
+        start_time = start_date.timestamp() if start_date else None
+        max_time_to_read = self.short_min_default if length == 'short' else None
+        min_time_to_read = self.long_min_default if length == 'long' else None
+
+        # The date range is a view of the time index, which is already in time order
+        candidates: Optional[Sequence[int]] = None
+        if time_order or start_time is not None or end_time is not None:
+            candidates = self.time_index.search(
+                start_time=start_time, end_time=end_time, newest_first=time_order == 'newest'
+            )
+            if not time_order:
+                candidates = sorted(candidates)
+
+        indices: Iterable[int] = range(len(self.items)) if candidates is None else candidates
+
+        if max_time_to_read is not None or min_time_to_read is not None or favorite:
+            if self.columns is not None:
+                indices = self.columns.filter(
+                    max_time_to_read=max_time_to_read,
+                    min_time_to_read=min_time_to_read,
+                    favorite=favorite,
+                    indices=None if candidates is None else list(candidates)
+                )
+            else:
+                indices = self._filter_link_fields(
+                    indices,
+                    max_time_to_read=max_time_to_read,
+                    min_time_to_read=min_time_to_read,
+                    favorite=favorite
+                )
+
+        if match == 'token':
+            if include_keywords:
+                include_matches = self.keyword_index.search(include_keywords)
+                indices = filter(include_matches.__contains__, indices)
+
+            if exclude_keywords:
+                exclude_matches = self.keyword_index.search(exclude_keywords)
+                indices = filterfalse(exclude_matches.__contains__, indices)
+
+            return indices
+
+        if include_keywords:
+            include_matcher = KeywordMatcher(include_keywords)
+            indices = (i for i in indices if include_matcher.is_match(self.items[i].search_text))
+
+        if exclude_keywords:
+            exclude_matcher = KeywordMatcher(exclude_keywords)
+            indices = (i for i in indices if not exclude_matcher.is_match(self.items[i].search_text))
+
+        return indices
+
+    def _filter_link_fields(self, indices: Iterable[int], max_time_to_read: Optional[int] = None,
+                            min_time_to_read: Optional[int] = None, favorite: bool = False) -> Iterator[int]:
+        """Get the positions of the Pocket links that match the reading time and favorite filters, one by one."""
+        for i in indices:
+            link = self.items[i]
+            time_to_read = link.time_to_read
+            if max_time_to_read is not None and time_to_read is not None and time_to_read > max_time_to_read:
                 continue
 
-            time_added = datetime.fromtimestamp(int(link['time_added']))
-            if end_date and time_added >= end_date:
+            if min_time_to_read is not None and time_to_read is not None and time_to_read < min_time_to_read:
                 continue
 
-            if start_date and time_added <= start_date:
+            if favorite and not link.favorite:
                 continue
 
-            time_to_read = link.get('time_to_read')
-            if length == 'short' and isinstance(time_to_read, int) and time_to_read > self.short_min_default:
-                continue
+            yield i
 
-            if length == 'long' and isinstance(time_to_read, int) and time_to_read < self.long_min_default:
-                continue
+    def _get_age_cutoffs(self) -> Dict[str, float]:
+        """Get the times that links must be added before to count as older than each age."""
+        now = self._get_current_datetime()
 
-            filtered_links.append(link)
+        return {
+            'year': (now - timedelta(days=365)).timestamp(),
+            'nine_months': (now - timedelta(days=9*30)).timestamp(),
+            'six_months': (now - timedelta(days=6*30)).timestamp(),
+            'three_months': (now - timedelta(days=3*30)).timestamp(),
+            'one_month': (now - timedelta(days=1*30)).timestamp(),
+        }
 
-        return filtered_links
+    def _get_pocket_item_url(self, item_id: str) -> str:
+        """Get a Pocket item's URL."""
+        return f'{self.read_url}/{item_id}'
 
-    @staticmethod
-    def _get_links_domains_counts(links: List[dict]) -> Dict[str, int]:
-        """Count the occurrences of each domain."""
-        domain_counts = {}
-        for link in links:
-            url = link['resolved_url'].split('//')[1].split('/')[0]
-            if url not in domain_counts:
-                domain_counts[url] = 0
-
-            domain_counts[url] += 1
-
-        return domain_counts
-
-    def _get_links_ages(self, links: list) -> Dict[str, list]:
-        """Organize links by age."""
-        link_ages: Dict[str, list] = {
-            'year': [],
-            'nine_months': [],
-            'six_months': [],
-            'three_months': [],
-            'one_month': [],
+    # pylint: disable=too-many-locals,too-many-arguments
+    def search_pocket_data(self, count: int = COUNT_DEFAULT, offset: int = 0, is_random: bool = False,
+                           sort_order: str = 'time', reverse_order: bool = False,
+                           show_all: bool = False, open_sites: bool = False, length: Optional[str] = None,
+                           include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
+                           end_date: Optional[datetime] = None, start_date: Optional[datetime] = None,
+                           favorite: bool = False, match: str = 'substring', seed: Optional[int] = None,
+                           weight: str = 'none', preferred_domains: Optional[str] = None, output: str = 'text',
+                           fields: Optional[List[str]] = None, open_mode: str = 'both',
+                           max_tabs: int = TABS_MAX_DEFAULT, tab_rate: float = TAB_RATE_DEFAULT,
+                           tab_batch_size: int = TAB_BATCH_DEFAULT, tab_workers: int = TAB_WORKERS_DEFAULT,
+                           defer_tabs: bool = False) -> Optional[List[List[str]]]:
+        """Search through Pocket bookmarks, as text or as records streamed as they are found.
+
+        With `open_sites`, the links are also opened in new browser tabs until `max_tabs` tabs are open. With
+        `defer_tabs`, the tabs aren't opened, and the URLs of each link to open are returned instead.
+        """
+        filters: Dict[str, Any] = {
+            'include_keywords': include_keywords,
+            'exclude_keywords': exclude_keywords,
+            'end_date': end_date,
+            'start_date': start_date,
+            'length': length,
+            'favorite': favorite,
+            'match': match,
+        }
+        order = 'random' if is_random else sort_order
+        offset = offset if isinstance(offset, int) and offset >= 0 else 0
+        page_count = None if show_all or count < 1 else count
+        get_weight = self._get_sample_weight(weight=weight, preferred_domains=preferred_domains)
+
+        search_args: Dict[str, Any] = {
+            'order': order, 'reverse_order': reverse_order, 'offset': offset, 'count': page_count, 'seed': seed,
+            'get_weight': get_weight,
         }
+        links: Iterable[PocketItem]
 
-        for link in links:
-            time_added = datetime.fromtimestamp(int(link['time_added']))
+        try:
+            if output != 'text':
+                links = self._iter_links(filters, **search_args)
+            elif self.store is not None:
+                links, total = self._search_store(filters, **search_args)
+            else:
+                links, total = self._search_links(filters, **search_args)
+        except PocketStoreError as error:
+            click.echo(f'ERROR: {error}')
+            sys.exit(1)
 
-            if time_added < (self._get_current_datetime() - timedelta(days=365)):
-                link_ages['year'].append(link)
+        tabs = None
+        if open_sites:
+            # Only `read` opens tabs, and `webbrowser` is slow to import
+            from pockette.pocket_tabs import TabScheduler  # pylint: disable=import-outside-toplevel
 
-            if time_added < (self._get_current_datetime() - timedelta(days=9*30)):
-                link_ages['nine_months'].append(link)
+            # No workers are started until a tab is opened
+            tabs = TabScheduler(
+                max_tabs=max_tabs, rate=tab_rate, batch_size=tab_batch_size, workers=tab_workers, defer=defer_tabs
+            )
 
-            if time_added < (self._get_current_datetime() - timedelta(days=6*30)):
-                link_ages['six_months'].append(link)
+        with tabs or nullcontext(), PocketRenderer() as renderer:
+            if output != 'text':
+                fields = fields or parse_fields(SEARCH_FIELDS_DEFAULT)
+                print_page = self._get_record_printer(renderer, output, fields)
+            else:
+                renderer.echo('\nPages found ({:,})\n{}'.format(total, '-'*self.separator_length))
+                print_page = self._get_page_printer(renderer)
 
-            if time_added < (self._get_current_datetime() - timedelta(days=3*30)):
-                link_ages['three_months'].append(link)
+            tabs_skipped = False
+            for i, link in enumerate(links, 1):
+                url = link.url
+                pocket_url = self._get_pocket_item_url(link.item_id)
 
-            if time_added < (self._get_current_datetime() - timedelta(days=1*30)):
-                link_ages['one_month'].append(link)
+                if tabs is not None and tabs.is_full():
+                    tabs_skipped = True
+                    if page_count is not None:
+                        # A page with more links than tabs stops with the tabs, while --all lists every link
+                        break
 
-        return link_ages
+                print_page(link, pocket_url, i)
 
-    def _get_pocket_item_url(self, item_id: str) -> str:
-        """Get a Pocket item's URL."""
-        return f'{self.read_url}/{item_id}'
+                if tabs is not None and not tabs_skipped:
+                    # Opened together, so the Pocket page and the original page stay next to each other
+                    tabs.open(*self._get_tab_urls(pocket_url, url, open_mode))
 
-    # pylint: disable=too-many-locals,too-many-arguments
-    def search_pocket_data(self, count: int = COUNT_DEFAULT, offset: int = 0, is_random: bool = False,
-                           sort_order: str = 'time', reverse_order: bool = False,
-                           show_all: bool = False, open_sites: bool = False, length: Optional[str] = None,
-                           include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
-                           end_date: Optional[datetime] = None, start_date: Optional[datetime] = None):
-        """Search through Pocket bookmarks."""
-        links = self._filter_links(
-            include_keywords=include_keywords,
-            exclude_keywords=exclude_keywords,
-            end_date=end_date,
-            start_date=start_date,
-            length=length
+            if tabs is not None and tabs_skipped and output == 'text':
+                renderer.echo(
+                    f'\nOpening only the first {tabs.max_tabs} new tabs for better performance. '
+                    'Use --max-tabs to open more.'
+                )
+
+        if tabs is None:
+            return None
+
+        if tabs.failed:
+            click.echo(f'WARNING: Could not open {len(tabs.failed):,} tabs.', err=True)
+
+        return [list(urls) for urls in tabs.deferred] if defer_tabs else None
+
+    @staticmethod
+    def _get_tab_urls(pocket_url: str, url: str, open_mode: str = 'both') -> List[str]:
+        """Get the URLs of a link to open in tabs."""
+        return [
+            tab_url for tab_url, modes in ((pocket_url, ('both', 'pocket')), (url, ('both', 'original')))
+            if open_mode in modes
+        ]
+
+    # pylint: disable=too-many-arguments
+    def _iter_links(self, filters: dict, order: str = 'time', reverse_order: bool = False, offset: int = 0,
+                    count: Optional[int] = None, seed: Optional[int] = None,
+                    get_weight: Optional[Callable[[int, str], float]] = None) -> Iterator[PocketItem]:
+        """Get a page of the links one at a time, without counting the matching links.
+
+        Links in time order are streamed from the filters, or from the SQLite store, and only one is held at a
+        time. Random and site order need the positions of every matching link first.
+        """
+        if self.store is not None:
+            if order == 'random':
+                links, _ = self._search_store(
+                    filters, order=order, offset=offset, count=count, seed=seed, get_weight=get_weight
+                )
+                return iter(links)
+
+            return self.store.iter_search(
+                self._get_store_where(**filters), order=self._get_store_order(order, reverse_order), offset=offset,
+                count=count
+            )
+
+        positions: Iterable[int]
+        if order == 'time':
+            indices = self._filter_link_indices(time_order='oldest' if reverse_order else 'newest', **filters)
+            positions = islice(indices, offset, None if count is None else offset + count)
+        else:
+            positions, _ = self._search_positions(
+                filters, order=order, reverse_order=reverse_order, offset=offset, count=count, seed=seed,
+                get_weight=get_weight
+            )
+
+        return (self.items[position] for position in positions)
+
+    # pylint: disable=too-many-arguments
+    def _search_links(self, filters: dict, order: str = 'time', reverse_order: bool = False, offset: int = 0,
+                      count: Optional[int] = None, seed: Optional[int] = None,
+                      get_weight: Optional[Callable[[int, str], float]] = None) -> Tuple[List[PocketItem], int]:
+        """Get a page of the links in memory, and the number of matching links."""
+        page, total = self._search_positions(
+            filters, order=order, reverse_order=reverse_order, offset=offset, count=count, seed=seed,
+            get_weight=get_weight
         )
 
-        click.echo('\nPages found ({:,})\n{}'.format(len(links), '-'*self.separator_length))
+        return [self.items[position] for position in page], total
 
-        if sort_order == 'time':
-            links = list(reversed(sorted(links, key=lambda x: x['time_added'])))
-        elif sort_order == 'site':
-            links = list(sorted(
-                links,
-                key=lambda x: x['resolved_url'].split('//')[1].split('www.')[-1].split('/')[0]
-            ))
+    # pylint: disable=too-many-arguments
+    def _search_positions(self, filters: dict, order: str = 'time', reverse_order: bool = False, offset: int = 0,
+                          count: Optional[int] = None, seed: Optional[int] = None,
+                          get_weight: Optional[Callable[[int, str], float]] = None) -> Tuple[Sequence[int], int]:
+        """Get the positions of a page of the links in memory, and the number of matching links.
 
-        if reverse_order:
-            links = list(reversed(links))
+        The links flow through lazy stages: filter, order, offset, then limit. Links in time order are only
+        checked until the page is filled, and the rest are counted without being kept.
+        """
+        time_order = None
+        if order == 'time':
+            time_order = 'oldest' if reverse_order else 'newest'
 
-        if is_random:
-            random.shuffle(links)
+        indices = self._filter_link_indices(time_order=time_order, **filters)
 
-        if isinstance(offset, int) and offset >= 0:
-            links = links[offset:]
+        # Only the links up to the end of the page need to be drawn or put in order
+        window = None if count is None else offset + count
 
-        for i, link in enumerate(links, 1):
-            url = link['resolved_url']
-            pocket_url = self._get_pocket_item_url(link['item_id'])
+        if order == 'random':
+            positions, total = sample(
+                indices, count=window, rng=random.Random(seed),
+                weight=None if get_weight is None else (
+                    lambda position: get_weight(self.items[position].time_added, self.items[position].domain)
+                )
+            )
+            page = positions[offset:window]
+        elif order == 'site':
+            # Sorting by site needs every link
+            positions = list(indices)
+            total = len(positions)
+
+            if reverse_order:
+                positions = select_largest(positions, key=self._get_site_sort_key, count=window)
+            else:
+                positions = select_smallest(positions, key=self._get_site_sort_key, count=window)
+
+            page = positions[offset:window]
+        else:
+            page, total = select_page(indices, offset=offset, count=count)
+
+        return page, total
+
+    # pylint: disable=too-many-arguments
+    def _search_store(self, filters: dict, order: str = 'time', reverse_order: bool = False, offset: int = 0,
+                      count: Optional[int] = None, seed: Optional[int] = None,
+                      get_weight: Optional[Callable[[int, str], float]] = None) -> Tuple[List[PocketItem], int]:
+        """Get a page of the links in the SQLite store, and the number of matching links.
+
+        Filters, ordering, and the page run in SQL. Random links are drawn from the matching positions, so that
+        `--seed` and weights work the same as in memory.
+        """
+        assert self.store is not None
+        where = self._get_store_where(**filters)
+
+        if order == 'random':
+            window = None if count is None else offset + count
+            rows, total = sample(
+                self.store.get_sample_rows(where), count=window, rng=random.Random(seed),
+                weight=None if get_weight is None else (lambda row: get_weight(row[1], row[2]))
+            )
+            return self.store.get_items(row[0] for row in rows[offset:window]), total
 
-            self._print_page(title=link['resolved_title'], pocket_url=pocket_url, url=url, index=i)
+        store_order = self._get_store_order(order, reverse_order)
+        return self.store.search(where, order=store_order, offset=offset, count=count)
 
-            if open_sites and i <= self.count_default:
-                webbrowser.open(pocket_url)
-                webbrowser.open(url)
+    @staticmethod
+    def _get_store_order(order: str = 'time', reverse_order: bool = False) -> str:
+        """Get the SQLite store's name for a sort order."""
+        if order == 'site':
+            return 'site_reverse' if reverse_order else 'site'
+
+        return 'oldest' if reverse_order else 'newest'
+
+    # pylint: disable=too-many-arguments
+    def _get_store_where(self, include_keywords: Optional[str] = None, exclude_keywords: Optional[str] = None,
+                         end_date: Optional[datetime] = None, start_date: Optional[datetime] = None,
+                         length: Optional[str] = None, favorite: bool = False,
+                         match: str = 'substring') -> Tuple[str, list]:
+        """Get the SQL filters for the SQLite store."""
+        assert self.store is not None
+
+        return self.store.get_where(
+            start_time=start_date.timestamp() if start_date else None,
+            end_time=end_date.timestamp() if end_date else None,
+            max_time_to_read=self.short_min_default if length == 'short' else None,
+            min_time_to_read=self.long_min_default if length == 'long' else None,
+            favorite=favorite,
+            include_keywords=include_keywords,
+            exclude_keywords=exclude_keywords,
+            match=match
+        )
+
+    def _get_sample_weight(self, weight: str = 'none',
+                           preferred_domains: Optional[str] = None) -> Optional[Callable[[int, str], float]]:
+        """Get the weight of a link in a random selection from its time added and domain, or `None` to pick every
+        link equally often.
+
+        With `weight='older'`, links are weighted by their age. Links from the preferred domains are picked more
+        often.
+        """
+        if weight == 'none' and not preferred_domains:
+            return None
+
+        now = self._get_current_datetime().timestamp()
+        sites = {get_site(domain.strip().lower()) for domain in (preferred_domains or '').split(',')} - {''}
+
+        def get_weight(time_added: int, domain: str) -> float:
+            link_weight = 1.0
+            if weight == 'older':
+                link_weight += max(now - time_added, 0)
 
-                if i == self.count_default and count > self.count_default:
-                    click.echo(f'\nOpening only the first {self.count_default} new tabs for better performance.')
-                    break
+            if get_site(domain) in sites:
+                link_weight *= self.preferred_domain_weight
 
-            if i == count and not show_all:
-                break
+            return link_weight
 
-    def _print_centered_section_title(self, label: str, initial_section: bool = False):
+        return get_weight
+
+    def _get_site_sort_key(self, position: int) -> int:
+        """Get the rank of a link's domain, without `www.`, among the sorted domains."""
+        return self.domain_table.site_ranks[self.domain_ids[position]]
+
+    def _print_centered_section_title(self, renderer: PocketRenderer, label: str, initial_section: bool = False):
         """Print a section title."""
         if not initial_section:
-            click.echo('')
+            renderer.echo('')
 
-        click.echo(f' {label} '.center(self.separator_length, '─'))
+        renderer.echo(f' {label} '.center(self.separator_length, '─'))
 
-    def _print_page(self, title: str, pocket_url: str, url: str, index: int):
-        """Print a single Pocket bookmark.
+    def _get_page_printer(self, renderer: PocketRenderer) -> Callable[[PocketItem, str, int], None]:
+        """Get a function that prints a single Pocket bookmark, with the row format built once.
 
         Ex.
         1. The Head Line  https://app.getpocket.com/read/ABC123  https://www.nytimes.com/news/of/the/day
         """
-        prefix = '{:2}: '.format(index)
+        title_width = self.title_width
+        url_width = self.separator_length
+        row_format = f'{{:2}}: {{:{title_width}.{title_width}}} {{:{url_width}.{url_width}}} {{}}'
 
-        if len(title) > self.title_width:
-            title = title[:self.title_width]
-            title_pieces = title.split(' ')[:-1]
+        def print_page(link: PocketItem, pocket_url: str, index: int):
+            renderer.echo(row_format.format(index, truncate(link.title, title_width), pocket_url, link.url))
 
-            if len(' '.join(title_pieces)) > (self.title_width-3):
-                title_pieces = title_pieces[:-1]
+        return print_page
 
-            title = ' '.join(title_pieces) + '...'
+    @staticmethod
+    def _get_record_printer(renderer: PocketRenderer, output: str,
+                            fields: List[str]) -> Callable[[PocketItem, str, int], None]:
+        """Get a function that prints a single Pocket bookmark as a record with the fields."""
+        writer = RecordWriter(renderer, output, fields)
+        get_values = [SEARCH_FIELDS[field] for field in fields]
 
-        click.echo(
-            f'{prefix}{title:{self.title_width}.{self.title_width}} '
-            f'{pocket_url:{self.separator_length}.{self.separator_length}} {url}'
-        )
+        def print_record(link: PocketItem, pocket_url: str, index: int):  # pylint: disable=unused-argument
+            writer.write([get_value(link, pocket_url) for get_value in get_values])
+
+        return print_record
 
     @staticmethod
-    def _print_domain_stats(domain_counts: Dict[str, int], max_count: Optional[int] = None):
+    def _print_domain_stats(renderer: PocketRenderer, domain_counts: Dict[str, int],
+                            max_count: Optional[int] = None):
         """Print domains and their stats."""
-        urls = tuple(reversed(sorted(domain_counts.items(), key=lambda x: x[1])))
-
         if not max_count:
-            max_count = len(urls)
+            max_count = len(domain_counts)
+
+        urls = select_largest(list(domain_counts.items()), key=lambda x: x[1], count=max_count)
+        row_format = f'{{:{len(str(max_count))}}}: {{}} ({{}})'
 
-        for i, (url, url_count) in enumerate(urls[:max_count], 1):
-            click.echo('{:{}}: {} ({})'.format(i, len(str(max_count)), url, url_count))
+        for i, (url, url_count) in enumerate(urls, 1):
+            renderer.echo(row_format.format(i, url, url_count))
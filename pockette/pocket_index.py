@@ -0,0 +1,159 @@
+"""Indexes over Pocket items."""
+
+from bisect import bisect_left, bisect_right
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Union, overload
+
+from pockette.pocket_item import PocketItem
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class KeywordIndex:
+    """Inverted index from each word in an item's title, URL, and excerpt to the positions of the items.
+
+    A keyword matches an item when every word of the keyword appears in the item, so `nytimes.com` matches items
+    with both `nytimes` and `com`. Unlike substring matching, `police` doesn't match `policing`.
+    """
+
+    def __init__(self, postings: Dict[str, List[int]], size: int):
+        self.postings = postings
+        self.size = size
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into lowercase words."""
+        return TOKEN_PATTERN.findall(text.lower())
+
+    @classmethod
+    def build(cls, items: Iterable[PocketItem]) -> 'KeywordIndex':
+        """Build an index from items."""
+        postings: Dict[str, List[int]] = {}
+        size = 0
+
+        for position, item in enumerate(items):
+            for token in set(TOKEN_PATTERN.findall(item.search_text)):
+                postings.setdefault(token, []).append(position)
+            size = position + 1
+
+        return cls(postings, size)
+
+    @classmethod
+    def from_dict(cls, index: dict) -> 'KeywordIndex':
+        """Load an index saved with `to_dict`."""
+        return cls(index['postings'], index['size'])
+
+    def to_dict(self) -> dict:
+        """Get a JSON-serializable form of the index."""
+        return {'postings': self.postings, 'size': self.size}
+
+    def search(self, keywords: str) -> Set[int]:
+        """Get the positions of the items that match any of the comma-separated keywords."""
+        matches: Set[int] = set()
+
+        for keyword in keywords.split(','):
+            keyword_matches = self._search_keyword(keyword)
+            if keyword_matches is None:
+                # Like an empty substring, a keyword without any words matches everything
+                return set(range(self.size))
+
+            matches |= keyword_matches
+
+        return matches
+
+    def _search_keyword(self, keyword: str) -> Optional[Set[int]]:
+        """Get the positions of the items that contain every word of a keyword, or `None` if it has no words."""
+        tokens = sorted(set(self.tokenize(keyword)), key=lambda token: len(self.postings.get(token, ())))
+        if not tokens:
+            return None
+
+        # Start from the shortest posting list to keep the intersections small
+        matches = set(self.postings.get(tokens[0], ()))
+        for token in tokens[1:]:
+            if not matches:
+                break
+
+            matches.intersection_update(self.postings.get(token, ()))
+
+        return matches
+
+
+class TimeIndex:
+    """Positions of the items sorted by the time they were added.
+
+    Items added at the same time keep their original order, so reversing the index gives the same order as a
+    stable newest-first sort. A date range is a contiguous slice of the index, found with two binary searches.
+    """
+
+    def __init__(self, positions: Sequence[int], times: Sequence[int]):
+        self.positions = positions
+        self.times = times
+        self.size = len(positions)
+
+    @classmethod
+    def build(cls, items: Sequence[PocketItem]) -> 'TimeIndex':
+        """Build an index from items."""
+        positions = sorted(range(len(items)), key=lambda position: items[position].time_added)
+        return cls(positions, [items[position].time_added for position in positions])
+
+    @classmethod
+    def from_dict(cls, index: dict) -> 'TimeIndex':
+        """Load an index saved with `to_dict`."""
+        return cls(index['positions'], index['times'])
+
+    def to_dict(self) -> dict:
+        """Get a JSON-serializable form of the index."""
+        return {'positions': self.positions, 'times': self.times, 'size': self.size}
+
+    def search(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+               newest_first: bool = False) -> 'PositionSlice':
+        """Get the positions of the items added between the start and end times, oldest first.
+
+        Start and end times are exclusive. The positions are a view of the index, so nothing is copied until they
+        are read, in reverse with `newest_first`.
+        """
+        start = 0 if start_time is None else bisect_right(self.times, start_time)
+        end = self.size if end_time is None else bisect_left(self.times, end_time)
+
+        return PositionSlice(self.positions, start, end, reverse=newest_first)
+
+
+class PositionSlice(Sequence[int]):
+    """A view of the positions from `start` to `end` of an index, last first with `reverse`.
+
+    Positions are only read as they are used, so taking a page of a large date range doesn't copy the whole range.
+    """
+
+    def __init__(self, positions: Sequence[int], start: int, end: int, reverse: bool = False):
+        self.positions = positions
+        self.indices = range(start, max(start, end))
+        if reverse:
+            self.indices = self.indices[::-1]
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[int]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, List[int]]:
+        if isinstance(index, slice):
+            return [self.positions[i] for i in self.indices[index]]
+
+        return self.positions[self.indices[index]]
+
+    def __iter__(self) -> Iterator[int]:
+        return map(self.positions.__getitem__, self.indices)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+
+        return list(self) == list(other)
+
+    __hash__ = None  # type: ignore[assignment]
@@ -0,0 +1,60 @@
+"""Pocket item records."""
+
+from typing import Optional
+
+from pockette.pocket_domain import get_domain
+
+
+def _get_int(value, default: Optional[int] = None) -> Optional[int]:
+    """Parse an integer field from the Pocket API, which sends most numbers as strings."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class PocketItem:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """A Pocket link, parsed once when it is loaded.
+
+    Timestamps and lengths are integers, the domain is extracted from the URL, and the title, URL, and excerpt are
+    joined into a single lowercase string for keyword matching.
+    """
+
+    __slots__ = (
+        'item_id', 'title', 'url', 'excerpt', 'time_added', 'time_to_read', 'word_count', 'favorite', 'domain',
+        'search_text',
+    )
+
+    # Joins the searchable fields so that a keyword can't match across two of them
+    search_separator = '\0'
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, item_id: str, title: str, url: str, excerpt: str, time_added: int,
+                 time_to_read: Optional[int] = None, word_count: int = 0, favorite: bool = False):
+        self.item_id = item_id
+        self.title = title
+        self.url = url
+        self.excerpt = excerpt
+        self.time_added = time_added
+        self.time_to_read = time_to_read
+        self.word_count = word_count
+        self.favorite = favorite
+        self.domain = get_domain(url)
+        self.search_text = self.search_separator.join((title, url, excerpt)).lower()
+
+    def __repr__(self) -> str:
+        return f'PocketItem(item_id={self.item_id!r}, title={self.title!r})'
+
+    @classmethod
+    def from_dict(cls, link: dict) -> 'PocketItem':
+        """Create an item from a Pocket API link."""
+        return cls(
+            item_id=str(link['item_id']),
+            title=link.get('resolved_title') or '',
+            url=link.get('resolved_url') or '',
+            excerpt=link.get('excerpt') or '',
+            time_added=_get_int(link.get('time_added'), 0) or 0,
+            time_to_read=_get_int(link.get('time_to_read')),
+            word_count=_get_int(link.get('word_count'), 0) or 0,
+            favorite=link.get('favorite') in ('1', 1, True),
+        )
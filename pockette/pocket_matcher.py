@@ -0,0 +1,45 @@
+"""Keyword matching."""
+
+from typing import List
+
+try:
+    import ahocorasick  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+
+class KeywordMatcher:  # pylint: disable=too-few-public-methods
+    """Match comma-separated keywords as case-insensitive substrings.
+
+    The keywords are parsed once per query. With many keywords and `pyahocorasick` installed, they are compiled
+    into an Aho-Corasick automaton that scans each text in a single pass. Otherwise, each keyword is checked with a
+    substring search, which is faster for a handful of keywords.
+    """
+
+    automaton_min_keywords = 20
+
+    def __init__(self, keywords: str):
+        self.keywords: List[str] = list(dict.fromkeys(keyword.strip() for keyword in keywords.lower().split(',')))
+
+        # An empty keyword matches everything, like an empty substring
+        self.matches_everything = '' in self.keywords
+
+        self.automaton = None
+        if ahocorasick is not None and len(self.keywords) >= self.automaton_min_keywords:
+            self.automaton = ahocorasick.Automaton()  # pylint: disable=c-extension-no-member
+            for keyword in self.keywords:
+                if keyword:
+                    self.automaton.add_word(keyword, keyword)
+            self.automaton.make_automaton()
+
+    def is_match(self, text: str) -> bool:
+        """Determine if lowercase text contains any of the keywords."""
+        if self.matches_everything:
+            return True
+
+        if self.automaton is not None:
+            for _ in self.automaton.iter(text):
+                return True
+            return False
+
+        return any(map(text.__contains__, self.keywords))
@@ -0,0 +1,63 @@
+"""Write records in machine-readable formats, one at a time."""
+
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Sequence
+
+from pockette.pocket_item import PocketItem
+from pockette.pocket_render import PocketRenderer
+
+OUTPUT_FORMATS = ('text', 'jsonl', 'csv', 'tsv')
+
+# Fields of a search result, and how to get them from a link and its Pocket URL
+SEARCH_FIELDS: Dict[str, Callable[[PocketItem, str], Any]] = {
+    'item_id': lambda link, pocket_url: link.item_id,
+    'title': lambda link, pocket_url: link.title,
+    'url': lambda link, pocket_url: link.url,
+    'pocket_url': lambda link, pocket_url: pocket_url,
+    'domain': lambda link, pocket_url: link.domain,
+    'excerpt': lambda link, pocket_url: link.excerpt,
+    'time_added': lambda link, pocket_url: link.time_added,
+    'time_to_read': lambda link, pocket_url: link.time_to_read,
+    'word_count': lambda link, pocket_url: link.word_count,
+    'favorite': lambda link, pocket_url: link.favorite,
+}
+SEARCH_FIELDS_DEFAULT = 'item_id,title,url,pocket_url,time_added'
+
+# Fields of a report row: its section (summary, age, or domain), what is counted, and the count
+REPORT_FIELDS = ('section', 'name', 'count')
+REPORT_FIELDS_DEFAULT = ','.join(REPORT_FIELDS)
+
+
+class RecordWriter:  # pylint: disable=too-few-public-methods
+    """Write records as JSON Lines, CSV, or TSV, with a header row for CSV and TSV.
+
+    Each record is passed to the renderer as soon as it is written, so no more than a chunk of output is held in
+    memory.
+    """
+
+    def __init__(self, renderer: PocketRenderer, output: str, fields: Sequence[str]):
+        if output not in OUTPUT_FORMATS[1:]:
+            raise ValueError(f'Unknown output format: {output}')
+
+        self.renderer = renderer
+        self.output = output
+        self.fields = fields
+        self.csv_writer = None
+
+        if output in ('csv', 'tsv'):
+            self.csv_writer = csv.writer(renderer, dialect='excel-tab' if output == 'tsv' else 'excel',
+                                         lineterminator='\n')
+            self.csv_writer.writerow(fields)
+
+    def write(self, values: Iterable[Any]):
+        """Write a record, with a value for each field."""
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(values)
+        else:
+            self.renderer.write(json.dumps(dict(zip(self.fields, values)), ensure_ascii=False) + '\n')
+
+
+def parse_fields(fields: str) -> list:
+    """Split a comma-separated list of fields, dropping blanks and repeats."""
+    return list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
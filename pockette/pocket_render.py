@@ -0,0 +1,86 @@
+"""Write output to the terminal in buffered chunks."""
+
+import os
+import sys
+from types import TracebackType
+from typing import List, Optional, Type
+
+import click
+
+
+class PocketRenderer:
+    """Collect output and write it in large chunks, instead of making one write per line.
+
+    Use it as a context manager so that the last chunk is written on exit. When the reader goes away early, e.g.
+    output piped into `head`, the rest of the output is dropped and the command exits without a traceback.
+    """
+
+    chunk_size = 64 * 1024  # Characters
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.size = 0
+
+    def __enter__(self) -> 'PocketRenderer':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]):
+        if exc_type is BrokenPipeError:
+            self._close_stdout()
+
+        self.flush()
+
+    def echo(self, line: str = ''):
+        """Add a line of output."""
+        self.write(line + '\n')
+
+    def write(self, text: str):
+        """Add text to the output, writing the buffered text once it fills a chunk."""
+        self.chunks.append(text)
+        self.size += len(text)
+
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered text."""
+        if not self.chunks:
+            return
+
+        output = ''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+
+        try:
+            click.echo(output, nl=False)
+        except BrokenPipeError:
+            self._close_stdout()
+
+    @staticmethod
+    def _close_stdout():
+        """Point stdout at the null device, so that the interpreter doesn't fail to flush it on exit, and exit."""
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+        except (OSError, ValueError):
+            pass
+
+        sys.exit(1)
+
+
+def truncate(text: str, width: int, placeholder: str = '...') -> str:
+    """Shorten text to fit a width, ending at a word boundary with a placeholder.
+
+    The last word that is cut, and the one before it if the placeholder would not fit, are dropped.
+    """
+    if len(text) <= width:
+        return text
+
+    text = text[:width]
+    end = max(text.rfind(' '), 0)
+
+    if end > width - len(placeholder):
+        end = max(text.rfind(' ', 0, end), 0)
+
+    return text[:end] + placeholder
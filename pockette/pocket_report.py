@@ -0,0 +1,133 @@
+"""Report metrics computed in a single pass over Pocket items."""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pockette.pocket_columns import PocketColumns
+from pockette.pocket_item import PocketItem
+
+
+class ReportMetric(ABC):
+    """A report statistic that is updated one item at a time.
+
+    To add a metric, subclass this and implement `add` and `get_result`. Metrics can also implement `add_columns`
+    to update from NumPy columns at once instead.
+    """
+
+    @abstractmethod
+    def add(self, item: PocketItem):
+        """Update the metric with an item."""
+
+    def add_columns(self, columns: PocketColumns, indices: List[int]) -> bool:  # pylint: disable=unused-argument
+        """Update the metric from the columns. Returns `False` if the metric needs each item instead."""
+        return False
+
+    @abstractmethod
+    def get_result(self) -> Any:
+        """Get the value of the metric."""
+
+
+class LinkCount(ReportMetric):
+    """Count the items."""
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, item: PocketItem):
+        self.count += 1
+
+    def add_columns(self, columns: PocketColumns, indices: List[int]) -> bool:
+        self.count += len(indices)
+        return True
+
+    def get_result(self) -> int:
+        return self.count
+
+
+class DomainCounts(ReportMetric):
+    """Count the items from each domain, in order of first appearance."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def add(self, item: PocketItem):
+        self.counts[item.domain] = self.counts.get(item.domain, 0) + 1
+
+    def add_columns(self, columns: PocketColumns, indices: List[int]) -> bool:
+        for domain, count in columns.count_domains(indices).items():
+            self.counts[domain] = self.counts.get(domain, 0) + count
+
+        return True
+
+    def get_result(self) -> Dict[str, int]:
+        return self.counts
+
+
+class AgeCounts(ReportMetric):
+    """Count the items added before each cutoff time.
+
+    Each item is counted once, in the bucket between the two cutoffs around the time it was added, and the buckets
+    are summed when the result is read.
+    """
+
+    def __init__(self, cutoffs: Dict[str, float]):
+        self.cutoffs = cutoffs
+        self.labels = sorted(cutoffs, key=cutoffs.__getitem__)
+        self.times = [cutoffs[label] for label in self.labels]
+
+        # bucket_counts[i] counts the items added before all cutoffs from i onward
+        self.bucket_counts = [0] * (len(self.labels) + 1)
+
+    def add(self, item: PocketItem):
+        self.bucket_counts[bisect_right(self.times, item.time_added)] += 1
+
+    def add_columns(self, columns: PocketColumns, indices: List[int]) -> bool:
+        counts = columns.count_older_than(indices, self.cutoffs)
+        older_count = 0
+
+        for i, label in enumerate(self.labels):
+            self.bucket_counts[i] += counts[label] - older_count
+            older_count = counts[label]
+
+        self.bucket_counts[-1] += len(indices) - older_count
+
+        return True
+
+    def get_result(self) -> Dict[str, int]:
+        counts = {}
+        older_count = 0
+
+        for i, label in enumerate(self.labels):
+            older_count += self.bucket_counts[i]
+            counts[label] = older_count
+
+        return {label: counts[label] for label in self.cutoffs}
+
+
+class ReportAggregator:  # pylint: disable=too-few-public-methods
+    """Compute several report metrics with one pass over the items."""
+
+    def __init__(self, metrics: Dict[str, ReportMetric]):
+        self.metrics = metrics
+
+    def aggregate(self, items: Sequence[PocketItem], indices: Iterable[int],
+                  columns: Optional[PocketColumns] = None) -> Dict[str, Any]:
+        """Update every metric with the items at the positions, and get their results.
+
+        With columns, metrics that support them are computed with NumPy, and only the remaining metrics loop over
+        the items.
+        """
+        metrics = list(self.metrics.values())
+
+        if columns is not None:
+            indices = list(indices)
+            metrics = [metric for metric in metrics if not metric.add_columns(columns, indices)]
+
+        if metrics:
+            for i in indices:
+                item = items[i]
+                for metric in metrics:
+                    metric.add(item)
+
+        return {name: metric.get_result() for name, metric in self.metrics.items()}
@@ -0,0 +1,98 @@
+"""Draw random samples from a stream of items."""
+
+import heapq
+from itertools import islice
+import math
+import random
+import sys
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def sample(items: Iterable[T], count: Optional[int], rng: random.Random,
+           weight: Optional[Callable[[T], float]] = None) -> Tuple[List[T], int]:
+    """Draw `count` items at random, in random order, and get the number of items in total.
+
+    Items are drawn in one pass while keeping only `count` items, so every item doesn't need to be shuffled.
+    Without `count`, every item is shuffled. With `weight`, items are drawn with probability proportional to their
+    weight, and items with a weight of 0 are never drawn.
+    """
+    if weight is not None:
+        return _sample_weighted(items, count, rng, weight)
+
+    if count is None:
+        population = list(items)
+        rng.shuffle(population)
+        return population, len(population)
+
+    return _sample_uniform(items, count, rng)
+
+
+def _get_random(rng: random.Random) -> float:
+    """Get a random number between 0 and 1, exclusive, so that its logarithm is finite and negative."""
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()  # pragma: no cover
+
+    return value
+
+
+def _sample_uniform(items: Iterable[T], count: int, rng: random.Random) -> Tuple[List[T], int]:
+    """Draw items with reservoir sampling.
+
+    Uses Li's Algorithm L, which skips ahead between replacements instead of drawing a random number for every
+    item.
+    """
+    iterator = iter(items)
+    reservoir = list(islice(iterator, count))
+    total = len(reservoir)
+
+    if 0 < count == total:
+        threshold = math.exp(math.log(_get_random(rng)) / count)
+
+        while True:
+            skip = math.log(_get_random(rng)) / math.log1p(-threshold)
+            skip_count = int(min(skip, sys.maxsize))
+            skipped_count = sum(1 for _ in islice(iterator, skip_count))
+            total += skipped_count
+            if skipped_count < skip_count:
+                break
+
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+
+            total += 1
+            reservoir[rng.randrange(count)] = item
+            threshold *= math.exp(math.log(_get_random(rng)) / count)
+    else:
+        total += sum(1 for _ in iterator)
+
+    rng.shuffle(reservoir)
+    return reservoir, total
+
+
+def _sample_weighted(items: Iterable[T], count: Optional[int], rng: random.Random,
+                     weight: Callable[[T], float]) -> Tuple[List[T], int]:
+    """Draw items with weighted reservoir sampling.
+
+    Uses Efraimidis and Spirakis' A-Res: each item gets the random key `log(u) / weight`, and the items with the
+    largest keys are kept. Sorting by key puts them in the order they would be drawn one at a time.
+    """
+    heap: List[Tuple[float, int, T]] = []
+    total = 0
+
+    for total, item in enumerate(items, 1):
+        item_weight = weight(item)
+        if item_weight <= 0:
+            continue
+
+        key = (math.log(_get_random(rng)) / item_weight, total, item)
+        if count is None or len(heap) < count:
+            heapq.heappush(heap, key)
+        elif count > 0 and key > heap[0]:
+            heapq.heapreplace(heap, key)
+
+    return [item for _, _, item in sorted(heap, reverse=True)], total
@@ -0,0 +1,47 @@
+"""Select the first items of a sort order without sorting every item, and pages of items."""
+
+import heapq
+from itertools import islice
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def select_smallest(items: Sequence[T], key: Callable[[T], Any], count: Optional[int] = None) -> List[T]:
+    """Get the first `count` items of `sorted(items, key=key)`.
+
+    When fewer items are needed than there are, a heap of `count` items is kept instead of sorting them all, in
+    O(n log count). Without `count`, every item is sorted.
+    """
+    if count is None or count >= len(items):
+        return sorted(items, key=key)
+
+    return heapq.nsmallest(count, items, key=key)
+
+
+def select_largest(items: Sequence[T], key: Callable[[T], Any], count: Optional[int] = None) -> List[T]:
+    """Get the first `count` items of `list(reversed(sorted(items, key=key)))`.
+
+    Like reversing a stable sort, items with equal keys are in reverse order.
+    """
+    if count is None or count >= len(items):
+        return list(reversed(sorted(items, key=key)))
+
+    return heapq.nlargest(count, reversed(items), key=key)
+
+
+def select_page(items: Iterable[T], offset: int = 0, count: Optional[int] = None) -> Tuple[List[T], int]:
+    """Get `count` items after the first `offset` items, and the number of items in total.
+
+    Items are pulled one at a time until the page is filled, and the items after it are counted without being kept,
+    since the total is needed too. Sequences, like lists and date ranges of the time index, are sliced instead, and
+    only the page is read.
+    """
+    if isinstance(items, Sequence):
+        return list(items[offset:None if count is None else offset + count]), len(items)
+
+    iterator = iter(items)
+    skipped_count = sum(1 for _ in islice(iterator, offset))
+    page = list(islice(iterator, count))
+
+    return page, skipped_count + len(page) + sum(1 for _ in iterator)
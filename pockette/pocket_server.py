@@ -0,0 +1,138 @@
+"""Serve Pocket data from a long-running process over a Unix domain socket."""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict
+
+import click
+
+from pockette.pocket_daemon import METHODS, SHARED_OPTIONS, decode_value
+from pockette.pocket_handler import PocketSyncError
+
+
+class PocketDaemon(socketserver.UnixStreamServer):
+    """Keep a Pocket data handler in memory and answer queries from thin clients.
+
+    Each request is one line of JSON with a handler method, its arguments, and the client's local snapshot
+    options. The response is one line of JSON with what the method printed, what it returned, and its exit code.
+    Requests are answered one at a time, while a background thread reloads the handler every `refresh_interval`
+    seconds, syncing the local snapshot when it is stale. Queries keep using the previous handler until the new one
+    is ready.
+
+    `create_handler(sync_now)` is called with `sync_now=True` only for the first handler, so options like --refresh
+    apply once. Later handlers raise `PocketSyncError` instead of printing errors into replies.
+    """
+
+    poll_interval = 0.5
+
+    def __init__(self, socket_path: str, create_handler: Callable[[bool], Any], options: Dict[str, Any],
+                 refresh_interval: float):
+        self.socket_path = socket_path
+        self.create_handler = create_handler
+        self.options = options
+        self.refresh_interval = refresh_interval
+
+        self._remove_stale_socket()
+        self.handler = create_handler(True)
+        self.request_count = 0
+        self.stopped = threading.Event()
+
+        super().__init__(socket_path, PocketDaemonRequestHandler)
+
+    def _remove_stale_socket(self):
+        """Remove a socket left behind by a daemon that is no longer running."""
+        if not os.path.exists(self.socket_path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_socket:
+            try:
+                client_socket.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)
+                return
+
+        raise OSError(f'A daemon is already running on {self.socket_path}.')
+
+    def serve(self):
+        """Answer queries and refresh the handler in the background until stopped."""
+        refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        refresh_thread.start()
+
+        try:
+            self.serve_forever(poll_interval=self.poll_interval)
+        finally:
+            self.stopped.set()
+            self.server_close()
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.remove(self.socket_path)
+
+    def refresh(self):
+        """Replace the handler with one loaded from the local snapshot, syncing it when it is stale."""
+        try:
+            self.handler = self.create_handler(False)
+        except PocketSyncError as error:
+            # Replies capture stdout, so only warn on stderr, and keep the data in memory
+            click.echo(f'WARNING: Could not reload Pocket data. {error}', err=True)
+        except SystemExit:
+            # The handler already printed why, so keep the data in memory
+            pass
+
+    def _refresh_loop(self):
+        """Refresh the handler until the daemon is stopped."""
+        while not self.stopped.wait(self.refresh_interval):
+            self.refresh()
+
+    def answer(self, request: dict) -> dict:
+        """Answer a request from a thin client."""
+        self.request_count += 1
+
+        method = request.get('method')
+        options = request.get('options') or {}
+        if method not in METHODS or any(options.get(name) != self.options.get(name) for name in SHARED_OPTIONS):
+            return {'status': 'unavailable'}
+
+        output = io.StringIO()
+        exit_code = 0
+        result = None
+        handler = self.handler
+
+        with contextlib.redirect_stdout(output):
+            try:
+                result = getattr(handler, method)(**request.get('kwargs', {}))
+            except SystemExit as error:
+                exit_code = error.code if isinstance(error.code, int) else 1
+
+        return {'status': 'ok', 'output': output.getvalue(), 'exit_code': exit_code, 'result': result}
+
+
+class PocketDaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Read one request from a thin client and write the response."""
+
+    server: PocketDaemon
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # The client only checked that the daemon is running
+            return
+
+        try:
+            request = json.loads(line, object_hook=decode_value)
+        except ValueError:
+            response = {'status': 'error'}
+        else:
+            response = self.server.answer(request)
+
+        try:
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+        except OSError:
+            # The client stopped waiting
+            pass
@@ -1,17 +1,19 @@
 """Set up Pocket CLI."""
 
-import json
 import os
 import sys
 
 import click
-import requests
+
+from pockette import CONNECT_TIMEOUT_DEFAULT, RETRIES_DEFAULT, TIMEOUT_DEFAULT
+from pockette.pocket_client import PocketApiError, PocketClient
 
 
 class PocketSetupHandler:  # pylint: disable=too-few-public-methods
     """Set up Pocket CLI."""
 
-    def __init__(self):
+    def __init__(self, timeout: float = TIMEOUT_DEFAULT, connect_timeout: float = CONNECT_TIMEOUT_DEFAULT,
+                 retries: int = RETRIES_DEFAULT):
         """Set up Pocket CLI."""
         # Check if already set up
         if os.getenv('POCKET_CONSUMER_KEY') and os.getenv('POCKET_ACCESS_TOKEN'):
@@ -32,15 +34,18 @@ class PocketSetupHandler:  # pylint: disable=too-few-public-methods
 
         consumer_key = click.prompt("2. Enter your application's consumer key", type=str)
 
+        # Both requests reuse the same connection
+        client = PocketClient(consumer_key, timeout=timeout, connect_timeout=connect_timeout, retries=retries)
+
         # Get request token
-        request_token = self._get_request_token(consumer_key)
+        request_token = self._get_request_token(client)
 
         # Authorize the application in a browser window
-        url = f'https://getpocket.com/auth/authorize?request_token={request_token}&redirect_uri=https://google.com'
+        url = client.get_authorize_url(request_token)
         click.prompt(f'3. Authorize your application: {url}. Enter any key when finished')
 
         # Convert request token to an access token
-        access_token = self._get_access_token(consumer_key, request_token)
+        access_token = self._get_access_token(client, request_token)
 
         # Save consumer_key and access_token to environment variables
         click.echo(
@@ -53,43 +58,27 @@ class PocketSetupHandler:  # pylint: disable=too-few-public-methods
         )
 
     @staticmethod
-    def _get_request_token(consumer_key: str) -> str:
+    def _get_request_token(client: PocketClient) -> str:
         """Get an OAuth request token."""
-        headers = {"Content-Type": "application/json; charset=UTF8", "X-Accept": "application/json"}
-        data = {"consumer_key": consumer_key, "redirect_uri": "https://google.com"}
-
         try:
-            response = requests.post(
-                'https://getpocket.com/v3/oauth/request', headers=headers, json=data, timeout=5
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
-            click.echo(f'HTTP error: {response.text}')
-            if response.status_code == 403:
+            return client.get_request_token()
+        except PocketApiError as error:
+            click.echo(f'HTTP error: {error}')
+            if error.status_code == 403:
                 click.echo(
                     'Verify that you have the correct consumer key and that you set the "Retrive" permission.'
                 )
 
             sys.exit(1)
 
-        return json.loads(response.text)['code']
-
     @staticmethod
-    def _get_access_token(consumer_key: str, request_token: str) -> str:
+    def _get_access_token(client: PocketClient, request_token: str) -> str:
         """Get an OAuth access token."""
-        headers = {"Content-Type": "application/json; charset=UTF8", "X-Accept": "application/json"}
-        data = {'consumer_key': consumer_key, 'code': request_token}
-
         try:
-            response = requests.post(
-                'https://getpocket.com/v3/oauth/authorize', headers=headers, json=data, timeout=5
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
-            click.echo(f'HTTP error: {response.text}')
-            if response.status_code == 403:
+            return client.get_access_token(request_token)
+        except PocketApiError as error:
+            click.echo(f'HTTP error: {error}')
+            if error.status_code == 403:
                 click.echo('Did you authorize the application?')
 
             sys.exit(1)
-
-        return json.loads(response.text)['access_token']
@@ -0,0 +1,377 @@
+"""SQLite store for Pocket items."""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pockette import CACHE_HARD_TTL_DEFAULT, CACHE_TTL_DEFAULT
+from pockette.pocket_domain import get_site
+from pockette.pocket_index import KeywordIndex
+from pockette.pocket_item import PocketItem
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    position INTEGER PRIMARY KEY,
+    item_id TEXT NOT NULL UNIQUE,
+    status INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    excerpt TEXT NOT NULL,
+    time_added INTEGER NOT NULL,
+    time_to_read INTEGER,
+    word_count INTEGER NOT NULL,
+    favorite INTEGER NOT NULL,
+    domain TEXT NOT NULL,
+    site TEXT NOT NULL,
+    search_text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS items_status_time_added ON items (status, time_added);
+CREATE INDEX IF NOT EXISTS items_site ON items (site);
+CREATE INDEX IF NOT EXISTS items_domain ON items (domain);
+CREATE INDEX IF NOT EXISTS items_time_to_read ON items (time_to_read);
+CREATE INDEX IF NOT EXISTS items_favorite ON items (favorite);
+'''
+
+# Words are split like the keyword index: letters, digits, and underscores, without folding accents
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5 (
+    search_text, tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+'''
+
+ORDER_CLAUSES = {
+    'newest': 'time_added DESC, position DESC',
+    'oldest': 'time_added, position',
+    'site': 'site, position',
+    'site_reverse': 'site DESC, position DESC',
+}
+
+
+class PocketStoreError(Exception):
+    """The SQLite store can't be read, written, or queried."""
+
+
+class PocketStore:
+    """Store Pocket items in a SQLite database, so that filters, ordering, and pages run as indexed queries.
+
+    Unread and archived items are kept, and queries only return unread items (status 0). The searchable text is
+    stored lowercase, like `PocketItem.search_text`, for substring matching, and in an FTS5 table for whole-word
+    matching. Positions keep the order that items were first downloaded in, like the JSON snapshot.
+
+    SQLite connections can only be used by the thread that opened them, so each thread opens its own. A store
+    built on one thread, like the daemon's refresh thread, can then be queried from another.
+    """
+
+    version = 1
+
+    def __init__(self, path: str, ttl: int = CACHE_TTL_DEFAULT, hard_ttl: int = CACHE_HARD_TTL_DEFAULT):
+        self.path = path
+        self.ttl = ttl
+        self.hard_ttl = hard_ttl
+        self._local = threading.local()
+
+    @staticmethod
+    def _get_current_time() -> float:  # pragma: no cover
+        """For easier test mocking."""
+        return time.time()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Open the database for this thread, creating its tables if needed."""
+        connection: Optional[sqlite3.Connection] = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path) or '.'
+            try:
+                os.makedirs(directory, exist_ok=True)
+                connection = sqlite3.connect(self.path)
+                connection.executescript(SCHEMA)
+                try:
+                    connection.executescript(FTS_SCHEMA)
+                except sqlite3.OperationalError:
+                    pass
+            except (OSError, sqlite3.Error) as error:
+                raise PocketStoreError(f'Could not open {self.path}: {error}') from error
+
+            self._local.connection = connection
+
+        return connection
+
+    def close(self):
+        """Close the database for this thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def has_fts(self) -> bool:
+        """Determine if SQLite supports FTS5 for whole-word matching."""
+        row = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone()
+        return row is not None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Get a value saved with the items."""
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def exists(self) -> bool:
+        """Determine if the store has been synced."""
+        return os.path.exists(self.path) and self.get_meta('version') == str(self.version)
+
+    def get_age(self) -> Optional[float]:
+        """Get the time since the last sync in seconds, or `None` if the store hasn't been synced."""
+        if not self.exists():
+            return None
+
+        synced_at = float(self.get_meta('synced_at') or 0)
+        return max(self._get_current_time() - synced_at, 0.0)
+
+    def is_fresh(self) -> bool:
+        """Determine if the store was synced within the TTL."""
+        age = self.get_age()
+        return age is not None and age < self.ttl
+
+    def is_usable(self) -> bool:
+        """Determine if the store was synced within the TTL or the hard TTL."""
+        age = self.get_age()
+        return age is not None and age < max(self.ttl, self.hard_ttl)
+
+    def get_since(self) -> Optional[int]:
+        """Get the time of the last sync according to Pocket, for downloading only changed items."""
+        since = self.get_meta('since') if self.exists() else None
+        return int(since) if since else None
+
+    def save(self, changes: dict, replace: bool = False):
+        """Apply downloaded changes in a single transaction.
+
+        Unread (status 0) and archived (status 1) items are added or updated, and deleted (status 2) items are
+        removed. With `replace`, every stored item is removed first.
+        """
+        has_fts = self.has_fts()
+
+        try:
+            with self.connection as connection:
+                if replace:
+                    connection.execute('DELETE FROM items')
+                    if has_fts:
+                        connection.execute('DELETE FROM items_fts')
+
+                # Pocket returns an empty array instead of an object when nothing changed
+                for item_id, link in (changes.get('list') or {}).items():
+                    self._save_link(connection, str(item_id), link, has_fts=has_fts)
+
+                since = changes.get('since') or (None if replace else self.get_meta('since'))
+                connection.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+                    ('version', str(self.version)),
+                    ('since', str(since or '')),
+                    ('synced_at', str(self._get_current_time())),
+                ])
+        except sqlite3.Error as error:
+            raise PocketStoreError(f'Could not save Pocket data to {self.path}: {error}') from error
+
+    @staticmethod
+    def _save_link(connection: sqlite3.Connection, item_id: str, link: dict, has_fts: bool = True):
+        """Add, update, or remove a downloaded item."""
+        status = int(link.get('status', 0) or 0)
+        row = connection.execute('SELECT position FROM items WHERE item_id = ?', (item_id,)).fetchone()
+
+        if status not in (0, 1):
+            if row is not None:
+                connection.execute('DELETE FROM items WHERE position = ?', row)
+                if has_fts:
+                    connection.execute('DELETE FROM items_fts WHERE rowid = ?', row)
+            return
+
+        item = PocketItem.from_dict(dict(link, item_id=item_id))
+        values = (
+            status, item.title, item.url, item.excerpt, item.time_added, item.time_to_read, item.word_count,
+            int(item.favorite), item.domain, get_site(item.domain), item.search_text,
+        )
+
+        # Updated items keep their position, like updating a key in the JSON snapshot
+        if row is None:
+            position = connection.execute(
+                'INSERT INTO items (item_id, status, title, url, excerpt, time_added, time_to_read, word_count, '
+                'favorite, domain, site, search_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (item_id,) + values
+            ).lastrowid
+        else:
+            position = row[0]
+            connection.execute(
+                'UPDATE items SET status = ?, title = ?, url = ?, excerpt = ?, time_added = ?, time_to_read = ?, '
+                'word_count = ?, favorite = ?, domain = ?, site = ?, search_text = ? WHERE position = ?',
+                values + (position,)
+            )
+
+        if has_fts:
+            connection.execute('DELETE FROM items_fts WHERE rowid = ?', (position,))
+            connection.execute(
+                'INSERT INTO items_fts (rowid, search_text) VALUES (?, ?)', (position, item.search_text)
+            )
+
+    # pylint: disable=too-many-arguments
+    def get_where(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                  max_time_to_read: Optional[int] = None, min_time_to_read: Optional[int] = None,
+                  favorite: bool = False, include_keywords: Optional[str] = None,
+                  exclude_keywords: Optional[str] = None, match: str = 'substring') -> Tuple[str, list]:
+        """Get the WHERE clause and parameters for the filters.
+
+        The filters match the in-memory filters: times are exclusive, unknown reading times pass the reading time
+        filters, and keywords are matched as substrings or, with `match='token'`, as whole words.
+        """
+        clauses = ['status = 0']
+        parameters: list = []
+
+        if start_time is not None:
+            clauses.append('time_added > ?')
+            parameters.append(start_time)
+
+        if end_time is not None:
+            clauses.append('time_added < ?')
+            parameters.append(end_time)
+
+        if max_time_to_read is not None:
+            clauses.append('(time_to_read IS NULL OR time_to_read <= ?)')
+            parameters.append(max_time_to_read)
+
+        if min_time_to_read is not None:
+            clauses.append('(time_to_read IS NULL OR time_to_read >= ?)')
+            parameters.append(min_time_to_read)
+
+        if favorite:
+            clauses.append('favorite = 1')
+
+        for keywords, operator in ((include_keywords, ''), (exclude_keywords, 'NOT ')):
+            if not keywords:
+                continue
+
+            clause, keyword_parameters = self._get_keywords_clause(keywords, match=match)
+            if clause is not None:
+                clauses.append(f'{operator}{clause}')
+                parameters.extend(keyword_parameters)
+            elif operator:
+                # Like an empty substring, an empty keyword matches everything, so excluding it leaves nothing
+                clauses.append('0')
+
+        return ' AND '.join(clauses), parameters
+
+    def _get_keywords_clause(self, keywords: str, match: str = 'substring') -> Tuple[Optional[str], list]:
+        """Get a clause that matches any of the comma-separated keywords, or `None` if they match everything."""
+        if match == 'token':
+            if not self.has_fts():
+                raise PocketStoreError('SQLite was built without FTS5. Use --match substring instead.')
+
+            queries = []
+            for keyword in keywords.split(','):
+                tokens = KeywordIndex.tokenize(keyword)
+                if not tokens:
+                    return None, []
+
+                # Quoted tokens are matched as plain words, not FTS5 query syntax
+                quoted_tokens = ['"' + token.replace('"', '""') + '"' for token in tokens]
+                queries.append('(' + ' AND '.join(quoted_tokens) + ')')
+
+            return 'position IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)', [' OR '.join(queries)]
+
+        substrings = list(dict.fromkeys(keyword.strip() for keyword in keywords.lower().split(',')))
+        if '' in substrings:
+            return None, []
+
+        return '(' + ' OR '.join(['instr(search_text, ?) > 0'] * len(substrings)) + ')', substrings
+
+    def search(self, where: Tuple[str, list], order: str = 'newest', offset: int = 0,
+               count: Optional[int] = None) -> Tuple[List[PocketItem], int]:
+        """Get a page of the items that match the filters, and the number of matching items."""
+        clause, parameters = where
+
+        try:
+            total = self.connection.execute(f'SELECT COUNT(*) FROM items WHERE {clause}', parameters).fetchone()[0]
+            rows = self._select_items(where, order=order, offset=offset, count=count).fetchall()
+        except sqlite3.Error as error:
+            raise PocketStoreError(f'Could not search {self.path}: {error}') from error
+
+        return [self._get_item(row) for row in rows], total
+
+    def iter_search(self, where: Tuple[str, list], order: str = 'newest', offset: int = 0,
+                    count: Optional[int] = None) -> Iterator[PocketItem]:
+        """Get a page of the items that match the filters one at a time, without counting the matching items."""
+        try:
+            cursor = self._select_items(where, order=order, offset=offset, count=count)
+        except sqlite3.Error as error:
+            raise PocketStoreError(f'Could not search {self.path}: {error}') from error
+
+        return map(self._get_item, cursor)
+
+    def _select_items(self, where: Tuple[str, list], order: str = 'newest', offset: int = 0,
+                      count: Optional[int] = None) -> sqlite3.Cursor:
+        """Select a page of the items that match the filters."""
+        clause, parameters = where
+        return self.connection.execute(
+            'SELECT item_id, title, url, excerpt, time_added, time_to_read, word_count, favorite FROM items '
+            f'WHERE {clause} ORDER BY {ORDER_CLAUSES[order]} LIMIT ? OFFSET ?',
+            parameters + [-1 if count is None else count, offset]
+        )
+
+    def get_items(self, positions: Iterable[int]) -> List[PocketItem]:
+        """Get items by position, in the same order."""
+        positions = list(positions)
+        items = {}
+
+        for start in range(0, len(positions), 500):
+            chunk = positions[start:start + 500]
+            for row in self.connection.execute(
+                'SELECT item_id, title, url, excerpt, time_added, time_to_read, word_count, favorite, position '
+                f'FROM items WHERE position IN ({", ".join("?" * len(chunk))})', chunk
+            ):
+                items[row[8]] = self._get_item(row)
+
+        return [items[position] for position in positions]
+
+    def get_sample_rows(self, where: Tuple[str, list]) -> List[Tuple[int, int, str]]:
+        """Get the position, time added, and site of the matching items, in their original order."""
+        clause, parameters = where
+        return self.connection.execute(
+            f'SELECT position, time_added, site FROM items WHERE {clause} ORDER BY position', parameters
+        ).fetchall()
+
+    def get_report(self, where: Tuple[str, list], cutoffs: Dict[str, float]) -> dict:
+        """Count the matching items, the items from each domain, and the items added before each cutoff time.
+
+        Domains are in order of first appearance, like the in-memory report.
+        """
+        clause, parameters = where
+        labels = list(cutoffs)
+        age_columns = ', '.join(['COALESCE(SUM(time_added < ?), 0)'] * len(labels))
+
+        try:
+            row = self.connection.execute(
+                f'SELECT COUNT(*), {age_columns} FROM items WHERE {clause}',
+                [cutoffs[label] for label in labels] + parameters
+            ).fetchone()
+            domain_rows = self.connection.execute(
+                f'SELECT domain, COUNT(*) FROM items WHERE {clause} GROUP BY domain ORDER BY MIN(position)',
+                parameters
+            ).fetchall()
+        except sqlite3.Error as error:
+            raise PocketStoreError(f'Could not search {self.path}: {error}') from error
+
+        return {
+            'total': row[0],
+            'domains': dict(domain_rows),
+            'ages': dict(zip(labels, row[1:])),
+        }
+
+    @staticmethod
+    def _get_item(row: tuple) -> PocketItem:
+        """Create an item from a row."""
+        return PocketItem(
+            item_id=row[0], title=row[1], url=row[2], excerpt=row[3], time_added=row[4], time_to_read=row[5],
+            word_count=row[6], favorite=bool(row[7])
+        )
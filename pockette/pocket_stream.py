@@ -0,0 +1,163 @@
+"""Streaming parser for Pocket API responses."""
+
+import codecs
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Item fields used when filtering, sorting, printing, and syncing. Everything else (images, authors, domain
+# metadata, etc.) is dropped as soon as each item is parsed.
+ITEM_FIELDS = (
+    'item_id', 'status', 'favorite', 'time_added', 'resolved_title', 'resolved_url', 'excerpt', 'word_count',
+    'time_to_read',
+)
+
+WHITESPACE = ' \t\n\r'
+
+
+class PocketStreamParser:  # pylint: disable=too-few-public-methods
+    """Parse a `/v3/get` response from an iterable of byte chunks.
+
+    Only one chunk and one item are held in memory at a time, instead of the full response text and the full parsed
+    response. Items in the `list` object are pruned to `fields` as they are parsed.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], fields: Optional[Iterable[str]] = ITEM_FIELDS):
+        self.chunks = iter(chunks)
+        self.fields = tuple(fields) if fields is not None else None
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+        self.buffer = ''
+        self.position = 0
+        self.is_exhausted = False
+
+    def parse(self) -> dict:
+        """Parse the response, returning its top-level values with a pruned `list` object."""
+        pocket_data: Dict[str, Any] = {}
+
+        self._expect('{')
+        if self._peek() == '}':
+            self.position += 1
+            return pocket_data
+
+        while True:
+            key = self._read_value()
+            self._expect(':')
+
+            if key == 'list' and self._peek() == '{':
+                pocket_data[key] = dict(self._iter_list_items())
+            else:
+                pocket_data[key] = self._read_value()
+
+            if self._read_separator('}'):
+                break
+
+        self._skip_whitespace()
+        if self.position < len(self.buffer):
+            self._raise_error('Extra data')
+
+        return pocket_data
+
+    def _iter_list_items(self) -> Iterator[Tuple[str, dict]]:
+        """Iterate over the items in the `list` object, pruning each one."""
+        self._expect('{')
+        if self._peek() == '}':
+            self.position += 1
+            return
+
+        while True:
+            item_id = self._read_value()
+            self._expect(':')
+            item = self._read_value()
+
+            if self.fields is not None and isinstance(item, dict):
+                item = {field: item[field] for field in self.fields if field in item}
+
+            yield item_id, item
+
+            if self._read_separator('}'):
+                break
+
+    def _read_value(self) -> Any:
+        """Read the next complete JSON value."""
+        self._skip_whitespace()
+        return self._decode(lambda: self.decoder.raw_decode(self.buffer, self.position))
+
+    def _decode(self, decode: Callable[[], Tuple[Any, int]]) -> Any:
+        """Decode a value, reading more chunks until the value is complete."""
+        while True:
+            try:
+                value, end = decode()
+            except json.JSONDecodeError:
+                if self.is_exhausted:
+                    raise
+            else:
+                # A value that runs to the end of the buffer, like a number, may continue in the next chunk
+                if end < len(self.buffer) or self.is_exhausted:
+                    self.position = end
+                    return value
+
+            self._read_chunk()
+
+    def _read_separator(self, closing: str) -> bool:
+        """Read a comma or the closing bracket. Return `True` at the closing bracket."""
+        character = self._peek()
+        self.position += 1
+
+        if character == closing:
+            return True
+
+        if character != ',':
+            self._raise_error(f"Expecting ',' delimiter or '{closing}'")
+
+        return False
+
+    def _expect(self, expected: str):
+        """Read an expected character."""
+        if self._peek() != expected:
+            self._raise_error(f"Expecting '{expected}'")
+
+        self.position += 1
+
+    def _peek(self) -> str:
+        """Get the next non-whitespace character without reading it."""
+        self._skip_whitespace()
+        return self.buffer[self.position] if self.position < len(self.buffer) else ''
+
+    def _skip_whitespace(self):
+        """Skip whitespace, reading more chunks as needed."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer) or self.is_exhausted:
+                return
+
+            self._read_chunk()
+
+    def _read_chunk(self):
+        """Add the next chunk to the buffer, dropping the text that has already been parsed."""
+        if self.is_exhausted:
+            return
+
+        if self.position:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.buffer += self.text_decoder.decode(b'', final=True)
+            self.is_exhausted = True
+            return
+
+        self.buffer += self.text_decoder.decode(chunk)
+
+    def _raise_error(self, message: str):
+        """Raise a decode error at the current position."""
+        raise json.JSONDecodeError(message, self.buffer, self.position)
+
+
+def parse_pocket_response(chunks: Iterable[bytes], fields: Optional[Iterable[str]] = ITEM_FIELDS) -> dict:
+    """Parse a `/v3/get` response from an iterable of byte chunks, keeping only the item `fields`."""
+    return PocketStreamParser(chunks, fields=fields).parse()
@@ -0,0 +1,121 @@
+"""Open links in browser tabs."""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+from types import TracebackType
+from typing import List, Optional, Set, Tuple, Type
+import webbrowser
+
+from pockette import TABS_MAX_DEFAULT, TAB_BATCH_DEFAULT, TAB_RATE_DEFAULT, TAB_WORKERS_DEFAULT
+
+
+class TabScheduler:  # pylint: disable=too-many-instance-attributes
+    """Open URLs in new browser tabs through a small pool of workers, at a limited rate.
+
+    URLs are sent to the workers in batches of at least `batch_size` tabs, and a batch waits until the rate allows
+    that many more tabs. URLs scheduled together are opened in order by the same worker. Each URL is only opened
+    once, and URLs after the first `max_tabs` are refused. A rate or a maximum of 0 is unlimited.
+
+    Use it as a context manager, so that the last batch is sent and every tab has been opened on exit.
+
+    With `defer`, nothing is opened, and the URLs that would be are kept in `deferred` to open in another process.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_tabs: int = TABS_MAX_DEFAULT, rate: float = TAB_RATE_DEFAULT,
+                 batch_size: int = TAB_BATCH_DEFAULT, workers: int = TAB_WORKERS_DEFAULT, defer: bool = False):
+        self.max_tabs = max(max_tabs, 0)
+        self.rate = max(rate, 0.0)
+        self.batch_size = max(batch_size, 1)
+        self.workers = max(workers, 1)
+        self.defer = defer
+
+        self.scheduled: Set[str] = set()
+        self.failed: List[str] = []
+        self.batch: List[Tuple[str, ...]] = []
+        self.deferred: List[Tuple[str, ...]] = []
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.next_time: Optional[float] = None
+
+    def __enter__(self) -> 'TabScheduler':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]):
+        self.close()
+
+    @staticmethod
+    def _get_current_time() -> float:  # pragma: no cover
+        """For easier test mocking."""
+        return time.monotonic()
+
+    @staticmethod
+    def _sleep(seconds: float):  # pragma: no cover
+        """For easier test mocking."""
+        time.sleep(seconds)
+
+    def is_full(self) -> bool:
+        """Determine if no more tabs can be opened."""
+        return bool(self.max_tabs) and len(self.scheduled) >= self.max_tabs
+
+    def open(self, *urls: str) -> bool:
+        """Schedule URLs to open in new tabs, in order. Returns `False` if they are open, or no more can be."""
+        urls = tuple(url for url in dict.fromkeys(urls) if url not in self.scheduled)
+        if self.max_tabs:
+            urls = urls[:max(self.max_tabs - len(self.scheduled), 0)]
+
+        if not urls:
+            return False
+
+        self.scheduled.update(urls)
+        self.batch.append(urls)
+
+        if sum(map(len, self.batch)) >= self.batch_size:
+            self._send_batch()
+
+        return True
+
+    def close(self):
+        """Send the last batch, and wait until every tab has been opened."""
+        self._send_batch()
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def _send_batch(self):
+        """Send the batch of URLs to the workers once the rate allows it."""
+        if not self.batch:
+            return
+
+        if self.defer:
+            self.deferred.extend(self.batch)
+            self.batch = []
+            return
+
+        if self.rate:
+            now = self._get_current_time()
+            if self.next_time is not None and self.next_time > now:
+                self._sleep(self.next_time - now)
+                now = self.next_time
+
+            self.next_time = now + sum(map(len, self.batch)) / self.rate
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pockette-tabs')
+
+        for urls in self.batch:
+            self.executor.submit(self._open_tabs, urls)
+
+        self.batch = []
+
+    def _open_tabs(self, urls: Tuple[str, ...]):
+        """Open URLs in new tabs one after another, keeping track of the URLs that couldn't be opened."""
+        for url in urls:
+            try:
+                opened = webbrowser.open(url)
+            except webbrowser.Error:
+                opened = False
+
+            if not opened:
+                self.failed.append(url)
@@ -28,9 +28,17 @@ setup(
         'requests~=2.24'
     ],
     extras_require={
+        'ahocorasick': [
+            'pyahocorasick>=2.0'
+        ],
+        'numpy': [
+            'numpy>=1.17'
+        ],
         'dev': [
             'coverage~=7.4',
             'mypy~=1.8',
+            'numpy>=1.17',
+            'pyahocorasick>=2.0',
             'pylint~=3.0',
             'pytest~=8.0',
             'pytest-cov~=4.1',
@@ -0,0 +1,53 @@
+"""Shared test configuration."""
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from pockette import DATA_FILE
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_file(monkeypatch, tmp_path) -> str:
+    """Keep each test's local snapshot out of the package directory."""
+    data_file = str(tmp_path / '.pocket.json')
+    monkeypatch.setenv('POCKETTE_DATA_FILE', data_file)
+    return data_file
+
+
+@pytest.fixture(autouse=True)
+def unlimited_tab_rate(monkeypatch):
+    """Open tabs without waiting between them, unless a test sets a rate."""
+    monkeypatch.setenv('POCKETTE_TAB_RATE', '0')
+
+
+@pytest.fixture
+def mock_env_vars(monkeypatch):
+    """Temporarily set environment variables."""
+    monkeypatch.setenv("POCKET_CONSUMER_KEY", "consumer_key")
+    monkeypatch.setenv("POCKET_ACCESS_TOKEN", "access_token")
+
+
+@pytest.fixture
+def fake_pocket_file() -> str:
+    """Get the location of the fake Pocket response."""
+    return os.path.realpath(os.path.join(os.path.dirname(DATA_FILE), '..', 'tests', 'data', 'pocket.json'))
+
+
+@pytest.fixture
+def fake_pocket_data(fake_pocket_file: str) -> dict:  # pylint: disable=redefined-outer-name
+    """Get fake Pocket data. Each test gets its own copy, so it can be changed."""
+    with open(fake_pocket_file, 'r', encoding='utf-8') as f_in:
+        return json.load(f_in)
+
+
+@pytest.fixture
+def fake_pocket_response(fake_pocket_data: dict) -> MagicMock:  # pylint: disable=redefined-outer-name
+    """Get fake Pocket response."""
+    response = MagicMock()
+    response.text = json.dumps(fake_pocket_data)
+    response.iter_content.return_value = [response.text.encode('utf-8')]
+
+    return response
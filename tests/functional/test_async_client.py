@@ -0,0 +1,281 @@
+"""Test downloading Pocket data with the asyncio client."""
+
+import asyncio
+import io
+import json
+import threading
+import time
+from typing import Iterator, List
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+import requests
+
+from pockette.cli import search
+from pockette.pocket_async_client import AsyncPocketClient, download_many, download_many_async
+from pockette.pocket_client import PocketApiError
+from tests.functional.test_client import FakePocketServer
+
+
+class FakeSession(requests.Session):  # pylint: disable=too-many-instance-attributes
+    """Serve slices of the fake Pocket data like the `/v3/get` endpoint, keeping track of concurrent requests.
+
+    `statuses` are answered before any data, and requests at offsets from `delay_after` wait `delay` seconds, or
+    until the session is released.
+    """
+
+    def __init__(self, pocket_data: dict):
+        super().__init__()
+        self.pocket_data = pocket_data
+        self.report_total = True
+        self.delay = 0.0
+        self.delay_after = 0
+        self.statuses: List[int] = []
+
+        self.requests: List[dict] = []
+        self.threads: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.released = threading.Event()
+
+    def close(self):
+        """Keep track of the session being closed."""
+        self.closed = True
+        super().close()
+
+    def post(self, url, *args, **kwargs) -> requests.Response:  # pylint: disable=unused-argument
+        """Get a page of fake Pocket data."""
+        data = kwargs['json']
+        with self.lock:
+            self.requests.append(data)
+            self.threads.append(threading.current_thread().name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            status = self.statuses.pop(0) if self.statuses else 200
+
+        try:
+            if int(data['offset']) >= self.delay_after:
+                self.released.wait(self.delay)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        if data['access_token'] == 'bad':
+            status = 401
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK' if status == 200 else 'Error'
+        response.raw = io.BytesIO(json.dumps(self._get_page(data)).encode('utf-8') if status == 200 else b'Error')
+        return response
+
+    def _get_page(self, data: dict) -> dict:
+        """Get a page of the fake Pocket data."""
+        offset = int(data['offset'])
+        links = list(self.pocket_data['list'].items())[offset:offset + int(data['count'])]
+
+        page = {'status': 1, 'list': dict(links), 'since': self.pocket_data['since'] + offset}
+        if self.report_total and data.get('total') == '1':
+            page['total'] = str(len(self.pocket_data['list']))
+
+        return page
+
+
+@pytest.fixture
+def fake_session(fake_pocket_data: dict) -> Iterator[FakeSession]:  # pylint: disable=redefined-outer-name
+    """Get a fake Pocket session, and release any requests still waiting afterwards."""
+    session = FakeSession(fake_pocket_data)
+
+    yield session
+
+    session.released.set()
+
+
+@pytest.fixture
+def local_pocket_server(fake_pocket_data: dict) -> Iterator[FakePocketServer]:  # pylint: disable=redefined-outer-name
+    """Run a local fake Pocket server."""
+    server = FakePocketServer(fake_pocket_data)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def _get_client(session: FakeSession, access_token: str = 'access_token', **kwargs) -> AsyncPocketClient:
+    """Get a client that calls the fake Pocket session."""
+    client = AsyncPocketClient('consumer_key', access_token, session=session, **kwargs)
+    client.backoff = 0
+    return client
+
+
+class TestAsyncPocketClient:  # pylint: disable=redefined-outer-name
+    """Test the asyncio Pocket client."""
+
+    def test_download_concurrent_pages(self, fake_session: FakeSession, fake_pocket_data: dict):
+        """Test that the pages after the first are fetched concurrently, with no more requests than workers."""
+        fake_session.delay = 0.05
+        client = _get_client(fake_session, page_size=5, workers=3)
+
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert pocket_data['since'] == fake_pocket_data['since']
+        assert sorted(int(request['offset']) for request in fake_session.requests) == list(range(0, 45, 5))
+        assert fake_session.max_in_flight == 3
+        assert all(name.startswith('pockette-async') for name in fake_session.threads)
+
+    def test_download_sequential_pages(self, fake_session: FakeSession, fake_pocket_data: dict):
+        """Test that pages are fetched until a short page when Pocket doesn't report a total."""
+        fake_session.report_total = False
+        client = _get_client(fake_session, page_size=11)
+
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert [int(request['offset']) for request in fake_session.requests] == [0, 11, 22, 33, 44]
+
+    def test_download_changes(self, fake_session: FakeSession):
+        """Test that downloading changes requests all states since the cursor."""
+        client = _get_client(fake_session)
+
+        client.download(since=123)
+
+        assert fake_session.requests[0]['state'] == 'all'
+        assert fake_session.requests[0]['since'] == '123'
+
+    def test_retry(self, fake_session: FakeSession):
+        """Test that server errors are retried."""
+        fake_session.statuses = [503, 429]
+        client = _get_client(fake_session)
+
+        assert len(client.download()['list']) == 44
+        assert len(fake_session.requests) == 3
+
+    def test_retry_give_up(self, fake_session: FakeSession):
+        """Test that retries stop after the retry limit."""
+        fake_session.statuses = [503] * 3
+        client = _get_client(fake_session, retries=2)
+
+        with pytest.raises(PocketApiError, match='Gave up after 3 attempts: Error \\(503\\)'):
+            client.download()
+
+        assert len(fake_session.requests) == 3
+
+    def test_no_retry_client_error(self, fake_session: FakeSession):
+        """Test that client errors, like a bad access token, are not retried."""
+        client = _get_client(fake_session, access_token='bad')
+
+        with pytest.raises(PocketApiError) as error:
+            client.download()
+
+        assert error.value.status_code == 401
+        assert len(fake_session.requests) == 1
+
+    def test_cancel(self, fake_session: FakeSession):
+        """Test that cancelling a download stops its pending requests."""
+        fake_session.delay = 10
+        fake_session.delay_after = 5
+        client = _get_client(fake_session, page_size=5, workers=2)
+
+        async def cancel_download():
+            task = asyncio.ensure_future(client.download_async())
+            while fake_session.in_flight < 2:
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.monotonic()
+        asyncio.run(cancel_download())
+
+        assert time.monotonic() - start < 5
+        assert len(fake_session.requests) == 3
+        assert fake_session.closed
+
+    def test_cancel_retries(self, fake_session: FakeSession):
+        """Test that cancelling a download stops the retries of a request that already started."""
+        fake_session.statuses = [503] * 10
+        client = _get_client(fake_session, retries=5)
+        client.backoff = 0.2
+
+        async def cancel_download():
+            task = asyncio.ensure_future(client.download_async())
+            while not fake_session.requests:
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_download())
+        time.sleep(0.5)
+
+        assert len(fake_session.requests) == 1
+        assert fake_session.closed
+
+    def test_download_local_server(self, local_pocket_server: FakePocketServer, fake_pocket_data: dict):
+        """Test downloading from a local server over HTTP, with no more connections than workers."""
+        client = AsyncPocketClient('consumer_key', 'access_token', page_size=5, workers=3)
+        client.get_url = f'http://127.0.0.1:{local_pocket_server.server_address[1]}/v3/get'
+
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert len(local_pocket_server.connections) == 9
+        assert len(set(local_pocket_server.connections)) <= 3
+        assert all(headers['Accept-Encoding'] == 'gzip' for headers in local_pocket_server.headers)
+
+    def test_download_many(self, fake_session: FakeSession, fake_pocket_data: dict):
+        """Test downloading several accounts on one event loop, sharing the request limit."""
+        fake_session.delay = 0.02
+        clients = [_get_client(fake_session, access_token=f'token_{i}', page_size=10) for i in range(2)]
+
+        results = download_many(clients, workers=2)
+
+        assert [result['list'].keys() for result in results] == [fake_pocket_data['list'].keys()] * 2
+        assert fake_session.max_in_flight == 2
+        assert sorted(request['access_token'] for request in fake_session.requests) == (
+            ['token_0'] * 5 + ['token_1'] * 5
+        )
+
+    def test_download_many_error(self, fake_session: FakeSession):
+        """Test that the other downloads are cancelled when one fails."""
+        fake_session.delay = 10
+        fake_session.delay_after = 5
+        clients = [
+            _get_client(fake_session, page_size=5),
+            _get_client(fake_session, access_token='bad', page_size=5),
+        ]
+
+        start = time.monotonic()
+        with pytest.raises(PocketApiError, match='401'):
+            asyncio.run(download_many_async(clients))
+
+        assert time.monotonic() - start < 5
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestAsyncSearch:  # pylint: disable=redefined-outer-name,unused-argument,too-few-public-methods
+    """Test searching with the asyncio client."""
+
+    def test_search_http_client(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test searching Pocket data downloaded with --http-client asyncio."""
+        threads = []
+
+        def post(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return fake_pocket_response
+
+        mock_post.side_effect = post
+        result = CliRunner().invoke(search, args=['--http-client', 'asyncio'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert threads and all(name.startswith('pockette-async') for name in threads)
@@ -0,0 +1,37 @@
+"""Test that the benchmarks still run against the current code."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..', '..')
+
+
+def _run_benchmark(name: str, *args: str) -> str:
+    """Run a benchmark in a fresh process, like `make benchmark`, and get its output."""
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT_DIR, 'benchmarks', name)] + list(args),
+        check=True, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT_DIR)
+    ).stdout
+
+
+@pytest.mark.parametrize('loader', ['json', 'binary'])
+def test_startup_loaders(loader: str, tmp_path):
+    """Test that each loader of the startup benchmark loads and searches a small snapshot."""
+    path = str(tmp_path / '.pocket.json')
+    subprocess.run(
+        [sys.executable, '-c', f'from bench_startup import write_snapshot\nwrite_snapshot({path!r}, 50)'],
+        check=True, cwd=os.path.join(ROOT_DIR, 'benchmarks'), env=dict(os.environ, PYTHONPATH=ROOT_DIR)
+    )
+
+    assert float(_run_benchmark('bench_startup.py', '--loader', loader, '--path', path)) > 0
+
+
+def test_cache_sizes():
+    """Test that the cache benchmark runs every codec, and shows sizes that can be compared on a small snapshot."""
+    lines = _run_benchmark('bench_cache.py', '--items', '50').splitlines()[2:]
+
+    assert len(lines) == 8
+    assert all(float(line.split()[2].replace(',', '')) > 0 for line in lines)
@@ -0,0 +1,193 @@
+"""Test the memory-mapped binary snapshot."""
+
+import datetime
+import os
+import struct
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import report, search
+from pockette.pocket_binary import HEADER, BinarySnapshot, MappedItems
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_handler import PocketDataHandler
+from pockette.pocket_item import PocketItem
+
+
+SEARCH_ARGS = [
+    [],
+    ['--reverse', '--count', '5', '--offset', '3'],
+    ['--sort', 'site', '--all'],
+    ['--start', '2020-01-01', '--end', '2020-06-12', '--all'],
+    ['--length', 'long', '--all'],
+    ['--include', 'nytimes.com,wired', '--exclude', 'police', '--all'],
+    ['--match', 'token', '--include', 'nytimes.com', '--all'],
+    ['--random', '--seed', '3', '--weight', 'older', '--prefer', 'wired.com'],
+]
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestBinarySnapshot:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test loading Pocket data from the binary snapshot."""
+
+    @pytest.mark.parametrize('args', SEARCH_ARGS)
+    def test_search(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                    isolated_data_file: str, args: list):
+        """Test that searching the binary snapshot gives the same results as the JSON snapshot."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        json_result = runner.invoke(search, args=args)
+        assert os.path.exists(f'{isolated_data_file}.bin')
+
+        with patch('pockette.pocket_cache.PocketCache.load') as mock_load:
+            binary_result = runner.invoke(search, args=args)
+
+        assert mock_load.call_count == 0
+        assert binary_result.exit_code == 0
+        assert binary_result.output == json_result.output
+
+    @patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
+    def test_report(self, mock_now: MagicMock, mock_post: MagicMock, mock_env_vars,
+                    fake_pocket_response: MagicMock):
+        """Test that the report of the binary snapshot is the same as the report of the JSON snapshot."""
+        mock_now.return_value = datetime.datetime(2020, 6, 14)
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        json_result = runner.invoke(report, args=['--all'])
+        binary_result = runner.invoke(report, args=['--all'])
+
+        assert binary_result.exit_code == 0
+        assert binary_result.output == json_result.output
+
+    def test_search_reads_page(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                               isolated_data_file: str):
+        """Test that searching creates only the items on the page."""
+        mock_post.return_value = fake_pocket_response
+        PocketDataHandler(data_file=isolated_data_file)
+
+        handler = PocketDataHandler(data_file=isolated_data_file)
+        assert isinstance(handler.items, MappedItems)
+
+        handler.search_pocket_data(count=10)
+        assert sum(1 for item in handler.items._items if item is not None) == 10  # pylint: disable=protected-access
+
+    def test_regenerated_when_stale(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                                    isolated_data_file: str):
+        """Test that the binary snapshot is rewritten when the JSON snapshot changed."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        first_result = runner.invoke(search)
+
+        modified_time = os.path.getmtime(isolated_data_file)
+        os.utime(isolated_data_file, (modified_time + 1, modified_time + 1))
+        assert PocketCache(isolated_data_file).load_binary() is None
+
+        second_result = runner.invoke(search)
+
+        assert second_result.output == first_result.output
+        assert PocketCache(isolated_data_file).load_binary() is not None
+        assert mock_post.call_count == 1
+
+    @pytest.mark.parametrize('contents', [b'', b'POCKETTE', HEADER.pack(b'POCKETTE', 0, 0, b'', 0, 0, 0, 0)])
+    def test_regenerated_when_unreadable(self, mock_post: MagicMock, mock_env_vars,
+                                         fake_pocket_response: MagicMock, isolated_data_file: str,
+                                         contents: bytes):
+        """Test that a truncated, corrupt, or outdated binary snapshot is rewritten from the JSON snapshot."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        first_result = runner.invoke(search)
+
+        with open(f'{isolated_data_file}.bin', 'wb') as f_out:
+            f_out.write(contents)
+
+        second_result = runner.invoke(search)
+
+        assert second_result.exit_code == 0
+        assert second_result.output == first_result.output
+        assert PocketCache(isolated_data_file).load_binary() is not None
+
+    def test_not_trusted_when_replaced(self, mock_post: MagicMock, fake_pocket_data: dict,
+                                       isolated_data_file: str):
+        """Test that items from a JSON snapshot replaced before they were saved aren't trusted as the new one."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        cache = PocketCache(isolated_data_file)
+        pocket_data = cache.load()
+        assert pocket_data is not None
+        items = [PocketItem.from_dict(link) for link in pocket_data['list'].values()]
+
+        # A sync in another process replaces the JSON snapshot
+        PocketCache(isolated_data_file).save({'list': {}, 'since': 1})
+        cache.save_binary(items, cache.source_stat)
+
+        assert PocketCache(isolated_data_file).load_binary() is None
+
+        cache.load()
+        cache.save_binary([], cache.source_stat)
+
+        snapshot = PocketCache(isolated_data_file).load_binary()
+        assert snapshot is not None
+        assert snapshot.count == 0
+
+
+class TestBinaryFormat:
+    """Test the binary snapshot format."""
+
+    items = [
+        PocketItem(item_id='1', title='Café ☕', url='https://www.example.com/a', excerpt='', time_added=20,
+                   time_to_read=None, word_count=0, favorite=True),
+        PocketItem(item_id='2', title='', url='example.org', excerpt='Ünïcode', time_added=10, time_to_read=7,
+                   word_count=1500, favorite=False),
+        PocketItem(item_id='3', title='Title', url='https://example.com/b', excerpt='Excerpt', time_added=10,
+                   time_to_read=0, word_count=10, favorite=False),
+    ]
+
+    def test_round_trip(self):
+        """Test that items are read back as they were written."""
+        snapshot = BinarySnapshot(BinarySnapshot.build(self.items, snapshot_id='abc', source_stat=(12, 34)))
+
+        assert snapshot.snapshot_id == 'abc'
+        assert snapshot.source_stat == (12, 34)
+        assert [vars_of(item) for item in MappedItems(snapshot)] == [vars_of(item) for item in self.items]
+        assert snapshot.get_domain_table().domains == ['www.example.com', 'example.org', 'example.com']
+        assert list(snapshot.sections['domain_id']) == [0, 1, 2]
+        assert snapshot.get_time_index().search() == [1, 2, 0]
+        assert snapshot.get_time_index().search(start_time=10) == [0]
+
+    def test_columns_aligned(self):
+        """Test that every column starts at a multiple of 8 bytes."""
+        contents = BinarySnapshot.build(self.items)
+        snapshot = BinarySnapshot(contents)
+
+        for i in range(len(snapshot.sections)):
+            offset, _ = struct.unpack_from('<QQ', contents, HEADER.size + i * 16)
+            assert offset % 8 == 0
+
+    def test_empty(self):
+        """Test a snapshot without items."""
+        snapshot = BinarySnapshot(BinarySnapshot.build([]))
+
+        assert not MappedItems(snapshot)
+        assert snapshot.snapshot_id is None
+        assert not snapshot.get_time_index().search()
+
+    def test_outdated_version(self):
+        """Test that a snapshot from another version isn't read."""
+        contents = bytearray(BinarySnapshot.build(self.items))
+        struct.pack_into('<H', contents, 8, BinarySnapshot.version + 1)
+
+        with pytest.raises(ValueError):
+            BinarySnapshot(bytes(contents))
+
+    def test_open_missing(self, tmp_path):
+        """Test that a missing snapshot isn't opened."""
+        assert BinarySnapshot.open(str(tmp_path / 'missing.bin')) is None
+
+
+def vars_of(item: PocketItem) -> dict:
+    """Get the fields of an item."""
+    return {name: getattr(item, name) for name in PocketItem.__slots__}
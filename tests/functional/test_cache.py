@@ -0,0 +1,226 @@
+"""Test the local Pocket data snapshot."""
+
+import json
+import os
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import search
+from pockette.pocket_cache import CODECS, PocketCache
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestCache:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test the local Pocket data snapshot."""
+
+    def test_cache_written(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                           isolated_data_file: str):
+        """Test that downloaded data is saved to the snapshot."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search)
+
+        assert result.exit_code == 0
+        assert os.path.exists(isolated_data_file)
+
+        pocket_data = PocketCache(isolated_data_file).load()
+        assert pocket_data is not None
+        assert len(pocket_data['list']) == 44
+
+    def test_cache_reused(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that a fresh snapshot is used instead of downloading again."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        first_result = runner.invoke(search)
+        second_result = runner.invoke(search)
+
+        assert second_result.exit_code == 0
+        assert first_result.output == second_result.output
+        assert mock_post.call_count == 1
+
+    @patch('pockette.pocket_cache.PocketCache._get_current_time')
+    def test_cache_expired(self, mock_now: MagicMock, mock_post: MagicMock, mock_env_vars,
+                           fake_pocket_response: MagicMock, isolated_data_file: str):
+        """Test that a snapshot past the hard TTL is downloaded again before answering."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        mock_now.return_value = 0
+        runner.invoke(search)
+
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + 60
+        result = runner.invoke(search, args=['--cache-ttl', '30', '--cache-hard-ttl', '30'])
+
+        assert result.exit_code == 0
+        assert mock_post.call_count == 2
+
+    def test_cache_refresh(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that the --refresh option ignores a fresh snapshot."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        runner.invoke(search)
+        result = runner.invoke(search, args=['--refresh'])
+
+        assert result.exit_code == 0
+        assert mock_post.call_count == 2
+
+    def test_cache_offline(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that the --offline option uses a stale snapshot without downloading."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        runner.invoke(search)
+        result = runner.invoke(search, args=['--offline', '--cache-ttl', '0'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert mock_post.call_count == 1
+
+    def test_cache_offline_missing(self, mock_post: MagicMock, mock_env_vars):
+        """Test that the --offline option fails without a snapshot."""
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--offline'])
+
+        assert result.exit_code == 1
+        assert 'No local Pocket data found' in result.output
+        assert not mock_post.called
+
+    def test_cache_refresh_offline(self, mock_post: MagicMock, mock_env_vars):
+        """Test that --refresh and --offline cannot be combined."""
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--refresh', '--offline'])
+
+        assert result.exit_code == 2
+        assert not mock_post.called
+
+    def test_cache_data_file_option(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                                    tmp_path):
+        """Test the --data-file option."""
+        mock_post.return_value = fake_pocket_response
+        data_file = str(tmp_path / 'other' / 'pocket.json')
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--data-file', data_file])
+
+        assert result.exit_code == 0
+        assert os.path.exists(data_file)
+
+    def test_codec_option(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                          isolated_data_file: str):
+        """Test the --cache-codec option."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        first_result = runner.invoke(search, args=['--cache-codec', 'lzma'])
+        with open(isolated_data_file, 'rb') as f_in:
+            assert f_in.read(6) == b'\xfd7zXZ\x00'
+
+        # Read the compressed JSON snapshot instead of the binary snapshot
+        os.remove(f'{isolated_data_file}.bin')
+        second_result = runner.invoke(search, args=['--cache-codec', 'lzma', '--offline'])
+
+        assert second_result.exit_code == 0
+        assert second_result.output == first_result.output
+
+
+class TestPocketCache:
+    """Test reading and writing snapshots."""
+
+    def test_load_missing(self, tmp_path):
+        """Test loading a snapshot that does not exist."""
+        cache = PocketCache(str(tmp_path / 'missing.json'))
+
+        assert cache.load() is None
+        assert cache.get_age() is None
+        assert not cache.is_fresh()
+
+    def test_load_corrupt(self, tmp_path):
+        """Test loading a partially written snapshot."""
+        data_file = tmp_path / 'pocket.json'
+        data_file.write_text('{"version": 1, "pocket_data": {', encoding='utf-8')
+
+        assert PocketCache(str(data_file)).load() is None
+
+    def test_load_other_version(self, tmp_path):
+        """Test loading a snapshot written by another version."""
+        data_file = tmp_path / 'pocket.json'
+        data_file.write_text(json.dumps({'version': 0, 'pocket_data': {'list': {}}}), encoding='utf-8')
+
+        assert PocketCache(str(data_file)).load() is None
+
+    def test_save_atomic(self, tmp_path):
+        """Test that saving leaves no temporary files behind."""
+        cache = PocketCache(str(tmp_path / 'pocket.json'))
+        cache.save({'list': {}, 'since': 1})
+
+        assert cache.load() == {'list': {}, 'since': 1}
+        assert os.listdir(tmp_path) == ['pocket.json']
+
+    @pytest.mark.parametrize('codec', ['none', 'gzip', 'zlib', 'lzma'])
+    def test_codec(self, tmp_path, codec: str):
+        """Test that a compressed snapshot is read back with any codec."""
+        data_file = str(tmp_path / 'pocket.json')
+        pocket_data = {'list': {'1': {'item_id': '1', 'resolved_title': 'Title ' * 100}}, 'since': 1}
+        PocketCache(data_file, codec=codec).save(pocket_data)
+
+        assert PocketCache(data_file).load() == pocket_data
+        assert PocketCache(data_file, codec='gzip').load() == pocket_data
+
+        with open(data_file, 'rb') as f_in:
+            assert f_in.read(6).startswith(b'{' if codec == 'none' else CODECS[codec][0])
+
+    def test_codec_gzip_timestamp(self):
+        """Test that gzip snapshots have no timestamp, so the same data is always compressed the same way."""
+        _, compress, decompress = CODECS['gzip']
+        data = compress(b'{"list": {}}')
+
+        assert data[4:8] == b'\0\0\0\0'
+        assert decompress(data) == b'{"list": {}}'
+
+    def test_codec_smaller(self, tmp_path):
+        """Test that compressing makes the snapshot smaller."""
+        pocket_data = {'list': {str(i): {'item_id': str(i), 'excerpt': 'Excerpt ' * 20} for i in range(100)}}
+        sizes = {}
+        for codec in ('none', 'gzip', 'zlib', 'lzma'):
+            data_file = str(tmp_path / f'{codec}.json')
+            PocketCache(data_file, codec=codec).save(pocket_data)
+            sizes[codec] = os.path.getsize(data_file)
+
+        assert max(sizes['gzip'], sizes['zlib'], sizes['lzma']) < sizes['none'] / 10
+
+    def test_codec_corrupt(self, tmp_path):
+        """Test loading a partially written compressed snapshot."""
+        data_file = str(tmp_path / 'pocket.json')
+        PocketCache(data_file, codec='gzip').save({'list': {}})
+        with open(data_file, 'rb') as f_in:
+            contents = f_in.read()
+
+        with open(data_file, 'wb') as f_out:
+            f_out.write(contents[:len(contents) // 2])
+
+        assert PocketCache(data_file).load() is None
+
+    def test_codec_unknown(self, tmp_path):
+        """Test that an unknown codec is rejected."""
+        with pytest.raises(ValueError):
+            PocketCache(str(tmp_path / 'pocket.json'), codec='brotli')
+
+    def test_prune(self, tmp_path):
+        """Test that only the fields that are used are saved."""
+        data_file = str(tmp_path / 'pocket.json')
+        link = {'item_id': '1', 'status': '0', 'resolved_url': 'https://example.com', 'image': {'src': 'a.png'},
+                'authors': {'1': {'name': 'Author'}}}
+        pocket_data = {'list': {'1': link}, 'since': 1, 'complete': 1, 'search_meta': {'search_type': 'normal'}}
+
+        PocketCache(data_file).save(dict(pocket_data))
+        assert PocketCache(data_file).load() == {
+            'list': {'1': {'item_id': '1', 'status': '0', 'resolved_url': 'https://example.com'}}, 'since': 1
+        }
+
+        PocketCache(data_file, prune=False).save(pocket_data)
+        assert PocketCache(data_file).load() == pocket_data
@@ -0,0 +1,312 @@
+"""Test downloading Pocket data in pages."""
+
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import threading
+from typing import Iterator, List
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+import requests
+
+from pockette.cli import search
+from pockette.pocket_client import BasePocketClient, PocketApiError, PocketClient
+
+
+def _get_response(status_code: int, text: str) -> requests.Response:
+    """Get a real response object."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'Reason'
+    response.raw = io.BytesIO(text.encode('utf-8'))
+    return response
+
+
+class FakeSession(requests.Session):
+    """Serve slices of the fake Pocket data like the `/v3/get` endpoint."""
+
+    def __init__(self, pocket_data: dict, report_total: bool = True):
+        super().__init__()
+        self.pocket_data = pocket_data
+        self.report_total = report_total
+        self.requests: List[dict] = []
+        self.lock = threading.Lock()
+
+    def post(self, url, *args, **kwargs) -> requests.Response:  # pylint: disable=unused-argument
+        """Get a page of fake Pocket data."""
+        data = kwargs['json']
+        with self.lock:
+            self.requests.append(data)
+
+        offset = int(data['offset'])
+        count = int(data['count'])
+        links = list(self.pocket_data['list'].items())[offset:offset + count]
+
+        page = {'status': 1, 'list': dict(links), 'since': self.pocket_data['since'] + offset}
+        if self.report_total and data.get('total') == '1':
+            page['total'] = str(len(self.pocket_data['list']))
+
+        return _get_response(200, json.dumps(page))
+
+
+class FakePocketServer(ThreadingHTTPServer):
+    """Serve the fake Pocket data over local HTTP/1.1, gzip-compressed when asked, keeping track of connections."""
+
+    daemon_threads = True
+
+    def __init__(self, pocket_data: dict):
+        super().__init__(('127.0.0.1', 0), FakePocketRequestHandler)
+        self.pocket_data = pocket_data
+        self.connections: List[tuple] = []
+        self.headers: List[dict] = []
+        self.lock = threading.Lock()
+
+
+class FakePocketRequestHandler(BaseHTTPRequestHandler):
+    """Answer `/v3/get` and OAuth requests."""
+
+    protocol_version = 'HTTP/1.1'
+    server: FakePocketServer
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a request."""
+        data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.connections.append(self.client_address)
+            self.server.headers.append(dict(self.headers))
+
+        if self.path.endswith('/oauth/request'):
+            body = {'code': 'REQUEST_TOKEN'}
+        elif self.path.endswith('/oauth/authorize'):
+            body = {'access_token': f"ACCESS_TOKEN_{data['code']}"}
+        else:
+            offset = int(data['offset'])
+            links = list(self.server.pocket_data['list'].items())[offset:offset + int(data['count'])]
+            body = {'status': 1, 'list': dict(links), 'since': self.server.pocket_data['since'],
+                    'total': str(len(self.server.pocket_data['list']))}
+
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            content = gzip.compress(content)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def fake_pocket_server(fake_pocket_data: dict) -> Iterator[FakePocketServer]:  # pylint: disable=redefined-outer-name
+    """Run a local fake Pocket server."""
+    server = FakePocketServer(fake_pocket_data)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def _get_local_client(server: FakePocketServer, **kwargs) -> PocketClient:
+    """Get a client that calls the local fake Pocket server."""
+    client = PocketClient('consumer_key', 'access_token', **kwargs)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v3'
+    client.get_url = f'{base_url}/get'
+    client.request_token_url = f'{base_url}/oauth/request'
+    client.access_token_url = f'{base_url}/oauth/authorize'
+    return client
+
+
+class TestPocketClient:  # pylint: disable=redefined-outer-name
+    """Test the paginated Pocket client."""
+
+    def test_download_parallel_pages(self, fake_pocket_data: dict):
+        """Test that the pages after the first are fetched using the reported total."""
+        session = FakeSession(fake_pocket_data)
+        client = PocketClient('consumer_key', 'access_token', page_size=10, workers=3, session=session)
+
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert pocket_data['since'] == fake_pocket_data['since']
+        assert sorted(int(request['offset']) for request in session.requests) == [0, 10, 20, 30, 40]
+        assert all(request['state'] == 'unread' for request in session.requests)
+
+    def test_download_sequential_pages(self, fake_pocket_data: dict):
+        """Test that pages are fetched until a short page when Pocket doesn't report a total."""
+        session = FakeSession(fake_pocket_data, report_total=False)
+        client = PocketClient('consumer_key', 'access_token', page_size=11, session=session)
+
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert [int(request['offset']) for request in session.requests] == [0, 11, 22, 33, 44]
+
+    def test_download_changes(self, fake_pocket_data: dict):
+        """Test that downloading changes requests all states since the cursor."""
+        session = FakeSession(fake_pocket_data)
+        client = PocketClient('consumer_key', 'access_token', session=session)
+
+        client.download(since=123)
+
+        assert session.requests[0]['state'] == 'all'
+        assert session.requests[0]['since'] == '123'
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_retry_connection_error(self, mock_sleep: MagicMock, fake_pocket_data: dict):
+        """Test that connection errors are retried with exponential backoff."""
+        session = MagicMock()
+        session.post.side_effect = [
+            requests.exceptions.ConnectionError('Connection reset'),
+            requests.exceptions.Timeout('Timed out'),
+            _get_response(200, json.dumps(fake_pocket_data)),
+        ]
+        client = PocketClient('consumer_key', 'access_token', session=session)
+
+        pocket_data = client.download()
+
+        assert len(pocket_data['list']) == 44
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [client.backoff, client.backoff * 2]
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_retry_server_error(self, mock_sleep: MagicMock, fake_pocket_data: dict):
+        """Test that server errors are retried."""
+        session = MagicMock()
+        session.post.side_effect = [
+            _get_response(503, 'Service Unavailable'),
+            _get_response(200, json.dumps(fake_pocket_data)),
+        ]
+        client = PocketClient('consumer_key', 'access_token', session=session)
+
+        assert len(client.download()['list']) == 44
+        assert mock_sleep.call_count == 1
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_retry_give_up(self, mock_sleep: MagicMock):
+        """Test that retries stop after the retry limit."""
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError('Connection reset')
+        client = PocketClient('consumer_key', 'access_token', session=session)
+
+        with pytest.raises(PocketApiError, match='Connection reset'):
+            client.download()
+
+        assert session.post.call_count == client.retries + 1
+        assert mock_sleep.call_count == client.retries
+
+    def test_no_retry_client_error(self):
+        """Test that client errors, like a bad access token, are not retried."""
+        session = MagicMock()
+        session.post.return_value = _get_response(401, 'Unauthorized')
+        client = PocketClient('consumer_key', 'access_token', session=session)
+
+        with pytest.raises(PocketApiError, match='401'):
+            client.download()
+
+        assert session.post.call_count == 1
+
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_retries_option(self, mock_sleep: MagicMock):
+        """Test that the number of retries can be changed."""
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError('Connection reset')
+        client = PocketClient('consumer_key', 'access_token', session=session, retries=0)
+
+        with pytest.raises(PocketApiError, match='Gave up after 1 attempts'):
+            client.download()
+
+        assert session.post.call_count == 1
+        assert not mock_sleep.called
+
+    def test_timeouts(self, fake_pocket_data: dict):
+        """Test that the connect and read timeouts are sent with every request."""
+        session = MagicMock()
+        session.post.return_value = _get_response(200, json.dumps(fake_pocket_data))
+        client = PocketClient('consumer_key', 'access_token', session=session, timeout=12, connect_timeout=3)
+
+        client.download()
+
+        assert session.post.call_args.kwargs['timeout'] == (3, 12)
+        assert session.post.call_args.kwargs['headers']['Accept-Encoding'] == 'gzip'
+
+    def test_oauth(self):
+        """Test that the OAuth tokens are requested over the client's session."""
+        session = MagicMock()
+        session.post.side_effect = [
+            _get_response(200, json.dumps({'code': 'REQUEST_TOKEN'})),
+            _get_response(200, json.dumps({'access_token': 'ACCESS_TOKEN'})),
+        ]
+        client = PocketClient('consumer_key', session=session)
+
+        assert client.get_request_token() == 'REQUEST_TOKEN'
+        assert client.get_access_token('REQUEST_TOKEN') == 'ACCESS_TOKEN'
+        assert [call.args[0] for call in session.post.call_args_list] == [
+            client.request_token_url, client.access_token_url
+        ]
+        assert 'request_token=REQUEST_TOKEN' in client.get_authorize_url('REQUEST_TOKEN')
+
+    def test_base_client(self):
+        """Test that a client without a download method can't be created."""
+        with pytest.raises(TypeError):
+            # pylint: disable=abstract-class-instantiated
+            BasePocketClient('consumer_key', 'access_token')  # type: ignore[abstract]
+
+    def test_oauth_error(self):
+        """Test that client errors keep their status code, and bad responses are errors."""
+        session = MagicMock()
+        session.post.side_effect = [_get_response(403, 'Forbidden'), _get_response(200, json.dumps({}))]
+        client = PocketClient('consumer_key', session=session)
+
+        with pytest.raises(PocketApiError) as error:
+            client.get_request_token()
+        assert error.value.status_code == 403
+
+        with pytest.raises(PocketApiError):
+            client.get_request_token()
+
+    def test_keep_alive(self, fake_pocket_server: FakePocketServer, fake_pocket_data: dict):
+        """Test that sequential requests reuse one connection, and that responses are gzip-compressed."""
+        client = _get_local_client(fake_pocket_server, page_size=10, workers=1)
+
+        assert client.get_request_token() == 'REQUEST_TOKEN'
+        pocket_data = client.download()
+
+        assert pocket_data['list'].keys() == fake_pocket_data['list'].keys()
+        assert len(fake_pocket_server.connections) == 6
+        assert len(set(fake_pocket_server.connections)) == 1
+        assert all(headers['Accept-Encoding'] == 'gzip' for headers in fake_pocket_server.headers)
+
+    def test_connection_pool(self, fake_pocket_server: FakePocketServer, fake_pocket_data: dict):
+        """Test that parallel pages use no more connections than there are workers."""
+        client = _get_local_client(fake_pocket_server, page_size=5, workers=3)
+
+        for _ in range(2):
+            assert client.download()['list'].keys() == fake_pocket_data['list'].keys()
+
+        assert len(fake_pocket_server.connections) == 18
+        assert len(set(fake_pocket_server.connections)) <= 3
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestPaginatedSearch:  # pylint: disable=redefined-outer-name,unused-argument,too-few-public-methods
+    """Test searching with paginated downloads."""
+
+    def test_search_page_size(self, mock_post: MagicMock, mock_env_vars, fake_pocket_data: dict):
+        """Test searching Pocket data with the --page-size and --workers options."""
+        mock_post.side_effect = FakeSession(fake_pocket_data).post
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--page-size', '5', '--workers', '2'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert mock_post.call_count == 9
@@ -0,0 +1,113 @@
+"""Test columnar filtering and aggregation, and the pure-Python fallback."""
+
+import datetime
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import report, search
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_columns import PocketColumns
+from pockette.pocket_item import PocketItem
+
+numpy = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def fake_pocket_data(fake_pocket_data: dict) -> dict:  # pylint: disable=redefined-outer-name
+    """Get fake Pocket data with two favorites."""
+    fake_pocket_data['list']['3015809930']['favorite'] = '1'
+    fake_pocket_data['list']['3015173774']['favorite'] = '1'
+
+    return fake_pocket_data
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def columnar(request, monkeypatch) -> bool:
+    """Run a test with NumPy columns and with the pure-Python fallback."""
+    if request.param == 'python':
+        monkeypatch.setattr('pockette.pocket_handler.PocketColumns.is_available', lambda: False)
+
+    return request.param == 'numpy'
+
+
+@patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
+class TestColumnarCommands:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test that both filtering paths give the same results."""
+
+    def test_report(self, mock_now: MagicMock, columnar: bool, fake_pocket_data: dict, isolated_data_file: str):
+        """Test the report's counts."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = datetime.datetime(2020, 6, 12, 10, 0, 0)
+
+        runner = CliRunner()
+        result = runner.invoke(report, args=['--offline', '--all', '--start', '2019-06-01', '--length', 'long'])
+
+        assert result.exit_code == 0
+        assert '9 unread pages across 5 sites' in result.output
+        assert '7 unread pages older than 1 month' in result.output
+        assert '6 unread pages older than 3 months' in result.output
+        assert '5 unread pages older than 6 months' in result.output
+        assert '3 unread pages older than 9 months' in result.output
+        assert '1 unread pages older than 1 year' in result.output
+        assert '1: www.nytimes.com (5)' in result.output
+        assert '2: www.wired.com (1)' in result.output
+        assert '5: www.theatlantic.com (1)' in result.output
+
+    def test_search_favorite(self, mock_now: MagicMock, columnar: bool, fake_pocket_data: dict,
+                             isolated_data_file: str):
+        """Test searching Pocket data with the --favorite option."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--offline', '--favorite'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (2)' in result.output
+        assert '1: Yes, We Mean Literally Abolish the Police' in result.output
+
+
+class TestPocketColumns:  # pylint: disable=redefined-outer-name
+    """Test the columns directly."""
+
+    def test_filter(self, fake_pocket_data: dict):
+        """Test that column filters match the item fields."""
+        items = [PocketItem.from_dict(link) for link in fake_pocket_data['list'].values()]
+        columns = PocketColumns(items)
+
+        indices = columns.filter(start_time=1577836800, max_time_to_read=4)
+
+        assert indices == [
+            i for i, item in enumerate(items)
+            if item.time_added > 1577836800 and (item.time_to_read is None or item.time_to_read <= 4)
+        ]
+
+    def test_unknown_time_to_read(self):
+        """Test that an unknown reading time passes both length filters."""
+        columns = PocketColumns([PocketItem('1', 'Title', 'https://example.com', '', 1)])
+
+        assert columns.filter(max_time_to_read=4) == [0]
+        assert columns.filter(min_time_to_read=10) == [0]
+
+    def test_count_domains_order(self):
+        """Test that domains are counted in order of first appearance within the rows."""
+        columns = PocketColumns([
+            PocketItem('1', 'A', 'https://a.com/1', '', 1),
+            PocketItem('2', 'B', 'https://b.com/1', '', 2),
+            PocketItem('3', 'A', 'https://a.com/2', '', 3),
+        ])
+
+        assert list(columns.count_domains([1, 2]).items()) == [('b.com', 1), ('a.com', 1)]
+        assert columns.count_domains([0, 1, 2]) == {'a.com': 2, 'b.com': 1}
+
+    def test_filter_indices(self):
+        """Test that only the given rows are checked, in the given order."""
+        columns = PocketColumns([
+            PocketItem('1', 'A', 'https://a.com/1', '', 1, favorite=True),
+            PocketItem('2', 'B', 'https://b.com/1', '', 2),
+            PocketItem('3', 'C', 'https://c.com/1', '', 3, favorite=True),
+        ])
+
+        assert columns.filter(favorite=True, indices=[2, 1, 0]) == [2, 0]
+        assert not columns.filter(indices=[])
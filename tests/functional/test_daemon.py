@@ -0,0 +1,273 @@
+"""Test serving Pocket data from a daemon."""
+
+import datetime
+import os
+import socket
+import tempfile
+import threading
+from typing import Iterator
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette import CACHE_CODEC_DEFAULT, CACHE_HARD_TTL_DEFAULT, CACHE_TTL_DEFAULT, HTTP_CLIENT_DEFAULT
+from pockette.cli import _create_pocket_data_handler, read, report, search
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_handler import PocketDataHandler, PocketSyncError
+from pockette.pocket_server import PocketDaemon
+
+
+def _get_options(data_file: str, store: str = 'json') -> dict:
+    """Get the shared options of clients with the default local snapshot options."""
+    return {
+        'data_file': os.path.realpath(data_file), 'store': store, 'offline': False, 'cache_ttl': CACHE_TTL_DEFAULT,
+        'cache_hard_ttl': CACHE_HARD_TTL_DEFAULT, 'cache_codec': CACHE_CODEC_DEFAULT,
+        'http_client': HTTP_CLIENT_DEFAULT,
+    }
+
+
+@pytest.fixture
+def socket_path(monkeypatch) -> Iterator[str]:
+    """Get a socket location that is short enough for Unix domain sockets."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'pockette.sock')
+        monkeypatch.setenv('POCKETTE_SOCKET', path)
+        yield path
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+@pytest.fixture
+def daemon(socket_path: str, isolated_data_file: str, mock_env_vars,
+           fake_pocket_response: MagicMock) -> Iterator[PocketDaemon]:
+    """Download the local snapshot, then run a daemon in the background to serve it."""
+    with patch('pockette.pocket_client.requests.Session.post', return_value=fake_pocket_response):
+        PocketDataHandler(data_file=isolated_data_file)
+
+    pocket_daemon = PocketDaemon(
+        socket_path, create_handler=lambda sync_now: PocketDataHandler(data_file=isolated_data_file, offline=True),
+        options=_get_options(isolated_data_file), refresh_interval=3600
+    )
+    pocket_daemon.poll_interval = 0.01
+    thread = threading.Thread(target=pocket_daemon.serve)
+    thread.start()
+
+    yield pocket_daemon
+
+    pocket_daemon.shutdown()
+    thread.join()
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestDaemon:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test querying the daemon from thin clients."""
+
+    @pytest.mark.parametrize('args', [
+        [],
+        ['--all', '--sort', 'site', '--reverse'],
+        ['--start', '2020-01-01', '--end', '2020-06-12', '--length', 'long'],
+        ['--random', '--seed', '3', '--include', 'nytimes.com,wired'],
+    ])
+    def test_search(self, mock_post: MagicMock, daemon: PocketDaemon, args: list):
+        """Test that searching through the daemon gives the same results as searching in this process."""
+        runner = CliRunner()
+        with patch('pockette.cli._create_pocket_data_handler') as mock_handler:
+            daemon_result = runner.invoke(search, args=args)
+
+        assert daemon_result.exit_code == 0
+        assert not mock_handler.called
+        assert daemon.request_count == 1
+
+        local_result = runner.invoke(search, args=args + ['--socket', os.devnull + '.missing'])
+        assert daemon_result.output == local_result.output
+
+    @patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
+    def test_report(self, mock_now: MagicMock, mock_post: MagicMock, daemon: PocketDaemon):
+        """Test the report through the daemon."""
+        mock_now.return_value = datetime.datetime(2020, 6, 14)
+
+        runner = CliRunner()
+        daemon_result = runner.invoke(report, args=['--all'])
+        local_result = runner.invoke(report, args=['--all', '--socket', os.devnull + '.missing'])
+
+        assert daemon_result.exit_code == 0
+        assert daemon.request_count == 1
+        assert daemon_result.output == local_result.output
+
+    @patch('pockette.pocket_tabs.webbrowser.open')
+    def test_read(self, mock_open: MagicMock, mock_post: MagicMock, daemon: PocketDaemon):
+        """Test opening links through the daemon."""
+        runner = CliRunner()
+        result = runner.invoke(read, args=['--count', '2'])
+
+        assert result.exit_code == 0
+        assert daemon.request_count == 1
+        assert mock_open.call_count == 4
+
+    @patch('pockette.pocket_tabs.webbrowser.open')
+    def test_read_tabs_in_client(self, mock_open: MagicMock, mock_post: MagicMock, daemon: PocketDaemon):
+        """Test that the daemon only returns the URLs of the tabs, for the client to open."""
+        response = daemon.answer({
+            'method': 'search_pocket_data', 'options': daemon.options,
+            'kwargs': {'count': 2, 'open_sites': True, 'max_tabs': 3, 'defer_tabs': True},
+        })
+
+        assert response['exit_code'] == 0
+        assert not mock_open.called
+        assert len(response['result']) == 2
+        assert [len(urls) for urls in response['result']] == [2, 1]
+        assert response['result'][0][0].startswith(PocketDataHandler.read_url)
+
+    @pytest.mark.parametrize('args', [
+        ['--offline'], ['--cache-ttl', '5'], ['--cache-hard-ttl', '5'], ['--cache-codec', 'gzip'],
+        ['--http-client', 'asyncio'],
+    ])
+    def test_other_options(self, mock_post: MagicMock, daemon: PocketDaemon, fake_pocket_response: MagicMock,
+                           args: list):
+        """Test that queries with other local snapshot options are answered in this process."""
+        mock_post.return_value = fake_pocket_response
+
+        with patch('pockette.cli._create_pocket_data_handler', wraps=_create_pocket_data_handler) as mock_handler:
+            result = CliRunner().invoke(search, args=args)
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert daemon.request_count == 1
+        assert mock_handler.called
+
+    def test_refresh(self, mock_post: MagicMock, daemon: PocketDaemon, isolated_data_file: str):
+        """Test that the daemon picks up a new local snapshot when it refreshes."""
+        cache = PocketCache(isolated_data_file)
+        pocket_data = cache.load()
+        assert pocket_data is not None
+        pocket_data['list'] = dict(list(pocket_data['list'].items())[:3])
+        cache.save(pocket_data)
+
+        runner = CliRunner()
+        assert 'Pages found (44)' in runner.invoke(search).output
+
+        daemon.refresh()
+        assert 'Pages found (3)' in runner.invoke(search).output
+
+    @pytest.mark.parametrize('error', [SystemExit(1), PocketSyncError('ERROR loading Pocket data: No response')])
+    def test_refresh_failed(self, mock_post: MagicMock, daemon: PocketDaemon, error: BaseException):
+        """Test that the daemon keeps its data when refreshing fails, without adding the error to replies."""
+        handler = daemon.handler
+        daemon.create_handler = MagicMock(side_effect=error)
+
+        daemon.refresh()
+
+        assert daemon.handler is handler
+        assert 'ERROR' not in daemon.answer({'method': 'search_pocket_data', 'options': daemon.options})['output']
+
+    def test_refresh_store(self, mock_post: MagicMock, socket_path: str, isolated_data_file: str, mock_env_vars,
+                           fake_pocket_response: MagicMock):
+        """Test that a SQLite store loaded on the refresh thread can be queried on the serving thread."""
+        mock_post.return_value = fake_pocket_response
+        PocketDataHandler(data_file=isolated_data_file, store='sqlite')
+
+        def create_handler(sync_now: bool) -> PocketDataHandler:
+            return PocketDataHandler(data_file=isolated_data_file, store='sqlite', offline=True)
+
+        pocket_daemon = PocketDaemon(
+            socket_path, create_handler=create_handler,
+            options=_get_options(isolated_data_file, store='sqlite'), refresh_interval=3600
+        )
+        pocket_daemon.poll_interval = 0.01
+        thread = threading.Thread(target=pocket_daemon.serve)
+        thread.start()
+
+        try:
+            refresh_thread = threading.Thread(target=pocket_daemon.refresh)
+            refresh_thread.start()
+            refresh_thread.join()
+
+            result = CliRunner().invoke(search, args=['--store', 'sqlite'])
+        finally:
+            pocket_daemon.shutdown()
+            thread.join()
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert pocket_daemon.request_count == 1
+
+    def test_other_data_file(self, mock_post: MagicMock, daemon: PocketDaemon, fake_pocket_response: MagicMock,
+                             tmp_path):
+        """Test that queries for another local snapshot are answered in this process."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--data-file', str(tmp_path / 'other.json')])
+
+        assert result.exit_code == 0
+        assert daemon.request_count == 1
+        assert mock_post.call_count == 1
+
+    def test_refresh_option(self, mock_post: MagicMock, daemon: PocketDaemon, fake_pocket_response: MagicMock):
+        """Test that syncing now happens in this process."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--refresh'])
+
+        assert result.exit_code == 0
+        assert daemon.request_count == 0
+        assert mock_post.call_count == 1
+
+    def test_already_running(self, mock_post: MagicMock, daemon: PocketDaemon, socket_path: str):
+        """Test that a second daemon doesn't take over the socket."""
+        with pytest.raises(OSError):
+            PocketDaemon(socket_path, create_handler=MagicMock(), options={}, refresh_interval=1)
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestDaemonFallback:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test that commands run in this process when no daemon is running."""
+
+    def test_no_daemon(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                       socket_path: str):
+        """Test that commands run without a daemon."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(search)
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+
+    def test_stale_socket(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                          socket_path: str, isolated_data_file: str):
+        """Test that a socket left behind by a stopped daemon is ignored, and replaced by the next daemon."""
+        mock_post.return_value = fake_pocket_response
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale_socket:
+            stale_socket.bind(socket_path)
+
+        result = CliRunner().invoke(search)
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+
+        pocket_daemon = PocketDaemon(
+            socket_path, create_handler=MagicMock(), options={}, refresh_interval=1
+        )
+        pocket_daemon.server_close()
+        assert not os.path.exists(socket_path)
+
+    def test_no_answer(self, mock_post: MagicMock, mock_env_vars, socket_path: str):
+        """Test that a command isn't run again in this process when the daemon stops before answering it."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+            server_socket.bind(socket_path)
+            server_socket.listen(1)
+
+            def accept():
+                connection, _ = server_socket.accept()
+                with connection, connection.makefile('rb') as f_in:
+                    f_in.readline()
+
+            thread = threading.Thread(target=accept)
+            thread.start()
+            result = CliRunner().invoke(search)
+            thread.join()
+
+        assert result.exit_code == 1
+        assert 'stopped before it answered' in result.output
+        assert not mock_post.called
@@ -0,0 +1,36 @@
+"""Test that the CLI only imports what each command needs."""
+
+import subprocess
+import sys
+
+import pytest
+
+# Modules that are slow to import, and only needed to load or sync Pocket data
+HEAVY_MODULES = [
+    'numpy', 'requests', 'webbrowser', 'pockette.pocket_client', 'pockette.pocket_handler',
+    'pockette.pocket_setup',
+]
+
+
+def _get_imported_modules(code: str) -> list:
+    """Run code in a fresh process, and get the heavy modules that it imported."""
+    # The modules are printed on the last line, after anything the code prints
+    output = subprocess.run(
+        [sys.executable, '-c', f'{code}\nimport sys\nprint("\\n" + ",".join(m for m in {HEAVY_MODULES!r} '
+                               'if m in sys.modules))'],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return [module for module in output.splitlines()[-1].split(',') if module]
+
+
+@pytest.mark.parametrize('args', [[], ['--version'], ['help'], ['search', '--help'], ['read', '--help']])
+def test_cli_imports(args: list):
+    """Test that importing the CLI, and commands that don't load Pocket data, don't import heavy modules."""
+    code = f'from pockette.cli import cli\ntry:\n    cli({args!r})\nexcept SystemExit:\n    pass'
+
+    assert not _get_imported_modules(code)
+
+
+def test_handler_imports():
+    """Test that loading Pocket data doesn't import the modules that are only needed to sync it."""
+    assert _get_imported_modules('import pockette.pocket_handler') == ['pockette.pocket_handler']
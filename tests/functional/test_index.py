@@ -0,0 +1,229 @@
+"""Test whole-word keyword matching with the keyword index, and date ranges with the time index."""
+
+from datetime import datetime
+import json
+import os
+import re
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import report, search
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_index import KeywordIndex, TimeIndex
+from pockette.pocket_item import PocketItem
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestTokenMatch:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test searching with --match token."""
+
+    def test_search_include(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that a multi-word keyword matches links with all of its words."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--match', 'token', '--include', 'nytimes.com'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (18)' in result.output
+
+    def test_search_exclude(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test excluding keywords."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--match', 'token', '--exclude', 'nytimes.com'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (26)' in result.output
+
+    def test_search_whole_words(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that partial words only match in substring mode."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        substring_result = runner.invoke(search, args=['--include', 'propub'])
+        token_result = runner.invoke(search, args=['--match', 'token', '--include', 'propub'])
+        word_result = runner.invoke(search, args=['--match', 'token', '--include', 'propublica'])
+
+        assert 'Pages found (2)' in substring_result.output
+        assert 'Pages found (0)' in token_result.output
+        assert 'Pages found (2)' in word_result.output
+
+    def test_report_include(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test the report with whole-word keywords."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(report, args=['--match', 'token', '--include', 'nytimes.com,wired'])
+
+        assert result.exit_code == 0
+        assert '21 unread pages across 2 sites' in result.output
+
+    def test_index_saved(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                         isolated_data_file: str):
+        """Test that the index is saved with the snapshot and reused."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        runner.invoke(search)
+
+        index_file = PocketCache(isolated_data_file).get_index_file('keywords')
+        assert os.path.exists(index_file)
+
+        with patch('pockette.pocket_handler.KeywordIndex.build') as mock_build:
+            result = runner.invoke(search, args=['--match', 'token', '--include', 'nytimes'])
+
+        assert 'Pages found (18)' in result.output
+        assert not mock_build.called
+
+    def test_index_outdated(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                            isolated_data_file: str):
+        """Test that an index from an older snapshot is rebuilt."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        runner.invoke(search)
+
+        cache = PocketCache(isolated_data_file)
+        pocket_data = cache.load()
+        assert pocket_data is not None
+        cache.snapshot_id = 'other'
+        cache.save_index('keywords', KeywordIndex({}, 44).to_dict())
+
+        result = runner.invoke(search, args=['--offline', '--match', 'token', '--include', 'nytimes'])
+
+        assert 'Pages found (18)' in result.output
+
+
+class TestKeywordIndex:
+    """Test the keyword index directly."""
+
+    def test_search(self):
+        """Test unions across keywords and intersections across the words of a keyword."""
+        index = KeywordIndex.build([
+            PocketItem('1', 'Running in Texas', 'https://a.com/run', '', 1),
+            PocketItem('2', 'Texas Politics', 'https://b.com/texas', '', 2),
+            PocketItem('3', 'Running shoes', 'https://c.com/shoes', '', 3),
+        ])
+
+        assert index.search('texas') == {0, 1}
+        assert index.search('running texas') == {0}
+        assert index.search('shoes, politics') == {1, 2}
+        assert index.search('Texas Politics') == {1}
+        assert not index.search('run texas politics')
+
+    def test_search_empty_keyword(self):
+        """Test that a keyword without words matches everything, like an empty substring."""
+        index = KeywordIndex.build([PocketItem('1', 'Title', 'https://a.com', '', 1)])
+
+        assert index.search('missing,') == {0}
+
+    def test_round_trip(self):
+        """Test saving and loading an index."""
+        index = KeywordIndex.build([PocketItem('1', 'Title', 'https://a.com', '', 1)])
+
+        assert KeywordIndex.from_dict(json.loads(json.dumps(index.to_dict()))).search('title') == {0}
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestTimeOrder:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test searching with the time index."""
+
+    def test_search_order(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that date ranges and the default time order match filtering and sorting the links directly."""
+        mock_post.return_value = fake_pocket_response
+        links = json.loads(fake_pocket_response.text)['list'].values()
+        start_time = datetime(2020, 1, 1).timestamp()
+        end_time = datetime(2020, 6, 12).timestamp()
+
+        def get_item_ids(output: str) -> list:
+            return re.findall(r'/read/(\d+)', output)
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--all'])
+
+        assert result.exit_code == 0
+        assert get_item_ids(result.output) == [
+            link['item_id'] for link in reversed(sorted(links, key=lambda link: int(link['time_added'])))
+        ]
+
+        result = runner.invoke(search, args=['--all', '--start', '2020-01-01', '--end', '2020-06-12'])
+
+        assert result.exit_code == 0
+        assert get_item_ids(result.output) == [
+            link['item_id'] for link in reversed(sorted(links, key=lambda link: int(link['time_added'])))
+            if start_time < int(link['time_added']) < end_time
+        ]
+        assert 'Pages found (12)' in result.output
+
+    def test_index_saved(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                         isolated_data_file: str):
+        """Test that the index is saved with the snapshot and reused."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        runner.invoke(search)
+
+        assert os.path.exists(PocketCache(isolated_data_file).get_index_file('time'))
+
+        with patch('pockette.pocket_handler.TimeIndex.build') as mock_build:
+            result = runner.invoke(search, args=['--offline', '--start', '2020-01-01'])
+
+        assert result.exit_code == 0
+        assert not mock_build.called
+
+
+class TestTimeIndex:
+    """Test the time index directly."""
+
+    @pytest.fixture
+    def index(self) -> TimeIndex:
+        """Get an index over items added out of order, two at the same time."""
+        return TimeIndex.build([
+            PocketItem('1', 'C', 'https://a.com/c', '', 30),
+            PocketItem('2', 'A', 'https://a.com/a', '', 10),
+            PocketItem('3', 'B1', 'https://a.com/b1', '', 20),
+            PocketItem('4', 'B2', 'https://a.com/b2', '', 20),
+        ])
+
+    def test_search(self, index: TimeIndex):
+        """Test that ranges are exclusive and oldest first, with ties in their original order."""
+        assert index.search() == [1, 2, 3, 0]
+        assert index.search(start_time=10) == [2, 3, 0]
+        assert index.search(end_time=30) == [1, 2, 3]
+        assert index.search(start_time=10, end_time=30) == [2, 3]
+        assert index.search(start_time=15.5, end_time=25.5) == [2, 3]
+        assert not index.search(start_time=20, end_time=30)
+        assert not index.search(start_time=40)
+
+    def test_search_newest_first(self, index: TimeIndex):
+        """Test that ranges can be read newest first, with ties in reverse order like a stable reverse sort."""
+        assert index.search(newest_first=True) == [0, 3, 2, 1]
+        assert index.search(start_time=10, end_time=30, newest_first=True) == [3, 2]
+
+    def test_search_view(self, index: TimeIndex):
+        """Test that a range is a view of the index, so only the positions that are used are read."""
+        read = []
+
+        class Positions(list):
+            """Positions that keep track of which are read."""
+
+            def __getitem__(self, i):
+                read.append(i)
+                return super().__getitem__(i)
+
+        index.positions = Positions(index.positions)
+        positions = index.search(start_time=10, newest_first=True)
+        assert not read
+
+        assert len(positions) == 3
+        assert positions[:2] == [0, 3]
+        assert positions[-1] == 2
+        assert read == [3, 2, 1]
+
+    def test_round_trip(self, index: TimeIndex):
+        """Test saving and loading an index."""
+        assert TimeIndex.from_dict(json.loads(json.dumps(index.to_dict()))).search(start_time=15) == [2, 3, 0]
@@ -0,0 +1,53 @@
+"""Test Pocket item records."""
+
+import pytest
+
+from pockette.pocket_item import PocketItem
+
+
+class TestPocketItem:  # pylint: disable=redefined-outer-name
+    """Test Pocket item records."""
+
+    def test_from_dict(self, fake_pocket_data: dict):
+        """Test that API fields are parsed once."""
+        item = PocketItem.from_dict(fake_pocket_data['list']['3015809930'])
+
+        assert item.item_id == '3015809930'
+        assert item.title == 'Yes, We Mean Literally Abolish the Police'
+        assert item.time_added == 1592013579
+        assert item.time_to_read == 6
+        assert item.word_count == 1362
+        assert item.favorite is False
+        assert item.domain == 'www.nytimes.com'
+        assert 'abolish the police' in item.search_text
+        assert 'https://www.nytimes.com/' in item.search_text
+
+    def test_slots(self, fake_pocket_data: dict):
+        """Test that items don't carry a per-instance dictionary."""
+        item = PocketItem.from_dict(fake_pocket_data['list']['3015809930'])
+
+        assert not hasattr(item, '__dict__')
+        with pytest.raises(AttributeError):
+            item.images = {}  # type: ignore[attr-defined]  # pylint: disable=assigning-non-slot
+
+    def test_from_dict_missing_fields(self):
+        """Test links with missing or unresolved fields, which only use the resolved title and URL."""
+        item = PocketItem.from_dict({
+            'item_id': '1', 'resolved_url': 'example.com/page', 'given_title': 'Example', 'time_added': '5'
+        })
+
+        assert item.title == ''
+        assert item.url == 'example.com/page'
+        assert item.excerpt == ''
+        assert item.time_added == 5
+        assert item.time_to_read is None
+        assert item.domain == 'example.com'
+
+    def test_search_text_separates_fields(self):
+        """Test that a keyword can't match across the end of one field and the start of the next."""
+        item = PocketItem.from_dict({
+            'item_id': '1', 'resolved_title': 'Police', 'resolved_url': 'https://example.com', 'time_added': '5'
+        })
+
+        assert 'police' in item.search_text
+        assert 'policehttps' not in item.search_text
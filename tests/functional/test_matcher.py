@@ -0,0 +1,64 @@
+"""Test substring keyword matching."""
+
+import pytest
+
+from pockette.pocket_item import PocketItem
+from pockette.pocket_matcher import KeywordMatcher
+
+
+@pytest.fixture
+def fake_pocket_items(fake_pocket_data: dict) -> list:
+    """Get fake Pocket items."""
+    return [PocketItem.from_dict(link) for link in fake_pocket_data['list'].values()]
+
+
+def _is_match(keywords: str, item: PocketItem) -> bool:
+    """Match keywords one at a time, like the original nested loops."""
+    components = [component.lower() for component in (item.title, item.url, item.excerpt)]
+    return any(keyword.strip() in component for keyword in keywords.lower().split(',') for component in components)
+
+
+class TestKeywordMatcher:  # pylint: disable=redefined-outer-name
+    """Test substring keyword matching."""
+
+    @pytest.mark.parametrize('keywords', [
+        'nytimes.com',
+        'Police, Running ,texas',
+        'propub,wired.com/story,(video)',
+        '2020/06,c++,a.b*c',
+        'not-found-anywhere',
+    ])
+    def test_same_as_nested_loops(self, fake_pocket_items: list, keywords: str):
+        """Test that the compiled matcher matches exactly what the nested loops matched."""
+        matcher = KeywordMatcher(keywords)
+
+        for item in fake_pocket_items:
+            assert matcher.is_match(item.search_text) == _is_match(keywords, item)
+
+    @pytest.mark.parametrize('keywords', [
+        'nytimes.com,' + ','.join(f'missing-{i}' for i in range(30)),
+        ','.join(f'missing-{i}' for i in range(30)),
+    ])
+    def test_automaton_same_as_nested_loops(self, fake_pocket_items: list, keywords: str):
+        """Test that the Aho-Corasick automaton, used for many keywords, matches exactly what the loops matched."""
+        pytest.importorskip('ahocorasick')
+        matcher = KeywordMatcher(keywords)
+        assert matcher.automaton is not None
+
+        for item in fake_pocket_items:
+            assert matcher.is_match(item.search_text) == _is_match(keywords, item)
+
+    def test_empty_keyword(self, fake_pocket_items: list):
+        """Test that an empty keyword, e.g. from a trailing comma, matches everything."""
+        matcher = KeywordMatcher('not-found-anywhere,')
+
+        assert all(matcher.is_match(item.search_text) for item in fake_pocket_items)
+
+    def test_special_characters(self):
+        """Test that keywords are matched literally."""
+        matcher = KeywordMatcher('a.b, (c)')
+
+        assert matcher.is_match('x a.b y')
+        assert not matcher.is_match('x axb y')
+        assert matcher.is_match('(c)')
+        assert not matcher.is_match('c')
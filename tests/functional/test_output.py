@@ -0,0 +1,177 @@
+"""Test machine-readable output with `--output` and `--fields`."""
+
+import csv
+import datetime
+import io
+import json
+import re
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import read, report, search
+from pockette.pocket_matcher import KeywordMatcher
+from pockette.pocket_output import RecordWriter
+from pockette.pocket_render import PocketRenderer
+
+
+SEARCH_ARGS = [
+    [],
+    ['--all'],
+    ['--all', '--reverse'],
+    ['--all', '--sort', 'site'],
+    ['--count', '5', '--offset', '3', '--sort', 'site', '--reverse'],
+    ['--random', '--seed', '1', '--count', '5'],
+    ['--all', '--include', 'police', '--start', '2020-01-01'],
+]
+
+
+class TestRecordWriter:
+    """Test writing records directly."""
+
+    @pytest.mark.parametrize('output,expected', [
+        ('jsonl', '{"title": "A, \\"B\\"", "count": 1}\n{"title": "Tab\\tbed", "count": 2}\n'),
+        ('csv', 'title,count\n"A, ""B""",1\nTab\tbed,2\n'),
+        ('tsv', 'title\tcount\n"A, ""B"""\t1\n"Tab\tbed"\t2\n'),
+    ])
+    def test_formats(self, output: str, expected: str):
+        """Test that each format escapes its separators."""
+        with patch('pockette.pocket_render.click.echo') as mock_echo:
+            with PocketRenderer() as renderer:
+                writer = RecordWriter(renderer, output, ['title', 'count'])
+                writer.write(['A, "B"', 1])
+                writer.write(['Tab\tbed', 2])
+
+        assert mock_echo.call_args.args[0] == expected
+
+    def test_text(self):
+        """Test that text isn't a record format."""
+        with pytest.raises(ValueError):
+            RecordWriter(PocketRenderer(), 'text', ['title'])
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestOutput:  # pylint: disable=redefined-outer-name,unused-argument,too-many-arguments
+    """Test printing search results and reports as records."""
+
+    @pytest.mark.parametrize('store', ['json', 'sqlite'])
+    @pytest.mark.parametrize('args', SEARCH_ARGS)
+    def test_search_jsonl(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock, args: list,
+                          store: str):
+        """Test that the records are the same links, in the same order, as the text results."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        text_result = runner.invoke(search, args=['--store', store] + args)
+        result = runner.invoke(search, args=['--store', store, '--output', 'jsonl'] + args)
+
+        assert result.exit_code == 0
+        records = [json.loads(line) for line in result.output.splitlines()]
+        assert [record['item_id'] for record in records] == re.findall(r'/read/(\d+)', text_result.output)
+        assert list(records[0]) == ['item_id', 'title', 'url', 'pocket_url', 'time_added']
+        assert records[0]['pocket_url'].endswith(records[0]['item_id'])
+
+    @pytest.mark.parametrize('output,delimiter', [('csv', ','), ('tsv', '\t')])
+    def test_search_fields(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                           output: str, delimiter: str):
+        """Test selecting fields, in the order they are given."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(
+            search, args=['--all', '--output', output, '--fields', 'domain, word_count,favorite,domain']
+        )
+
+        assert result.exit_code == 0
+        rows = list(csv.reader(io.StringIO(result.output), delimiter=delimiter))
+        assert rows[0] == ['domain', 'word_count', 'favorite']
+        assert len(rows) == 45
+        assert all(row[1].isdigit() and row[2] in ('True', 'False') for row in rows[1:])
+
+    @pytest.mark.parametrize('fields', ['nope', 'title,nope', ',', 'section'])
+    def test_search_unknown_fields(self, mock_post: MagicMock, mock_env_vars, fields: str):
+        """Test that unknown fields are rejected before loading any data."""
+        result = CliRunner().invoke(search, args=['--output', 'jsonl', '--fields', fields])
+
+        assert result.exit_code == 2
+        assert 'Invalid value for \'--fields\'' in result.output
+        assert not mock_post.called
+
+    def test_search_streamed(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that links in time order aren't collected into a page first."""
+        mock_post.return_value = fake_pocket_response
+
+        with patch('pockette.pocket_handler.select_page') as mock_select_page:
+            result = CliRunner().invoke(search, args=['--all', '--output', 'jsonl'])
+
+        assert result.exit_code == 0
+        assert len(result.output.splitlines()) == 44
+        assert not mock_select_page.called
+
+    def test_search_stops_early(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that streamed records only filter links until the page is full, while text counts every match."""
+        mock_post.return_value = fake_pocket_response
+        args = ['--include', 'com', '--count', '3']
+
+        is_match = KeywordMatcher.is_match
+        with patch.object(KeywordMatcher, 'is_match', autospec=True, side_effect=is_match) as mock_match:
+            result = CliRunner().invoke(search, args=args + ['--output', 'jsonl'])
+            assert result.exit_code == 0
+            assert len(result.output.splitlines()) == 3
+            assert mock_match.call_count < 44
+
+            # The "Pages found" header needs the total, so every link is checked
+            mock_match.reset_mock()
+            result = CliRunner().invoke(search, args=args)
+            assert result.exit_code == 0
+            assert mock_match.call_count == 44
+
+    def test_read(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that links opened by `read` can be printed as records."""
+        mock_post.return_value = fake_pocket_response
+
+        with patch('pockette.pocket_tabs.webbrowser.open') as mock_open:
+            result = CliRunner().invoke(read, args=['--count', '2', '--output', 'jsonl', '--fields', 'url'])
+
+        assert result.exit_code == 0
+        assert [call.args[0] for call in mock_open.call_args_list][1::2] == [
+            json.loads(line)['url'] for line in result.output.splitlines()
+        ]
+
+    @pytest.mark.parametrize('store', ['json', 'sqlite'])
+    @pytest.mark.parametrize('args', [[], ['--all'], ['--count', '3', '--include', 'police']])
+    @patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
+    def test_report(self, mock_now: MagicMock, mock_post: MagicMock, mock_env_vars,
+                    fake_pocket_response: MagicMock, args: list, store: str):
+        """Test that the report records have the same counts as the text report."""
+        mock_now.return_value = datetime.datetime(2020, 6, 14)
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        text_result = runner.invoke(report, args=['--store', store] + args)
+        result = runner.invoke(report, args=['--store', store, '--output', 'csv'] + args)
+
+        assert result.exit_code == 0
+        rows = list(csv.DictReader(io.StringIO(result.output)))
+        counts = {(row['section'], row['name']): int(row['count']) for row in rows}
+
+        match = re.search(r'([\d,]+) unread pages across ([\d,]+) sites', text_result.output)
+        assert match is not None
+        assert counts[('summary', 'pages')] == int(match.group(1).replace(',', ''))
+        assert counts[('summary', 'sites')] == int(match.group(2).replace(',', ''))
+
+        match = re.search(r'([\d,]+) unread pages older than 1 month', text_result.output)
+        assert match is not None
+        assert counts[('age', 'one_month')] == int(match.group(1).replace(',', ''))
+        assert [(row['name'], row['count']) for row in rows if row['section'] == 'domain'] == re.findall(
+            r'^ *\d+: (\S+) \((\d+)\)$', text_result.output, flags=re.MULTILINE
+        )
+
+    def test_report_fields(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test selecting report fields."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(report, args=['--output', 'jsonl', '--fields', 'name,count'])
+
+        assert result.exit_code == 0
+        assert json.loads(result.output.splitlines()[0]) == {'name': 'pages', 'count': 44}
@@ -1,39 +1,15 @@
 """Test reading Pocket data with the `pockette read` command."""
 
-import json
-import os
 from unittest.mock import patch, MagicMock
 
 from click.testing import CliRunner
-import pytest
 
-from pockette import DATA_FILE, COUNT_DEFAULT
+from pockette import COUNT_DEFAULT
 from pockette.cli import read
 
 
-@pytest.fixture
-def mock_env_vars(monkeypatch):
-    """Temporarily set environment variables."""
-    monkeypatch.setenv("POCKET_CONSUMER_KEY", "consumer_key")
-    monkeypatch.setenv("POCKET_ACCESS_TOKEN", "access_token")
-
-
-@pytest.fixture
-def fake_pocket_response(scope="module") -> MagicMock:  # pylint: disable=unused-argument
-    """Get fake Pocket response."""
-    response = MagicMock()
-
-    fake_pocket_response_file = os.path.realpath(
-        os.path.join(os.path.dirname(DATA_FILE), '..', 'tests', 'data', 'pocket.json')
-    )
-    with open(fake_pocket_response_file, 'r', encoding='utf-8') as f_in:
-        response.text = json.dumps(json.load(f_in))
-
-    return response
-
-
-@patch('pockette.pocket_handler.webbrowser.open')
-@patch('pockette.pocket_handler.requests.post')
+@patch('pockette.pocket_tabs.webbrowser.open')
+@patch('pockette.pocket_client.requests.Session.post')
 class TestRead:  # pylint: disable=redefined-outer-name,unused-argument
     """Test reading Pocket data."""
 
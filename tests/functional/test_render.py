@@ -0,0 +1,83 @@
+"""Test writing output in buffered chunks."""
+
+import re
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import report, search
+from pockette.pocket_render import PocketRenderer, truncate
+
+
+class TestRenderer:
+    """Test the renderer directly."""
+
+    @pytest.mark.parametrize('text,width,truncated', [
+        ('Short title', 20, 'Short title'),
+        ('Exactly twenty chars', 20, 'Exactly twenty chars'),
+        ('The quick brown fox jumps over', 20, 'The quick brown...'),
+        ('The quick brown foxes jump', 20, 'The quick brown...'),
+        ('The quick brownish fox jumps', 20, 'The quick...'),
+        ('Supercalifragilisticexpialidocious', 20, '...'),
+        ('A supercalifragilisticexpialidocious', 20, 'A...'),
+    ])
+    def test_truncate(self, text: str, width: int, truncated: str):
+        """Test that long text is cut at a word boundary, leaving room for the placeholder."""
+        assert truncate(text, width) == truncated
+        assert len(truncated) <= width
+
+    def test_chunks(self):
+        """Test that lines are written together once they fill a chunk, and the rest on exit."""
+        with patch('pockette.pocket_render.click.echo') as mock_echo:
+            with PocketRenderer() as renderer:
+                renderer.chunk_size = 10
+
+                for i in range(5):
+                    renderer.echo(f'line {i}')
+
+                assert mock_echo.call_count == 2
+                assert mock_echo.call_args_list[0].args == ('line 0\nline 1\n',)
+
+            assert mock_echo.call_count == 3
+            assert ''.join(call.args[0] for call in mock_echo.call_args_list) == ''.join(
+                f'line {i}\n' for i in range(5)
+            )
+
+    def test_broken_pipe(self):
+        """Test that output to a closed pipe exits without a traceback."""
+        with patch('pockette.pocket_render.click.echo', side_effect=BrokenPipeError), \
+                patch('pockette.pocket_render.os.dup2') as mock_dup2:
+            with pytest.raises(SystemExit) as error:
+                with PocketRenderer() as renderer:
+                    renderer.echo('line')
+
+        assert error.value.code == 1
+        assert mock_dup2.called
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestRenderedCommands:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test that commands write their output in a single chunk."""
+
+    def test_search_all(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that every link is written at once."""
+        mock_post.return_value = fake_pocket_response
+
+        with patch('pockette.pocket_render.click.echo') as mock_echo:
+            result = CliRunner().invoke(search, args=['--all'])
+
+        assert result.exit_code == 0
+        assert mock_echo.call_count == 1
+        assert len(re.findall(r'/read/(\d+)', mock_echo.call_args.args[0])) == 44
+
+    def test_report_all(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that the report is written at once."""
+        mock_post.return_value = fake_pocket_response
+
+        with patch('pockette.pocket_render.click.echo') as mock_echo:
+            result = CliRunner().invoke(report, args=['--all'])
+
+        assert result.exit_code == 0
+        assert mock_echo.call_count == 1
+        assert 'Most-common websites' in mock_echo.call_args.args[0]
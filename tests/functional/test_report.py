@@ -1,40 +1,19 @@
 """Test summarizing Pocket data with the `pockette report` command."""
 
 import datetime
-import json
-import os
 from unittest.mock import patch, MagicMock
 
 from click.testing import CliRunner
 import pytest
 
-from pockette import DATA_FILE
 from pockette.cli import report
-
-
-@pytest.fixture
-def mock_env_vars(monkeypatch):
-    """Temporarily set environment variables."""
-    monkeypatch.setenv("POCKET_CONSUMER_KEY", "consumer_key")
-    monkeypatch.setenv("POCKET_ACCESS_TOKEN", "access_token")
-
-
-@pytest.fixture
-def fake_pocket_response(scope="module") -> MagicMock:  # pylint: disable=unused-argument
-    """Get fake Pocket response."""
-    response = MagicMock()
-
-    fake_pocket_response_file = os.path.realpath(
-        os.path.join(os.path.dirname(DATA_FILE), '..', 'tests', 'data', 'pocket.json')
-    )
-    with open(fake_pocket_response_file, 'r', encoding='utf-8') as f_in:
-        response.text = json.dumps(json.load(f_in))
-
-    return response
+from pockette.pocket_columns import PocketColumns
+from pockette.pocket_item import PocketItem
+from pockette.pocket_report import AgeCounts, DomainCounts, LinkCount, ReportAggregator, ReportMetric
 
 
 @patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
-@patch('pockette.pocket_handler.requests.post')
+@patch('pockette.pocket_client.requests.Session.post')
 class TestReport:  # pylint: disable=too-few-public-methods,redefined-outer-name,unused-argument
     """Test Pocket data report."""
 
@@ -305,3 +284,70 @@ class TestReport:  # pylint: disable=too-few-public-methods,redefined-outer-name
         assert '3: www.theatlantic.com (2)' in result.output
         assert '4: www.propublica.org (1)' in result.output
         assert '5: www.themarshallproject.org (1)' in result.output
+
+
+class TestReportAggregator:
+    """Test computing report metrics directly."""
+
+    items = [
+        PocketItem('1', 'A', 'https://a.com/1', '', 100),
+        PocketItem('2', 'B', 'https://b.com/1', '', 200, favorite=True),
+        PocketItem('3', 'A', 'https://a.com/2', '', 300),
+        PocketItem('4', 'C', 'https://c.com/1', '', 400, favorite=True),
+    ]
+    cutoffs = {'old': 250.0, 'older': 200.0, 'oldest': 150.0}
+
+    def get_metrics(self, indices: list, columns=None) -> dict:
+        """Aggregate the built-in metrics."""
+        aggregator = ReportAggregator({
+            'total': LinkCount(),
+            'domains': DomainCounts(),
+            'ages': AgeCounts(self.cutoffs),
+        })
+        return aggregator.aggregate(self.items, indices, columns=columns)
+
+    def test_aggregate(self):
+        """Test that every metric is computed, with exclusive cutoffs and domains in order of first appearance."""
+        metrics = self.get_metrics([3, 0, 1, 2])
+
+        assert metrics['total'] == 4
+        assert list(metrics['domains'].items()) == [('c.com', 1), ('a.com', 2), ('b.com', 1)]
+        assert metrics['ages'] == {'old': 2, 'older': 1, 'oldest': 1}
+
+    def test_aggregate_columns(self):
+        """Test that NumPy columns give the same metrics."""
+        pytest.importorskip('numpy')
+        columns = PocketColumns(self.items)
+
+        for indices in ([3, 0, 1, 2], [1, 2], []):
+            assert self.get_metrics(indices, columns=columns) == self.get_metrics(indices)
+
+    def test_custom_metric(self):
+        """Test that new metrics are computed in the same pass as the built-in ones."""
+        class FavoriteCount(ReportMetric):
+            """Count the favorite items."""
+
+            def __init__(self):
+                self.count = 0
+
+            def add(self, item: PocketItem):
+                self.count += item.favorite
+
+            def get_result(self) -> int:
+                return self.count
+
+        # A second pass over a one-time iterator would see no items
+        aggregator = ReportAggregator({'total': LinkCount(), 'favorites': FavoriteCount()})
+
+        assert aggregator.aggregate(self.items, iter([0, 1, 2, 3])) == {'total': 4, 'favorites': 2}
+
+    def test_incomplete_metric(self):
+        """Test that a metric without a result can't be created."""
+        class FavoriteCount(ReportMetric):  # pylint: disable=abstract-method
+            """Count the favorite items, without a result."""
+
+            def add(self, item: PocketItem):
+                pass
+
+        with pytest.raises(TypeError):
+            FavoriteCount()  # type: ignore[abstract]  # pylint: disable=abstract-class-instantiated
@@ -0,0 +1,130 @@
+"""Test drawing random links with --random."""
+
+import json
+import random
+import re
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import search
+from pockette.pocket_sample import sample
+
+
+def get_item_ids(output: str) -> list:
+    """Get the item IDs of the links in the output."""
+    return re.findall(r'/read/(\d+)', output)
+
+
+class TestSample:
+    """Test the sampling functions directly."""
+
+    @pytest.mark.parametrize('count', [0, 1, 3, 10, 20, None])
+    def test_sample(self, count: int):
+        """Test that samples have distinct items and the total number of items."""
+        items, total = sample(iter(range(10)), count=count, rng=random.Random(0))
+
+        assert total == 10
+        assert len(items) == min(10 if count is None else count, 10)
+        assert len(set(items)) == len(items)
+        assert set(items) <= set(range(10))
+
+    def test_uniform(self):
+        """Test that every item is drawn about equally often."""
+        rng = random.Random(0)
+        counts = [0] * 20
+
+        for _ in range(10000):
+            for item in sample(range(20), count=5, rng=rng)[0]:
+                counts[item] += 1
+
+        # Each item is expected 2,500 times
+        assert min(counts) > 2300
+        assert max(counts) < 2700
+
+    def test_weighted(self):
+        """Test that items are drawn in proportion to their weight, and that unweighted items are never drawn."""
+        rng = random.Random(0)
+        weights = {0: 0.0, 1: 1.0, 2: 3.0}
+        counts = [0] * 3
+
+        for _ in range(10000):
+            items, total = sample(range(3), count=1, rng=rng, weight=weights.__getitem__)
+            counts[items[0]] += 1
+
+        assert total == 3
+        assert counts[0] == 0
+        assert 7200 < counts[2] < 7800
+
+    def test_seed(self):
+        """Test that the same seed draws the same items."""
+        def draw(seed: int) -> tuple:
+            return sample(range(100), count=5, rng=random.Random(seed))
+
+        assert draw(1) == draw(1)
+        assert draw(1) != draw(2)
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestSearchRandom:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test searching with --random."""
+
+    def test_search_seed(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that --seed picks the same links again."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--random', '--seed', '1'])
+        same_result = runner.invoke(search, args=['--random', '--seed', '1'])
+        other_result = runner.invoke(search, args=['--random', '--seed', '2'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert len(get_item_ids(result.output)) == 10
+        assert result.output == same_result.output
+        assert result.output != other_result.output
+
+    def test_search_all(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that --random with --all shuffles every link."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        default_item_ids = get_item_ids(runner.invoke(search, args=['--all']).output)
+        random_item_ids = get_item_ids(runner.invoke(search, args=['--all', '--random', '--seed', '1']).output)
+
+        assert sorted(random_item_ids) == sorted(default_item_ids)
+        assert random_item_ids != default_item_ids
+
+    def test_search_prefer(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that links from the preferred domains are picked more often."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        results = [
+            runner.invoke(search, args=['--random', '--seed', str(seed), '--count', '5', '--prefer', 'wired.com'])
+            for seed in range(20)
+        ]
+
+        # Wired has 3 of the 44 links
+        wired_count = sum(result.output.count('https://www.wired.com/') for result in results)
+        assert wired_count > 20 * 5 * 3 / 44 * 2
+
+    def test_search_older(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock):
+        """Test that older links are picked more often with --weight older."""
+        mock_post.return_value = fake_pocket_response
+        links = json.loads(fake_pocket_response.text)['list'].values()
+        oldest_item_ids = {
+            link['item_id'] for link in sorted(links, key=lambda link: int(link['time_added']))[:22]
+        }
+
+        runner = CliRunner()
+        old_count = 0
+        for seed in range(20):
+            result = runner.invoke(
+                search, args=['--random', '--seed', str(seed), '--count', '5', '--weight', 'older']
+            )
+            assert result.exit_code == 0
+            old_count += len(oldest_item_ids.intersection(get_item_ids(result.output)))
+
+        assert old_count > 20 * 5 * 0.6
@@ -1,38 +1,13 @@
 """Test searching Pocket data with the `pockette search` command."""
 
-import json
-import os
 from unittest.mock import patch, MagicMock
 
 from click.testing import CliRunner
-import pytest
 
-from pockette import DATA_FILE
 from pockette.cli import search
 
 
-@pytest.fixture
-def mock_env_vars(monkeypatch):
-    """Temporarily set environment variables."""
-    monkeypatch.setenv("POCKET_CONSUMER_KEY", "consumer_key")
-    monkeypatch.setenv("POCKET_ACCESS_TOKEN", "access_token")
-
-
-@pytest.fixture
-def fake_pocket_response(scope="module") -> MagicMock:  # pylint: disable=unused-argument
-    """Get fake Pocket response."""
-    response = MagicMock()
-
-    fake_pocket_response_file = os.path.realpath(
-        os.path.join(os.path.dirname(DATA_FILE), '..', 'tests', 'data', 'pocket.json')
-    )
-    with open(fake_pocket_response_file, 'r', encoding='utf-8') as f_in:
-        response.text = json.dumps(json.load(f_in))
-
-    return response
-
-
-@patch('pockette.pocket_handler.requests.post')
+@patch('pockette.pocket_client.requests.Session.post')
 class TestSearch:  # pylint: disable=redefined-outer-name,unused-argument
     """Test searching Pocket data."""
 
@@ -73,6 +48,7 @@ class TestSearch:  # pylint: disable=redefined-outer-name,unused-argument
         """Test handling bad Pocket data JSON response."""
         response = MagicMock()
         response.text = '{"invalid": "json"'
+        response.iter_content.return_value = [response.text.encode('utf-8')]
 
         mock_post.return_value = response
 
@@ -104,6 +80,18 @@ class TestSearch:  # pylint: disable=redefined-outer-name,unused-argument
         assert 'Pages found (18)' in result.output
         assert 'nytimes.com' in result.output
 
+    def test_search_include_resolved_title(self, mock_post: MagicMock, mock_env_vars,
+                                           fake_pocket_response: dict):
+        """Test that keywords only match the resolved title, not the title given when the link was saved."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--include', 'the', '--all'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (40)' in result.output
+        assert 'Robert Caro' not in result.output
+
     def test_search_exclude(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: dict):
         """Test searching Pocket data with the --exclude option."""
         mock_post.return_value = fake_pocket_response
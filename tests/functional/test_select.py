@@ -0,0 +1,117 @@
+"""Test selecting the first items of a sort order."""
+
+import heapq
+import random
+import re
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import search
+from pockette.pocket_index import PositionSlice, TimeIndex
+from pockette.pocket_select import select_largest, select_page, select_smallest
+
+
+class TestSelect:
+    """Test the selection functions directly."""
+
+    @pytest.mark.parametrize('count', [None, 0, 1, 5, 99, 100, 200])
+    def test_same_as_sorting(self, count: int):
+        """Test that the selected items, including items with equal keys, are the same as sorting all of them."""
+        random.seed(0)
+        items = [(random.randint(0, 9), i) for i in range(100)]
+
+        def key(item):
+            return item[0]
+
+        assert select_smallest(items, key=key, count=count) == sorted(items, key=key)[:count]
+        assert select_largest(items, key=key, count=count) == list(reversed(sorted(items, key=key)))[:count]
+
+    def test_heap(self):
+        """Test that a heap is used only when fewer items are needed than there are."""
+        items = list(range(10))
+
+        with patch('pockette.pocket_select.heapq.nsmallest', wraps=heapq.nsmallest) as mock_nsmallest:
+            select_smallest(items, key=int, count=10)
+            assert not mock_nsmallest.called
+
+            select_smallest(items, key=int, count=3)
+            assert mock_nsmallest.called
+
+    @pytest.mark.parametrize('offset,count,page', [
+        (0, 3, [0, 1, 2]), (8, 5, [8, 9]), (20, 5, []), (7, None, [7, 8, 9])
+    ])
+    def test_page(self, offset: int, count: int, page: list):
+        """Test that pages of lists and generators are the same."""
+        assert select_page(list(range(10)), offset=offset, count=count) == (page, 10)
+        assert select_page((i for i in range(10)), offset=offset, count=count) == (page, 10)
+
+    def test_page_lazy(self):
+        """Test that items after the page are counted without being kept."""
+        pulled = []
+
+        def get_items():
+            for i in range(10):
+                pulled.append(i)
+                yield [i]
+
+        page, total = select_page(get_items(), offset=2, count=2)
+
+        assert page == [[2], [3]]
+        assert total == 10
+        assert len(pulled) == 10
+
+    def test_page_sequence(self):
+        """Test that a page of a sequence, like a date range of the time index, only reads the page."""
+        positions = TimeIndex(list(range(100)), list(range(100))).search(newest_first=True)
+
+        with patch.object(PositionSlice, '__iter__') as mock_iter:
+            page, total = select_page(positions, offset=10, count=3)
+
+        assert page == [89, 88, 87]
+        assert total == 100
+        assert not mock_iter.called
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestSearchWindow:  # pylint: disable=redefined-outer-name,unused-argument,too-few-public-methods
+    """Test that pages of search results are the same as slices of all of the results."""
+
+    @pytest.mark.parametrize('sort_args', [['--sort', 'site'], ['--sort', 'site', '--reverse'], ['--reverse'], []])
+    def test_search_window(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                           sort_args: list):
+        """Test a page of results with --count and --offset."""
+        mock_post.return_value = fake_pocket_response
+
+        def get_item_ids(output: str) -> list:
+            return re.findall(r'/read/(\d+)', output)
+
+        runner = CliRunner()
+        all_item_ids = get_item_ids(runner.invoke(search, args=['--all'] + sort_args).output)
+        result = runner.invoke(search, args=['--count', '5', '--offset', '7'] + sort_args)
+
+        assert result.exit_code == 0
+        assert len(all_item_ids) == 44
+        assert get_item_ids(result.output) == all_item_ids[7:12]
+
+    @pytest.mark.parametrize('args', [
+        [], ['--include', 'police'], ['--length', 'short'], ['--start', '2020-01-01']
+    ])
+    def test_search_window_filters(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                                   args: list):
+        """Test that filtered pages have the total number of results, and that an offset past them is empty."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        all_result = runner.invoke(search, args=['--all'] + args)
+        all_item_ids = re.findall(r'/read/(\d+)', all_result.output)
+        total_line = all_result.output.splitlines()[1]
+
+        result = runner.invoke(search, args=['--count', '2', '--offset', '1'] + args)
+        assert result.output.splitlines()[1] == total_line
+        assert re.findall(r'/read/(\d+)', result.output) == all_item_ids[1:3]
+
+        result = runner.invoke(search, args=['--offset', '100'] + args)
+        assert result.output.splitlines()[1] == total_line
+        assert not re.findall(r'/read/(\d+)', result.output)
@@ -29,7 +29,7 @@ def fake_oath_authorize_response(scope="module") -> MagicMock:  # pylint: disabl
 class TestSetup:  # pylint: disable=redefined-outer-name
     """Test setting up Pocket CLI."""
 
-    @patch('pockette.pocket_handler.requests.post')
+    @patch('pockette.pocket_client.requests.Session.post')
     def test_setup_new(self, mock_post: MagicMock, monkeypatch, fake_oauth_request_response: MagicMock,
                        fake_oath_authorize_response: MagicMock):
         """Test setting up Pocket CLI for the first time."""
@@ -59,7 +59,7 @@ class TestSetup:  # pylint: disable=redefined-outer-name
         assert result.exit_code == 0
         assert 'Pocket environment variables already configured' in result.output
 
-    @patch('pockette.pocket_handler.requests.post')
+    @patch('pockette.pocket_client.requests.Session.post')
     def test_setup_existing_update(self, mock_post: MagicMock, monkeypatch, fake_oauth_request_response: MagicMock,
                                    fake_oath_authorize_response: MagicMock):
         """Test setting up Pocket CLI when it is already configured."""
@@ -78,7 +78,7 @@ class TestSetup:  # pylint: disable=redefined-outer-name
         assert 'export POCKET_CONSUMER_KEY=CONSUMER_KEY' in result.output
         assert 'export POCKET_ACCESS_TOKEN=ACCESS_TOKEN' in result.output
 
-    @patch('pockette.pocket_handler.requests.post')
+    @patch('pockette.pocket_client.requests.Session.post')
     def test_setup_bad_consumer_key(self, mock_post: MagicMock, monkeypatch):
         """Test that bad /oauth/request responses are caught."""
         monkeypatch.delenv("POCKET_CONSUMER_KEY", raising=False)
@@ -95,7 +95,7 @@ class TestSetup:  # pylint: disable=redefined-outer-name
         result = runner.invoke(_setup, input='CONSUMER_KEY\n')
         assert result.exit_code == 1
 
-    @patch('pockette.pocket_handler.requests.post')
+    @patch('pockette.pocket_client.requests.Session.post')
     def test_setup_bad_request_token(self, mock_post: MagicMock, monkeypatch,
                                      fake_oauth_request_response: MagicMock):
         """Test that bad /oauth/authorize responses are caught."""
@@ -113,3 +113,45 @@ class TestSetup:  # pylint: disable=redefined-outer-name
         runner = CliRunner()
         result = runner.invoke(_setup, input='CONSUMER_KEY\nAnyKey\n')
         assert result.exit_code == 1
+
+    @patch('pockette.pocket_client.time.sleep')
+    @patch('pockette.pocket_client.requests.Session.post')
+    def test_setup_retry(self, mock_post: MagicMock, mock_sleep: MagicMock, monkeypatch,
+                         fake_oauth_request_response: MagicMock, fake_oath_authorize_response: MagicMock):
+        """Test that server errors are retried, with the timeouts from the options."""
+        monkeypatch.delenv("POCKET_CONSUMER_KEY", raising=False)
+        monkeypatch.delenv("POCKET_ACCESS_TOKEN", raising=False)
+
+        unavailable_response = Response()
+        unavailable_response.status_code = 503
+
+        mock_post.side_effect = [
+            unavailable_response,
+            fake_oauth_request_response,
+            fake_oath_authorize_response
+        ]
+
+        runner = CliRunner()
+        result = runner.invoke(_setup, args=['--timeout', '7', '--connect-timeout', '2'],
+                               input='CONSUMER_KEY\nAnyKey\n')
+
+        assert result.exit_code == 0
+        assert 'export POCKET_ACCESS_TOKEN=ACCESS_TOKEN' in result.output
+        assert mock_sleep.call_count == 1
+        assert all(call.kwargs['timeout'] == (2, 7) for call in mock_post.call_args_list)
+
+    @patch('pockette.pocket_client.requests.Session.post')
+    def test_setup_no_retry(self, mock_post: MagicMock, monkeypatch):
+        """Test setting up Pocket CLI without retries."""
+        monkeypatch.delenv("POCKET_CONSUMER_KEY", raising=False)
+        monkeypatch.delenv("POCKET_ACCESS_TOKEN", raising=False)
+
+        unavailable_response = Response()
+        unavailable_response.status_code = 503
+        mock_post.return_value = unavailable_response
+
+        runner = CliRunner()
+        result = runner.invoke(_setup, args=['--retries', '0'], input='CONSUMER_KEY\n')
+
+        assert result.exit_code == 1
+        assert mock_post.call_count == 1
@@ -0,0 +1,142 @@
+"""Test the SQLite store with `--store sqlite`."""
+
+import datetime
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import report, search
+from pockette.pocket_store import PocketStore
+
+
+@pytest.fixture
+def fake_pocket_data(fake_pocket_data: dict) -> dict:  # pylint: disable=redefined-outer-name
+    """Get fake Pocket data with two favorites."""
+    fake_pocket_data['list']['3015809930']['favorite'] = '1'
+    fake_pocket_data['list']['3015173774']['favorite'] = '1'
+
+    return fake_pocket_data
+
+
+SEARCH_ARGS = [
+    [],
+    ['--all'],
+    ['--reverse', '--count', '5', '--offset', '3'],
+    ['--sort', 'site', '--all'],
+    ['--sort', 'site', '--reverse', '--count', '7'],
+    ['--start', '2020-01-01', '--end', '2020-06-12', '--all'],
+    ['--length', 'short', '--all'],
+    ['--length', 'long', '--all'],
+    ['--favorite'],
+    ['--include', 'nytimes.com,wired', '--exclude', 'police', '--all'],
+    ['--include', 'propub'],
+    ['--include', 'missing,'],
+    ['--exclude', 'missing,'],
+    ['--match', 'token', '--include', 'nytimes.com', '--all'],
+    ['--match', 'token', '--include', 'propub'],
+    ['--match', 'token', '--exclude', 'nytimes.com,police', '--sort', 'site'],
+    ['--random', '--seed', '3'],
+    ['--random', '--seed', '3', '--all'],
+    ['--random', '--seed', '3', '--weight', 'older', '--prefer', 'wired.com', '--offset', '2'],
+    ['--offset', '100'],
+]
+
+REPORT_ARGS = [
+    [],
+    ['--all'],
+    ['--count', '3', '--include', 'police'],
+    ['--start', '2020-01-01', '--length', 'long'],
+    ['--match', 'token', '--include', 'nytimes.com,wired', '--favorite'],
+]
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestStore:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test that the SQLite store gives the same results as the JSON snapshot."""
+
+    @pytest.mark.parametrize('args', SEARCH_ARGS)
+    def test_search(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock, args: list):
+        """Test searching."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        json_result = runner.invoke(search, args=args)
+        sqlite_result = runner.invoke(search, args=['--store', 'sqlite'] + args)
+
+        assert sqlite_result.exit_code == 0
+        assert sqlite_result.output == json_result.output
+
+    @pytest.mark.parametrize('args', REPORT_ARGS)
+    @patch('pockette.pocket_handler.PocketDataHandler._get_current_datetime')
+    def test_report(self, mock_now: MagicMock, mock_post: MagicMock, mock_env_vars,
+                    fake_pocket_response: MagicMock, args: list):
+        """Test the report."""
+        mock_now.return_value = datetime.datetime(2020, 6, 14)
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        json_result = runner.invoke(report, args=args)
+        sqlite_result = runner.invoke(report, args=['--store', 'sqlite'] + args)
+
+        assert sqlite_result.exit_code == 0
+        assert sqlite_result.output == json_result.output
+
+    def test_offline(self, mock_post: MagicMock, mock_env_vars, fake_pocket_response: MagicMock,
+                     isolated_data_file: str):
+        """Test that the store is reused offline, and that a missing store is an error."""
+        mock_post.return_value = fake_pocket_response
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--store', 'sqlite', '--offline'])
+
+        assert result.exit_code == 1
+        assert f'No local Pocket data found ({isolated_data_file}.sqlite)' in result.output
+
+        runner.invoke(search, args=['--store', 'sqlite'])
+        mock_post.reset_mock()
+        result = runner.invoke(search, args=['--store', 'sqlite', '--offline'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+        assert not mock_post.called
+
+
+class TestPocketStore:
+    """Test the store directly."""
+
+    def test_save_changes(self, tmp_path):
+        """Test that changes keep positions, archived items are hidden, and deleted items are removed."""
+        store = PocketStore(str(tmp_path / 'store.sqlite'))
+        link = {'time_added': '1', 'resolved_url': 'https://a.com', 'resolved_title': 'A', 'status': '0'}
+        store.save({'list': {'1': link, '2': dict(link, time_added='2'), '3': link}, 'since': 10}, replace=True)
+        store.save({'list': {'1': dict(link, resolved_title='A2'), '2': dict(link, status='1'),
+                             '3': dict(link, status='2'), '4': link}, 'since': 20})
+
+        items, total = store.search(store.get_where(), order='oldest')
+
+        assert total == 2
+        assert [(item.item_id, item.title) for item in items] == [('1', 'A2'), ('4', 'A')]
+        assert store.get_since() == 20
+        assert store.connection.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 3
+        assert store.connection.execute('SELECT COUNT(*) FROM items_fts').fetchone()[0] == 3
+
+    def test_no_changes(self, tmp_path):
+        """Test that an empty delta keeps the items and the last `since`."""
+        store = PocketStore(str(tmp_path / 'store.sqlite'))
+        store.save({'list': {'1': {'time_added': '1', 'status': '0'}}, 'since': 10}, replace=True)
+        store.save({'list': [], 'since': None})
+
+        assert store.search(store.get_where())[1] == 1
+        assert store.get_since() == 10
+
+    def test_indexes(self, tmp_path):
+        """Test that date and domain queries use indexes."""
+        store = PocketStore(str(tmp_path / 'store.sqlite'))
+        clause, parameters = store.get_where(start_time=1, end_time=2)
+
+        plan = store.connection.execute(
+            f'EXPLAIN QUERY PLAN SELECT * FROM items WHERE {clause} ORDER BY site', parameters
+        ).fetchall()
+
+        assert any('USING INDEX' in row[-1] for row in plan)
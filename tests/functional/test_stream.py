@@ -0,0 +1,68 @@
+"""Test streaming Pocket API responses."""
+
+import json
+
+import pytest
+
+from pockette.pocket_stream import ITEM_FIELDS, parse_pocket_response
+
+
+@pytest.fixture
+def fake_pocket_bytes(fake_pocket_file: str) -> bytes:
+    """Get the fake Pocket response body."""
+    with open(fake_pocket_file, 'rb') as f_in:
+        return f_in.read()
+
+
+def _get_chunks(data: bytes, size: int) -> list:
+    """Split data into chunks."""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestStream:  # pylint: disable=redefined-outer-name
+    """Test streaming Pocket API responses."""
+
+    @pytest.mark.parametrize('chunk_size', [5, 64, 1024, 10 ** 7])
+    def test_parse_chunks(self, fake_pocket_bytes: bytes, chunk_size: int):
+        """Test that any chunking, including splits inside multi-byte characters, parses the same."""
+        expected = json.loads(fake_pocket_bytes)
+
+        pocket_data = parse_pocket_response(_get_chunks(fake_pocket_bytes, chunk_size))
+
+        assert pocket_data['since'] == expected['since']
+        assert pocket_data['list'].keys() == expected['list'].keys()
+        for item_id, link in pocket_data['list'].items():
+            assert link == {field: expected['list'][item_id][field] for field in ITEM_FIELDS
+                            if field in expected['list'][item_id]}
+
+    def test_parse_prunes_fields(self, fake_pocket_bytes: bytes):
+        """Test that unused item fields are dropped."""
+        pocket_data = parse_pocket_response([fake_pocket_bytes])
+
+        link = pocket_data['list']['3015809930']
+        assert link['resolved_title'] == 'Yes, We Mean Literally Abolish the Police'
+        assert 'images' not in link
+        assert 'authors' not in link
+        assert 'top_image_url' not in link
+
+    def test_parse_all_fields(self, fake_pocket_bytes: bytes):
+        """Test that pruning can be turned off."""
+        assert parse_pocket_response([fake_pocket_bytes], fields=None) == json.loads(fake_pocket_bytes)
+
+    def test_parse_empty_list(self):
+        """Test that an empty array is kept as is."""
+        pocket_data = parse_pocket_response([b'{"status": 2, "list": [], "since": 1592014338}'])
+
+        assert pocket_data == {'status': 2, 'list': [], 'since': 1592014338}
+
+    def test_parse_number_across_chunks(self):
+        """Test that a number split across chunks isn't cut short."""
+        pocket_data = parse_pocket_response([b'{"since": 15920', b'14338}'])
+
+        assert pocket_data['since'] == 1592014338
+
+    @pytest.mark.parametrize('body', [b'', b'{"invalid": "json"', b'{"list": {"1": {}', b'{"a": 1} x', b'[]'])
+    def test_parse_invalid(self, body: bytes):
+        """Test that invalid responses raise a decode error."""
+        with pytest.raises(json.JSONDecodeError):
+            parse_pocket_response([body])
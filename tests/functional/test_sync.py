@@ -0,0 +1,217 @@
+"""Test incremental syncing of the local Pocket data snapshot."""
+
+import json
+import os
+import threading
+from unittest.mock import patch, MagicMock
+
+from click.testing import CliRunner
+import pytest
+import requests
+
+from pockette.cli import search
+from pockette.pocket_cache import PocketCache
+from pockette.pocket_handler import PocketDataHandler
+
+
+def _get_fake_response(pocket_data: dict) -> MagicMock:
+    """Get fake Pocket response."""
+    response = MagicMock()
+    response.text = json.dumps(pocket_data)
+    response.iter_content.return_value = [response.text.encode('utf-8')]
+    return response
+
+
+@patch('pockette.pocket_client.requests.Session.post')
+class TestSync:  # pylint: disable=redefined-outer-name,unused-argument
+    """Test incremental syncing."""
+
+    def test_sync_changes(self, mock_post: MagicMock, mock_env_vars, fake_pocket_data: dict,
+                          isolated_data_file: str):
+        """Test that a stale snapshot only downloads and merges the changes since the last sync."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+
+        new_link = dict(fake_pocket_data['list']['3015809930'], item_id='1', resolved_title='Brand New Page')
+        mock_post.return_value = _get_fake_response({
+            'status': 1,
+            'since': 1592100000,
+            'list': {
+                '1': new_link,
+                '3015809930': {'item_id': '3015809930', 'status': '1'},
+                '3015173774': {'item_id': '3015173774', 'status': '2'},
+            },
+        })
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--cache-ttl', '0', '--cache-hard-ttl', '0'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (43)' in result.output
+        assert 'Brand New Page' in result.output
+
+        request_data = mock_post.call_args.kwargs['json']
+        assert request_data['state'] == 'all'
+        assert request_data['since'] == str(fake_pocket_data['since'])
+
+        pocket_data = PocketCache(isolated_data_file).load()
+        assert pocket_data is not None
+        assert pocket_data['since'] == 1592100000
+        assert '1' in pocket_data['list']
+        assert '3015809930' not in pocket_data['list']
+        assert '3015173774' not in pocket_data['list']
+
+    def test_sync_no_changes(self, mock_post: MagicMock, mock_env_vars, fake_pocket_data: dict,
+                             isolated_data_file: str):
+        """Test syncing when Pocket reports no changes (an empty list instead of an object)."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_post.return_value = _get_fake_response({'status': 2, 'since': 1592100000, 'list': []})
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--cache-ttl', '0', '--cache-hard-ttl', '0'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+
+    def test_full_sync(self, mock_post: MagicMock, mock_env_vars, fake_pocket_data: dict, isolated_data_file: str):
+        """Test that the --full-sync option downloads all unread data."""
+        PocketCache(isolated_data_file).save({'list': {}, 'since': 1})
+        mock_post.return_value = _get_fake_response(fake_pocket_data)
+
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--full-sync'])
+
+        assert result.exit_code == 0
+        assert 'Pages found (44)' in result.output
+
+        request_data = mock_post.call_args.kwargs['json']
+        assert request_data['state'] == 'unread'
+        assert 'since' not in request_data
+
+    def test_full_sync_offline(self, mock_post: MagicMock, mock_env_vars):
+        """Test that --full-sync and --offline cannot be combined."""
+        runner = CliRunner()
+        result = runner.invoke(search, args=['--full-sync', '--offline'])
+
+        assert result.exit_code == 2
+        assert not mock_post.called
+
+
+@patch('pockette.pocket_cache.PocketCache._get_current_time')
+@patch('pockette.pocket_client.requests.Session.post')
+class TestBackgroundRefresh:  # pylint: disable=redefined-outer-name,unused-argument,too-many-arguments
+    """Test using a stale snapshot while it is synced in the background."""
+
+    @pytest.fixture
+    def new_link_response(self, fake_pocket_data: dict) -> MagicMock:
+        """Get a fake response with one new link."""
+        new_link = dict(fake_pocket_data['list']['3015809930'], item_id='1', resolved_title='Brand New Page')
+        return _get_fake_response({'status': 1, 'since': 1592100000, 'list': {'1': new_link}})
+
+    def test_stale(self, mock_post: MagicMock, mock_now: MagicMock, mock_env_vars, fake_pocket_data: dict,
+                   isolated_data_file: str, new_link_response: MagicMock):
+        """Test that a stale snapshot is used right away, and synced in the background."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + 60
+
+        downloaded = threading.Event()
+
+        def download(*args, **kwargs):
+            downloaded.wait(5)
+            return new_link_response
+
+        mock_post.side_effect = download
+        handler = PocketDataHandler(data_file=isolated_data_file, cache_ttl=30, cache_hard_ttl=3600)
+
+        assert handler.refresh_thread is not None
+        assert handler.refresh_thread.is_alive()
+        assert len(handler.items) == 44
+
+        downloaded.set()
+        handler.refresh_thread.join(5)
+
+        assert mock_post.call_args.kwargs['json']['since'] == str(fake_pocket_data['since'])
+
+        pocket_data = PocketCache(isolated_data_file).load()
+        assert pocket_data is not None
+        assert len(pocket_data['list']) == 45
+
+    def test_past_hard_ttl(self, mock_post: MagicMock, mock_now: MagicMock, mock_env_vars, fake_pocket_data: dict,
+                           isolated_data_file: str, new_link_response: MagicMock):
+        """Test that a snapshot past the hard TTL is synced before it is used."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + 7200
+        mock_post.return_value = new_link_response
+
+        handler = PocketDataHandler(data_file=isolated_data_file, cache_ttl=30, cache_hard_ttl=3600)
+
+        assert handler.refresh_thread is None
+        assert len(handler.items) == 45
+
+    @pytest.mark.parametrize('age, offline', [(10, False), (60, True)])
+    def test_not_synced(self, mock_post: MagicMock, mock_now: MagicMock, mock_env_vars, fake_pocket_data: dict,
+                        isolated_data_file: str, age: int, offline: bool):
+        """Test that fresh snapshots, and stale snapshots with --offline, are not synced."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + age
+
+        handler = PocketDataHandler(data_file=isolated_data_file, cache_ttl=30, offline=offline)
+
+        assert handler.refresh_thread is None
+        assert not mock_post.called
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_sync_failed(self, mock_sleep: MagicMock, mock_post: MagicMock, mock_now: MagicMock, mock_env_vars,
+                         fake_pocket_data: dict, isolated_data_file: str):
+        """Test that the stale snapshot is kept when syncing in the background fails."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + 60
+        mock_post.side_effect = requests.exceptions.ConnectionError()
+
+        handler = PocketDataHandler(data_file=isolated_data_file, cache_ttl=30)
+        assert handler.refresh_thread is not None
+        handler.refresh_thread.join(5)
+
+        pocket_data = PocketCache(isolated_data_file).load()
+        assert pocket_data is not None
+        assert len(pocket_data['list']) == 44
+
+    @patch('pockette.pocket_store.PocketStore._get_current_time')
+    def test_stale_store(self, mock_store_now: MagicMock, mock_post: MagicMock, mock_now: MagicMock, mock_env_vars,
+                         fake_pocket_data: dict, isolated_data_file: str, new_link_response: MagicMock):
+        """Test that a stale SQLite store is used right away, and synced in the background."""
+        mock_store_now.return_value = 1000
+        mock_post.return_value = _get_fake_response(fake_pocket_data)
+        PocketDataHandler(data_file=isolated_data_file, store='sqlite')
+
+        mock_store_now.return_value = 1060
+        mock_post.return_value = new_link_response
+        handler = PocketDataHandler(data_file=isolated_data_file, store='sqlite', cache_ttl=30)
+
+        assert handler.refresh_thread is not None
+        handler.refresh_thread.join(5)
+
+        assert mock_post.call_args.kwargs['json']['since'] == str(fake_pocket_data['since'])
+        assert handler.store is not None
+        assert handler.store.search(handler.store.get_where(), order='newest', offset=0, count=None)[1] == 45
+
+    @patch('pockette.pocket_client.time.sleep')
+    def test_sync_failed_output(self, mock_sleep: MagicMock, mock_post: MagicMock, mock_now: MagicMock,
+                                mock_env_vars, fake_pocket_data: dict, isolated_data_file: str):
+        """Test that a failed sync in the background only warns on stderr, so machine-readable output is valid."""
+        PocketCache(isolated_data_file).save(fake_pocket_data)
+        mock_now.return_value = os.path.getmtime(isolated_data_file) + 60
+        mock_post.side_effect = requests.exceptions.ConnectionError('Connection refused')
+
+        # Sync before the results are written, so the warning can't be missed
+        refresh = PocketDataHandler._refresh_in_background  # pylint: disable=protected-access
+        with patch.object(PocketDataHandler, '_start_background_refresh', refresh):
+            result = CliRunner().invoke(search, args=['--cache-ttl', '30', '--output', 'jsonl'])
+
+        assert result.exit_code == 0
+        assert mock_post.called
+
+        lines = result.output.splitlines()
+        warnings = [line for line in lines if line.startswith('WARNING: ')]
+        assert len(warnings) == 1
+        assert 'Connection refused' in warnings[0]
+        assert len([json.loads(line) for line in lines if line not in warnings]) == 10
@@ -0,0 +1,188 @@
+"""Test opening links in browser tabs."""
+
+import re
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import webbrowser
+
+from click.testing import CliRunner
+import pytest
+
+from pockette.cli import read
+from pockette.pocket_tabs import TabScheduler
+
+
+@patch('pockette.pocket_tabs.webbrowser.open')
+class TestTabScheduler:
+    """Test the tab scheduler directly."""
+
+    def test_dedupe(self, mock_open: MagicMock):
+        """Test that each URL is only opened once."""
+        with TabScheduler(rate=0) as tabs:
+            assert tabs.open('https://example.com/a')
+            assert not tabs.open('https://example.com/a')
+            assert tabs.open('https://example.com/b')
+
+        assert sorted(call.args[0] for call in mock_open.call_args_list) == [
+            'https://example.com/a', 'https://example.com/b'
+        ]
+
+    @pytest.mark.parametrize('max_tabs,opened', [(3, 3), (0, 10)])
+    def test_max_tabs(self, mock_open: MagicMock, max_tabs: int, opened: int):
+        """Test that URLs after the maximum are refused, unless there is no maximum."""
+        with TabScheduler(max_tabs=max_tabs, rate=0) as tabs:
+            results = [tabs.open(f'https://example.com/{i}') for i in range(10)]
+
+        assert results.count(True) == opened
+        assert tabs.is_full() == bool(max_tabs)
+        assert mock_open.call_count == opened
+
+    def test_max_tabs_together(self, mock_open: MagicMock):
+        """Test that URLs scheduled together are cut off at the maximum."""
+        with TabScheduler(max_tabs=3, rate=0) as tabs:
+            assert tabs.open('https://example.com/a', 'https://example.com/b')
+            assert tabs.open('https://example.com/c', 'https://example.com/d')
+            assert not tabs.open('https://example.com/e')
+
+        assert sorted(call.args[0] for call in mock_open.call_args_list) == [
+            'https://example.com/a', 'https://example.com/b', 'https://example.com/c'
+        ]
+
+    def test_order_together(self, mock_open: MagicMock):
+        """Test that URLs scheduled together are opened in order, even with several workers."""
+        opened = []
+        lock = threading.Lock()
+
+        def open_url(url: str) -> bool:
+            if url.endswith('pocket'):
+                time.sleep(0.02)
+            with lock:
+                opened.append(url)
+            return True
+
+        mock_open.side_effect = open_url
+
+        with TabScheduler(rate=0, batch_size=4, workers=4, max_tabs=0) as tabs:
+            for i in range(4):
+                tabs.open(f'https://example.com/{i}/pocket', f'https://example.com/{i}/original')
+
+        assert len(opened) == 8
+        assert all(
+            opened.index(f'https://example.com/{i}/pocket') < opened.index(f'https://example.com/{i}/original')
+            for i in range(4)
+        )
+
+    @pytest.mark.parametrize('batch_size,sleeps', [(2, [0.2, 0.2]), (1, [0.1] * 5), (6, [])])
+    def test_rate(self, mock_open: MagicMock, batch_size: int, sleeps: list):
+        """Test that each batch waits until the rate allows that many more tabs."""
+        clock = [100.0]
+
+        def sleep(seconds: float):
+            clock[0] += seconds
+
+        with patch.object(TabScheduler, '_get_current_time', side_effect=lambda: clock[0]), \
+                patch.object(TabScheduler, '_sleep', side_effect=sleep) as mock_sleep:
+            with TabScheduler(rate=10, batch_size=batch_size, max_tabs=0) as tabs:
+                for i in range(6):
+                    tabs.open(f'https://example.com/{i}')
+
+        assert [call.args[0] for call in mock_sleep.call_args_list] == pytest.approx(sleeps)
+        assert mock_open.call_count == 6
+
+    def test_workers(self, mock_open: MagicMock):
+        """Test that a batch is opened in parallel."""
+        barrier = threading.Barrier(3, timeout=5)
+        mock_open.side_effect = lambda url: barrier.wait() is not None
+
+        with TabScheduler(rate=0, batch_size=3, workers=3) as tabs:
+            for i in range(3):
+                tabs.open(f'https://example.com/{i}')
+
+        assert not barrier.broken
+        assert not tabs.failed
+
+    def test_failed(self, mock_open: MagicMock):
+        """Test that URLs that couldn't be opened are kept track of."""
+        def open_url(url: str) -> bool:
+            if url.endswith('error'):
+                raise webbrowser.Error('No browser')
+            return not url.endswith('false')
+
+        mock_open.side_effect = open_url
+
+        with TabScheduler(rate=0) as tabs:
+            for path in ('ok', 'false', 'error'):
+                tabs.open(f'https://example.com/{path}')
+
+        assert sorted(tabs.failed) == ['https://example.com/error', 'https://example.com/false']
+
+
+@patch('pockette.pocket_tabs.webbrowser.open')
+@patch('pockette.pocket_client.requests.Session.post')
+class TestReadTabs:  # pylint: disable=redefined-outer-name,unused-argument,too-many-arguments
+    """Test the tab options of `pockette read`."""
+
+    @pytest.mark.parametrize('open_mode,pattern', [
+        ('pocket', r'^https://app\.getpocket\.com/read/\d+$'), ('original', r'^(?!https://app\.getpocket\.com)')
+    ])
+    def test_open_mode(self, mock_post: MagicMock, mock_open: MagicMock, mock_env_vars,
+                       fake_pocket_response: MagicMock, open_mode: str, pattern: str):
+        """Test opening only the Pocket reader pages, or only the original pages."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(read, args=['--count', '5', '--open', open_mode])
+
+        assert result.exit_code == 0
+        urls = [call.args[0] for call in mock_open.call_args_list]
+        assert len(urls) == 5
+        assert all(re.match(pattern, url) for url in urls)
+
+    def test_max_tabs(self, mock_post: MagicMock, mock_open: MagicMock, mock_env_vars,
+                      fake_pocket_response: MagicMock):
+        """Test that links stop at the maximum number of tabs."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(read, args=['--count', '5', '--max-tabs', '6'])
+
+        assert result.exit_code == 0
+        assert mock_open.call_count == 6
+        assert ' 3: ' in result.output
+        assert ' 4: ' not in result.output
+        assert 'Opening only the first 6 new tabs' in result.output
+
+    def test_max_tabs_all(self, mock_post: MagicMock, mock_open: MagicMock, mock_env_vars,
+                          fake_pocket_response: MagicMock):
+        """Test that --all lists every link, and only stops opening tabs at the maximum."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(read, args=['--all', '--max-tabs', '6'])
+
+        assert result.exit_code == 0
+        assert mock_open.call_count == 6
+        assert len(re.findall(r'/read/\d+', result.output)) == 44
+        assert result.output.rstrip().endswith('Use --max-tabs to open more.')
+
+    def test_no_max_tabs(self, mock_post: MagicMock, mock_open: MagicMock, mock_env_vars,
+                         fake_pocket_response: MagicMock):
+        """Test opening every link, with each URL opened once."""
+        mock_post.return_value = fake_pocket_response
+
+        result = CliRunner().invoke(read, args=['--all', '--max-tabs', '0'])
+
+        assert result.exit_code == 0
+        urls = [call.args[0] for call in mock_open.call_args_list]
+        assert len(urls) == len(set(urls))
+        assert len(re.findall(r'/read/\d+', result.output)) == 44
+        assert 'Opening only' not in result.output
+
+    def test_failed(self, mock_post: MagicMock, mock_open: MagicMock, mock_env_vars,
+                    fake_pocket_response: MagicMock):
+        """Test warning about tabs that couldn't be opened."""
+        mock_post.return_value = fake_pocket_response
+        mock_open.return_value = False
+
+        result = CliRunner().invoke(read, args=['--count', '2'])
+
+        assert result.exit_code == 0
+        assert 'WARNING: Could not open 4 tabs.' in result.output